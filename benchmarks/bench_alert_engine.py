@@ -0,0 +1,99 @@
+#===========================================================================
+# ALERT ENGINE BENCHMARK
+# Simulates buildings whose readings drift slowly (so conditions persist for
+# many cycles), then compares how many alerts reach the dashboard per cycle
+# with the stateless rules (what check_thresholds reported every cycle) and
+# with AlertSystem.evaluate (hysteresis + cooldown), and how long one batch
+# evaluation takes.
+#
+#   python benchmarks/bench_alert_engine.py --buildings 5000 --cycles 48
+#===========================================================================
+
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_model_training import AlertSystem, EnergyConfig
+
+
+def simulate(n_buildings, n_cycles, interval, seed):
+    # Random walks around typical values; one batch of readings per cycle
+    rng = np.random.default_rng(seed)
+    names = list(EnergyConfig.APPLIANCE_PROFILES)
+    types = np.array([EnergyConfig.APPLIANCE_TYPES[profile['type']] for profile in EnergyConfig.APPLIANCE_PROFILES.values()])
+    energy = rng.uniform(60, 125, n_buildings)
+    temperature = rng.uniform(24, 34, n_buildings)
+    occupancy = rng.uniform(5, 100, n_buildings)
+    running = rng.random((n_buildings, len(names))) < 0.5
+    start = time.time() - n_cycles * interval
+
+    for cycle in range(n_cycles):
+        energy = np.clip(energy + rng.normal(0, 3, n_buildings), 20, 160)
+        temperature = np.clip(temperature + rng.normal(0, 0.3, n_buildings), 18, 40)
+        occupancy = np.clip(occupancy + rng.normal(0, 4, n_buildings), 0, 150)
+        flip = rng.random(running.shape) < 0.05
+        running = running ^ flip
+
+        readings = {
+            'source': np.arange(n_buildings),
+            'timestamp': np.full(n_buildings, start + cycle * interval),
+            'energy': energy,
+            'Temperature': temperature,
+            'Occupancy': occupancy
+        }
+        appliances = {
+            'reading': np.repeat(np.arange(n_buildings), len(names)),
+            'name': np.tile(names, n_buildings),
+            'type': np.tile(types, n_buildings),
+            'power': np.where(running, 1000.0, 0.0).ravel()
+        }
+        yield readings, appliances
+
+
+def run(n_buildings, n_cycles, interval, seed):
+    alert_system = AlertSystem()
+    stateless_total, sent_total = 0, 0
+    stateless_times, times = [], []
+
+    print(f"{n_buildings} buildings, {n_cycles} cycles {interval:.0f}s apart\n")
+    print(f"{'cycle':>5} {'stateless':>10} {'sent':>6} {'cleared':>8} {'active':>7} {'evaluate ms':>12}")
+    for cycle, (readings, appliances) in enumerate(simulate(n_buildings, n_cycles, interval, seed)):
+        start = time.perf_counter()
+        stateless = sum(len(messages) for messages in alert_system.check_batch(readings, appliances))
+        stateless_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        report = alert_system.evaluate(readings, appliances)
+        times.append(time.perf_counter() - start)
+
+        stateless_total += stateless
+        sent_total += len(report['raised'])
+        if cycle < 5 or cycle == n_cycles - 1:
+            print(f"{cycle + 1:>5} {stateless:>10} {len(report['raised']):>6} {len(report['cleared']):>8} "
+                  f"{report['active']:>7} {times[-1] * 1000:>12.2f}")
+
+    print(f"\nalerts to dashboard: {stateless_total} stateless vs {sent_total} deduplicated "
+          f"({stateless_total / max(sent_total, 1):.1f}x fewer)")
+    print(f"check_batch: median {np.median(stateless_times) * 1000:.2f} ms per batch of {n_buildings} readings")
+    print(f"evaluate:    median {np.median(times) * 1000:.2f} ms, steady state {np.median(times[1:]) * 1000:.2f} ms")
+    print(f"stats: {alert_system.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert volume and latency of the rule-based alert engine")
+    parser.add_argument('--buildings', type=int, default=5000)
+    parser.add_argument('--cycles', type=int, default=48)
+    parser.add_argument('--interval', type=float, default=300.0, help="seconds between cycles")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.buildings, args.cycles, args.interval, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#===========================================================================
+# BATCH PREDICTION BENCHMARK
+# Scores the same simulated readings through predict_energy (one call per
+# reading) and predict_batch (one call in total), checks that both agree and
+# reports rows per second.
+#
+#   python benchmarks/bench_batch_prediction.py --rows 5000
+#===========================================================================
+
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_model_training import EnergyMonitoringSystem
+
+
+def run(file_path, n_rows):
+    system = EnergyMonitoringSystem(file_path)
+    monitor = system.iot_monitor
+    readings = [monitor.simulate_iot_sensors()[0] for _ in range(n_rows)]
+   
+    start = time.perf_counter()
+    single = np.array([monitor.predict_energy(reading) for reading in readings])
+    single_time = time.perf_counter() - start
+   
+    frame = pd.DataFrame(readings)
+    start = time.perf_counter()
+    batch = monitor.predict_batch(frame)
+    batch_time = time.perf_counter() - start
+   
+    max_diff = float(np.max(np.abs(single - batch)))
+    print(f"\n{n_rows} readings with {monitor.best_model_name}")
+    print(f"predict_energy: {single_time:.3f}s ({n_rows / single_time:,.0f} rows/s)")
+    print(f"predict_batch:  {batch_time:.3f}s ({n_rows / batch_time:,.0f} rows/s)")
+    print(f"speedup: {single_time / batch_time:.0f}x | max abs difference: {max_diff:.2e}")
+    if not np.allclose(single, batch):
+        raise SystemExit("predict_batch disagrees with predict_energy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-reading and batch prediction throughput")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.data, args.rows)
+
+
+if __name__ == "__main__":
+    main()
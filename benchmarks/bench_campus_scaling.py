@@ -0,0 +1,135 @@
+#===========================================================================
+# CAMPUS SCALING BENCHMARK
+# Grows the campus from 5 to 100k appliances and times one monitoring cycle
+# three ways: the per-appliance dict loop (simulate_iot_sensors style +
+# AlertSystem.check_thresholds per building), the vectorized registry in
+# this process, and the registry sharded over worker processes. Also checks
+# that the vectorized alerts match check_thresholds on the same state.
+#
+#   python benchmarks/bench_campus_scaling.py --shards 4
+#===========================================================================
+
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_model_training import AlertSystem, load_energy_models
+from energy_campus import CampusMonitor, CampusRegistry
+
+
+def loop_cycle(appliances, n_buildings, energy, alert_system):
+    # What IoTEnergyMonitor + AlertSystem do today, once per building
+    n_alerts = 0
+    for b in range(n_buildings):
+        building_data = {
+            'Temperature': random.uniform(22, 35),
+            'Occupancy': random.randint(10, 100)
+        }
+        appliance_usage = {}
+        for name, info in appliances[b].items():
+            power = random.uniform(info['min'], info['max']) if random.choice([0, 1]) else 0
+            appliance_usage[name] = power
+            info['current_usage'] = power
+        n_alerts += len(alert_system.check_thresholds(energy[b], appliance_usage, building_data))
+    return n_alerts
+
+
+def check_alerts(registry, energy, alert_system):
+    # Same registry state through check_thresholds; counts must agree
+    expected = 0
+    for b in range(registry.n_buildings):
+        members = np.flatnonzero(registry.building_index == b)
+        usage = {registry.appliance_names[a]: registry.power[a] for a in members}
+        expected += len(alert_system.check_thresholds(
+            energy[b], usage, {key: values[b] for key, values in registry.readings.items()}
+        ))
+    return expected
+
+
+def time_cycles(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(file_path, sizes, per_building, n_shards, baseline_max, repeats):
+    model_comparator, preprocessor, _ = load_energy_models(file_path)
+    alert_system = AlertSystem()
+    rng = np.random.default_rng(0)
+
+    rows = []
+    for n_appliances in sizes:
+        apb = min(per_building, n_appliances)
+        n_buildings = max(1, n_appliances // apb)
+        registry = CampusRegistry.synthetic(n_buildings, apb)
+        energy = rng.uniform(60, 130, n_buildings)
+
+        # Vectorized alerts agree with check_thresholds on the same state
+        registry.simulate(rng)
+        alerts = registry.evaluate_alerts(energy)
+        if n_buildings <= 2000:
+            expected = check_alerts(registry, energy, alert_system)
+            if expected != len(alerts['code']):
+                raise SystemExit(f"alert mismatch at {n_appliances} appliances: {len(alerts['code'])} vs {expected}")
+
+        def vectorized():
+            registry.simulate(rng)
+            registry.evaluate_alerts(energy)
+        vector_time = time_cycles(vectorized, repeats)
+
+        loop_time = None
+        if registry.n_appliances <= baseline_max:
+            appliances = [
+                {registry.appliance_names[a]: {'min': float(registry.power_min[a]), 'max': float(registry.power_max[a]), 'current_usage': 0}
+                 for a in np.flatnonzero(registry.building_index == b)}
+                for b in range(n_buildings)
+            ]
+            loop_time = time_cycles(lambda: loop_cycle(appliances, n_buildings, energy, alert_system), repeats)
+
+        # Full cycles (simulate + predict + alerts), in-process and sharded
+        local = CampusMonitor(registry, model_comparator, preprocessor, n_shards=1, seed=0).start()
+        local_time = time_cycles(local.run_cycle, repeats)
+        sharded_time = None
+        if n_shards > 1 and n_buildings > 1:
+            campus = CampusMonitor(registry, model_comparator, preprocessor, n_shards=n_shards, seed=0).start()
+            try:
+                campus.run_cycle()  # first cycle pays for worker start-up
+                sharded_time = time_cycles(campus.run_cycle, repeats)
+            finally:
+                campus.close()
+
+        rows.append((registry.n_appliances, n_buildings, loop_time, vector_time, local_time, sharded_time))
+
+    fmt = lambda t: f"{t * 1000:10.2f}" if t is not None else f"{'-':>10}"
+    print(f"\n{'appliances':>10} {'buildings':>9} | alerts ms: {'loop':>10} {'vector':>10} {'speedup':>8} | "
+          f"cycle ms: {'1 process':>10} {f'{n_shards} shards':>10}")
+    for n_appliances, n_buildings, loop_time, vector_time, local_time, sharded_time in rows:
+        speedup = f"{loop_time / vector_time:7.1f}x" if loop_time else f"{'-':>8}"
+        print(f"{n_appliances:>10} {n_buildings:>9} |            {fmt(loop_time)} {fmt(vector_time)} {speedup} | "
+              f"          {fmt(local_time)} {fmt(sharded_time)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale campus monitoring from 5 to 100k appliances")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 100, 1000, 10000, 100000])
+    parser.add_argument('--appliances-per-building', type=int, default=50)
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--baseline-max', type=int, default=100000, help="skip the dict loop above this many appliances")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    run(args.data, args.sizes, args.appliances_per_building, args.shards, args.baseline_max, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#===========================================================================
+# IMPUTATION BENCHMARK
+# Masks known values in the hourly dataset, imputes them with each strategy
+# and reports runtime and error on the masked cells.
+#
+#   python benchmarks/bench_imputation.py --missing 0.05 --repeat 4
+#===========================================================================
+
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_model_training import EnergyDataPreprocessor, IMPUTATION_STRATEGIES, make_imputer
+
+
+MASKED_COLUMNS = ['Temperature', 'Humidity', 'Occupancy', 'RenewableEnergy', 'EnergyConsumption']
+
+
+def prepare_numeric_frame(file_path, repeat):
+    preprocessor = EnergyDataPreprocessor(imputation_strategy='none')
+    preprocessor.load_data(file_path)
+    preprocessor.clean_data()
+    preprocessor.feature_engineering()
+    preprocessor.encode_categorical_variables()
+    data = preprocessor.cleaned_data.select_dtypes(include=[np.number])
+    time_index = preprocessor.time_index
+   
+    # Tile the series forward in time to simulate multi-year data
+    if repeat > 1:
+        span = time_index.max() - time_index.min() + pd.Timedelta(hours=1)
+        data = pd.concat([data] * repeat, ignore_index=True)
+        time_index = pd.concat([time_index + span * i for i in range(repeat)], ignore_index=True)
+    return data, time_index
+
+
+def mask_values(data, fraction, seed):
+    rng = np.random.default_rng(seed)
+    masked = data.copy()
+    mask = pd.DataFrame(False, index=data.index, columns=data.columns)
+    for col in MASKED_COLUMNS:
+        if col in data.columns:
+            mask[col] = rng.random(len(data)) < fraction
+            masked.loc[mask[col], col] = np.nan
+    return masked, mask
+
+
+def run(file_path, fraction, repeat, strategies, seed):
+    data, time_index = prepare_numeric_frame(file_path, repeat)
+    masked, mask = mask_values(data, fraction, seed)
+    print(f"\n{len(data)} rows, {int(mask.to_numpy().sum())} masked cells ({fraction:.0%} of {len(MASKED_COLUMNS)} columns)")
+   
+    rows = []
+    for strategy in strategies:
+        if strategy == 'none':
+            continue
+        imputer = make_imputer(strategy)
+        start = time.perf_counter()
+        imputed = imputer.fit_transform(masked, time_index)
+        elapsed = time.perf_counter() - start
+       
+        # Error per column, normalised by the column's spread so columns are comparable
+        errors = []
+        for col in MASKED_COLUMNS:
+            if col in data.columns and mask[col].any():
+                diff = imputed.loc[mask[col], col] - data.loc[mask[col], col]
+                errors.append(np.sqrt(np.mean(diff ** 2)) / (data[col].std() or 1.0))
+        rows.append({'Strategy': strategy, 'Seconds': elapsed, 'NRMSE': float(np.mean(errors))})
+       
+    df = pd.DataFrame(rows).sort_values('Seconds')
+    print(df.to_string(index=False))
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare missing value imputation strategies")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--missing', type=float, default=0.05, help="fraction of cells to mask per column")
+    parser.add_argument('--repeat', type=int, default=1, help="tile the dataset this many times")
+    parser.add_argument('--strategies', nargs='+', default=sorted(IMPUTATION_STRATEGIES))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.data, args.missing, args.repeat, args.strategies, args.seed)
+
+
+if __name__ == "__main__":
+    main()
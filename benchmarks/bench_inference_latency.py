@@ -0,0 +1,71 @@
+#===========================================================================
+# SINGLE-READING LATENCY BENCHMARK
+# Times every call of the compiled inference pipeline (predict_energy) and of
+# the original pandas path (predict_energy_reference) on the same simulated
+# readings, and reports p50/p99 latency in microseconds.
+#
+#   python benchmarks/bench_inference_latency.py --readings 5000
+#===========================================================================
+
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_model_training import EnergyMonitoringSystem
+
+
+def measure(predict, readings):
+    latencies = np.empty(len(readings))
+    predictions = np.empty(len(readings))
+    for i, reading in enumerate(readings):
+        start = time.perf_counter()
+        predictions[i] = predict(reading)
+        latencies[i] = time.perf_counter() - start
+    return predictions, latencies * 1e6
+
+
+def report(label, latencies):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{label:<10} p50 {p50:9.1f} us | p99 {p99:9.1f} us | mean {latencies.mean():9.1f} us")
+
+
+def run(file_path, n_readings, n_reference):
+    system = EnergyMonitoringSystem(file_path)
+    monitor = system.iot_monitor
+    readings = [monitor.simulate_iot_sensors()[0] for _ in range(n_readings)]
+   
+    # Warm up both paths before timing
+    for reading in readings[:50]:
+        monitor.predict_energy(reading)
+        monitor.predict_energy_reference(reading)
+       
+    compiled, compiled_latency = measure(monitor.predict_energy, readings)
+    reference, reference_latency = measure(monitor.predict_energy_reference, readings[:n_reference])
+   
+    print(f"\n{monitor.best_model_name} (kernel: {monitor.compiled_pipeline.kernel})")
+    report("compiled", compiled_latency)
+    report("pandas", reference_latency)
+    max_diff = float(np.max(np.abs(compiled[:n_reference] - reference)))
+    print(f"max abs difference: {max_diff:.2e}")
+    if not np.allclose(compiled[:n_reference], reference):
+        raise SystemExit("compiled pipeline disagrees with the pandas path")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-reading inference latency")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--readings', type=int, default=5000)
+    parser.add_argument('--reference-readings', type=int, default=1000,
+                        help="readings timed through the slower pandas path")
+    args = parser.parse_args()
+    run(args.data, args.readings, min(args.reference_readings, args.readings))
+
+
+if __name__ == "__main__":
+    main()
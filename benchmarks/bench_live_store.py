@@ -0,0 +1,115 @@
+#===========================================================================
+# LIVE STORE BENCHMARK
+# Writes --days of one-second readings for one device both as live_data.csv
+# text and into a TimeSeriesStore (energy_store.py), then compares the size
+# on disk, append throughput and the time of a one-day range read (store:
+# indexed blocks only; text: parse the whole file and filter). Readings
+# hold their values for runs of seconds like the real sensors do.
+#
+#   python benchmarks/bench_live_store.py --days 30
+#===========================================================================
+
+
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_store import TimeSeriesStore
+
+
+def generate_readings(days, seed, start='2025-01-01'):
+    # Piecewise-constant sensor values: each column changes at random moments
+    rng = np.random.default_rng(seed)
+    n = days * 24 * 3600
+    timestamps = pd.Timestamp(start) + pd.to_timedelta(np.arange(n), unit='s')
+
+    def steps(mean_run, values):
+        changes = np.flatnonzero(rng.random(n) < 1 / mean_run)
+        held = np.searchsorted(changes, np.arange(n), side='right')
+        return values(len(changes) + 1)[held]
+
+    temperature = 28 + np.cumsum(steps(300, lambda k: rng.choice([-0.1, 0.0, 0.1], k)) * (rng.random(n) < 1 / 300))
+    humidity = steps(120, lambda k: rng.integers(40, 70, k).astype(float))
+    load = steps(600, lambda k: rng.choice([0.0, 2.5, 8.0, 15.0], k, p=[0.4, 0.3, 0.2, 0.1]))
+    current = np.where(load > 2.5, (load + rng.normal(0, 0.3, n)).round(3), load)
+    pred = steps(900, lambda k: rng.uniform(40, 90, k))
+    return pd.DataFrame({'timestamp': timestamps, 'temperature': temperature.round(1), 'humidity': humidity,
+                         'current': np.maximum(current, 0), 'pred': pred})
+
+
+def write_text(readings, path):
+    # Same layout the ingestion server appends (timestamp,temp,hum,current,pred)
+    readings.rename(columns={'temperature': 'temp', 'humidity': 'hum'}).to_csv(
+        path, index=False, date_format='%Y-%m-%d %H:%M:%S.%f')
+
+
+def run(days, seed, work_dir, batch_rows):
+    readings = generate_readings(days, seed)
+    os.makedirs(work_dir, exist_ok=True)
+    text_path = os.path.join(work_dir, "live_data.csv")
+    store_path = os.path.join(work_dir, "live_store")
+    shutil.rmtree(store_path, ignore_errors=True)
+
+    begin = time.perf_counter()
+    write_text(readings, text_path)
+    text_write = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    with TimeSeriesStore(store_path) as store:
+        for start in range(0, len(readings), batch_rows):
+            batch = readings.iloc[start:start + batch_rows]
+            store.append(batch['timestamp'], batch, 'device')
+    store_write = time.perf_counter() - begin
+
+    day_start = readings['timestamp'].iloc[0] + pd.Timedelta(days=days // 2)
+    day_end = day_start + pd.Timedelta(days=1)
+
+    begin = time.perf_counter()
+    text = pd.read_csv(text_path, parse_dates=['timestamp'])
+    text_day = text[(text['timestamp'] >= day_start) & (text['timestamp'] < day_end)]
+    text_read = time.perf_counter() - begin
+
+    store = TimeSeriesStore(store_path)
+    begin = time.perf_counter()
+    store_day = store.read(day_start, day_end, 'device')
+    store_read = time.perf_counter() - begin
+
+    expected = readings[(readings['timestamp'] >= day_start) & (readings['timestamp'] < day_end)]
+    if not (len(store_day) == len(text_day) == len(expected)
+            and np.array_equal(store_day.drop(columns='timestamp').to_numpy(),
+                               expected.drop(columns='timestamp').to_numpy())):
+        raise SystemExit("store readings differ from the generated readings")
+
+    text_bytes = os.path.getsize(text_path)
+    store_bytes = store.stats()['device']['bytes']
+    store.close()
+    print(f"{len(readings):,} one-second readings ({days} days)")
+    print(f"size:     text {text_bytes:>14,} B   store {store_bytes:>12,} B   ({text_bytes / store_bytes:.0f}x smaller, "
+          f"{store_bytes / len(readings):.2f} B/reading)")
+    print(f"write:    text {text_write:>12.2f} s   store {store_write:>10.2f} s   "
+          f"({len(readings) / store_write:,.0f} readings/s in batches of {batch_rows})")
+    print(f"day read: text {text_read:>12.3f} s   store {store_read:>10.3f} s   ({text_read / store_read:.0f}x faster, "
+          f"{len(store_day):,} readings)")
+    print(f"one year at this rate: ~{store_bytes / days * 365 / 1e6:.1f} MB stored vs "
+          f"~{text_bytes / days * 365 / 1e9:.2f} GB of text")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live reading store vs live_data.csv text")
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch-rows', type=int, default=512, help="readings per append (server batch size)")
+    parser.add_argument('--work-dir', default='benchmark_data/live_store')
+    args = parser.parse_args()
+    run(args.days, args.seed, args.work_dir, args.batch_rows)
+
+
+if __name__ == "__main__":
+    main()
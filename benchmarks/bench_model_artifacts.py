@@ -0,0 +1,139 @@
+#===========================================================================
+# MODEL ARTIFACT BENCHMARK
+# For every saved model_*.joblib, compares the full sklearn artifact with the
+# compact serving export (mmap and compressed): file size, cold-start load
+# time in a fresh interpreter (imports excluded), and resident / proportional memory per worker
+# when several workers load the same file.
+#
+#   python benchmarks/bench_model_artifacts.py --workers 4
+#===========================================================================
+
+
+import argparse
+import glob
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import joblib
+from sklearn.model_selection import train_test_split
+
+from energy_model_training import EnergyDataPreprocessor, export_serving_model
+
+
+LOAD_SNIPPET = """
+import sys, time, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {root!r})
+# Imports are paid by any process; only the artifact load is timed
+import joblib, sklearn.ensemble, sklearn.svm, energy_model_training
+start = time.perf_counter()
+joblib.load({path!r}, mmap_mode={mmap!r})
+print(time.perf_counter() - start)
+"""
+
+
+def memory_kb():
+    # (RSS, PSS) of this process; PSS splits shared pages between the processes mapping them
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1])
+    return values.get('Rss:', 0), values.get('Pss:', 0)
+
+
+def worker(path, mmap_mode, X, barrier, queue):
+    # Baseline once every worker is up, so sibling processes don't skew the deltas
+    barrier.wait()
+    before = memory_kb()
+    model = joblib.load(path, mmap_mode=mmap_mode)
+    model.predict(X)
+    # Measure while every worker holds the model, so shared pages are split between them
+    barrier.wait()
+    after = memory_kb()
+    queue.put((after[0] - before[0], after[1] - before[1]))
+    barrier.wait()
+
+
+def memory_per_worker(path, mmap_mode, X, n_workers):
+    ctx = multiprocessing.get_context('fork')
+    barrier, queue = ctx.Barrier(n_workers), ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(path, mmap_mode, X, barrier, queue)) for _ in range(n_workers)]
+    for process in processes:
+        process.start()
+    samples = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    rss, pss = np.mean(samples, axis=0)
+    return rss / 1024, pss / 1024
+
+
+def cold_start(path, mmap_mode, repeats=3):
+    times = []
+    for _ in range(repeats):
+        code = LOAD_SNIPPET.format(root=ROOT, path=path, mmap=mmap_mode)
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return min(times)
+
+
+def validation_split(file_path):
+    preprocessor = EnergyDataPreprocessor()
+    preprocessor.prepare_dataset(file_path)
+    preprocessor.scale_features()
+    X, y = preprocessor.get_preprocessed_data()
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_test, y_test
+
+
+def run(file_path, n_workers):
+    X_val, y_val = validation_split(file_path)
+    X = X_val.to_numpy()
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for model_path in sorted(glob.glob("model_*.joblib")):
+            name = os.path.basename(model_path)[len("model_"):-len(".joblib")].replace('_', ' ')
+            model = joblib.load(model_path)
+            variants = [('sklearn', model_path, None)]
+            for mode in ('mmap', 'compressed'):
+                path = os.path.join(tmp, f"{name}_{mode}.joblib")
+                export_serving_model(model, X_val, y_val, path=path, mode=mode)
+                variants.append((f"export/{mode}", path, 'r' if mode == 'mmap' else None))
+               
+            for label, path, mmap_mode in variants:
+                rss, pss = memory_per_worker(path, mmap_mode, X, n_workers)
+                rows.append({
+                    'Model': name,
+                    'Artifact': label,
+                    'Size_KB': os.path.getsize(path) / 1024,
+                    'Load_ms': cold_start(path, mmap_mode) * 1000,
+                    'RSS_MB/worker': rss,
+                    'PSS_MB/worker': pss
+                })
+               
+    df = pd.DataFrame(rows)
+    print(f"\nMemory per worker with {n_workers} workers loading the same file")
+    print(df.to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Artifact size, cold start and memory per worker")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    run(args.data, args.workers)
+
+
+if __name__ == "__main__":
+    main()
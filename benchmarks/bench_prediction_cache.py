@@ -0,0 +1,80 @@
+#===========================================================================
+# PREDICTION CACHE BENCHMARK
+# Replays --hours of one-second device readings (bench_live_store.py:
+# sensor values held for runs of seconds, 0.1 C / 1 % resolution) through
+# IoTEnergyMonitor.predict_energy and predict_batch with the prediction
+# cache on and off, and reports the hit rate, the time per reading and
+# that both give the same predictions.
+#
+#   python benchmarks/bench_prediction_cache.py --hours 6
+#===========================================================================
+
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_ingest_server import device_payload_to_building_data
+from energy_model_training import METRICS, EnergyMonitoringSystem, IoTEnergyMonitor
+from bench_live_store import generate_readings
+
+
+def device_readings(hours, seed):
+    frame = generate_readings(max(1, -(-hours // 24)), seed).head(hours * 3600)
+    return [device_payload_to_building_data(payload, timestamp) for payload, timestamp in
+            zip(frame[['temperature', 'humidity', 'current']].to_dict('records'), frame['timestamp'])]
+
+
+def replay(monitor, readings, batch_size):
+    start = time.perf_counter()
+    if batch_size == 1:
+        predictions = np.array([monitor.predict_energy(reading) for reading in readings])
+    else:
+        predictions = np.concatenate([monitor.predict_batch(readings[i:i + batch_size])
+                                      for i in range(0, len(readings), batch_size)])
+    return predictions, time.perf_counter() - start
+
+
+def run(file_path, hours, batch_size, seed):
+    system = EnergyMonitoringSystem(file_path)
+    readings = device_readings(hours, seed)
+    uncached = IoTEnergyMonitor(system.model_comparator, system.preprocessor)
+    uncached.prediction_cache = None
+    cached = IoTEnergyMonitor(system.model_comparator, system.preprocessor)
+
+    for size in sorted({1, batch_size}):
+        cached.set_models(system.model_comparator, system.preprocessor)  # start cold
+        before = cached.prediction_cache.stats()
+        reference, plain_time = replay(uncached, readings, size)
+        predictions, cached_time = replay(cached, readings, size)
+        stats = cached.prediction_cache.stats()
+        hits = stats['hits'] - before['hits']
+        lookups = hits + stats['misses'] - before['misses'] + stats['bypassed'] - before['bypassed']
+
+        label = "predict_energy" if size == 1 else f"predict_batch({size})"
+        print(f"\n{len(readings):,} readings through {label}, {cached.best_model_name}")
+        print(f"hit rate {hits / lookups:.1%} ({stats['entries']} entries)")
+        print(f"uncached {plain_time / len(readings) * 1e6:8.2f} us/reading")
+        print(f"cached   {cached_time / len(readings) * 1e6:8.2f} us/reading ({plain_time / cached_time:.1f}x faster)")
+        if not np.array_equal(predictions, reference):
+            raise SystemExit("cached predictions differ from the model's")
+    METRICS.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediction cache hit rate and speed on repeated readings")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--hours', type=int, default=6)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.data, args.hours, args.batch_size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
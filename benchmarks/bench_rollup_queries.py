@@ -0,0 +1,103 @@
+#===========================================================================
+# ROLLUP QUERY BENCHMARK
+# Times the dashboard's year-long queries (daily chart rows + totals, cost
+# and CO2) two ways: rescanning the raw hourly rows with pandas on every
+# query, and reading the pre-aggregated RollupStore. Also checks that both
+# give the same numbers.
+#
+#   python benchmarks/bench_rollup_queries.py --start 2022-01-01 --end 2023-01-01
+#===========================================================================
+
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_model_training import CarbonAnalyzer, CostAnalyzer
+from energy_rollup import RollupStore
+
+
+def load_raw(file_path):
+    data = pd.read_csv(file_path)
+    return pd.DataFrame({
+        'time': pd.to_datetime(data['Date']) + pd.to_timedelta(data['Hour'], unit='h'),
+        'energy': data['EnergyConsumption'].astype(float)
+    })
+
+
+def rescan_query(raw, start, end):
+    # What a query does without rollups: filter, group by day, price every row
+    rows = raw[(raw['time'] >= start) & (raw['time'] < end)]
+    daily = rows.groupby(rows['time'].dt.floor('D'))['energy'].agg(['sum', 'max', 'count'])
+    daily['cost'] = CostAnalyzer.calculate_costs(daily['sum'])[0]
+    daily['co2'] = CarbonAnalyzer.calculate_carbon_impact(daily['sum'])
+    totals = {'energy': rows['energy'].sum(), 'peak': rows['energy'].max(), 'count': len(rows),
+              'cost': CostAnalyzer.calculate_costs(rows['energy'].sum())[0]}
+    return daily, totals, len(rows)
+
+
+def rollup_query(store, start, end):
+    return store.series(start, end, 'day'), store.totals(start, end)
+
+
+def time_query(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - begin)
+    return np.median(times)
+
+
+def run(file_path, start, end, repeats):
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    raw = load_raw(file_path)
+
+    begin = time.perf_counter()
+    store = RollupStore.from_csv(file_path)
+    build_time = time.perf_counter() - begin
+
+    daily, totals, scanned = rescan_query(raw, start, end)
+    series, rolled = rollup_query(store, start, end)
+    series = series[series['count'] > 0].set_index('time')
+    if not (np.allclose(series['energy'], daily['sum']) and np.allclose(series['peak'], daily['max'])
+            and np.isclose(rolled['energy'], totals['energy']) and np.isclose(rolled['peak'], totals['peak'])
+            and rolled['count'] == totals['count'] and np.isclose(rolled['cost'], totals['cost'])):
+        raise SystemExit("rollup results differ from the raw rescan")
+
+    rescan_time = time_query(lambda: rescan_query(raw, start, end), repeats)
+    rollup_time = time_query(lambda: rollup_query(store, start, end), repeats)
+
+    # Live readings arriving one at a time keep the rollups current
+    live_start = pd.Timestamp(store.series(start, end, 'hour')['time'].max()) + pd.Timedelta(hours=1)
+    begin = time.perf_counter()
+    for k in range(repeats):
+        store.add_reading(live_start + pd.Timedelta(minutes=5 * k), 100.0)
+    add_time = (time.perf_counter() - begin) / repeats
+
+    print(f"{len(raw)} raw rows, {start.date()} -> {end.date()}: {scanned} rows scanned per raw query, "
+          f"{len(series)} daily rollup rows")
+    print(f"rollup build (bulk load): {build_time * 1000:8.2f} ms")
+    print(f"raw rescan query:         {rescan_time * 1000:8.2f} ms")
+    print(f"rollup query:             {rollup_time * 1000:8.2f} ms  ({rescan_time / rollup_time:.1f}x faster)")
+    print(f"incremental add_reading:  {add_time * 1000:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Year-long dashboard queries: raw rescan vs rollups")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--start', default='2022-01-01')
+    parser.add_argument('--end', default='2023-01-01')
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+    run(args.data, args.start, args.end, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
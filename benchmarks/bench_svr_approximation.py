@@ -0,0 +1,76 @@
+#===========================================================================
+# SVR APPROXIMATION BENCHMARK
+# Fits the exact RBF SVR and the NystroemSVR stand-in on growing slices of
+# synthetic campus data (synthetic_campus.py) and prints fit time, predict
+# time and holdout R2 of each. Exact SVR is skipped above --exact-limit rows,
+# where it stops being practical; the approximation keeps growing linearly.
+#
+#   python benchmarks/bench_svr_approximation.py --rows 5000 20000 100000 400000
+#===========================================================================
+
+
+import argparse
+import os
+import sys
+import time
+
+from sklearn.metrics import r2_score
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from energy_model_training import EnergyConfig, EnergyDataPreprocessor, build_model
+from synthetic_campus import cached_campus_csv
+
+
+def preprocess(file_path):
+    preprocessor = EnergyDataPreprocessor()
+    preprocessor.load_data(file_path)
+    preprocessor.clean_data()
+    preprocessor.feature_engineering()
+    preprocessor.encode_categorical_variables()
+    preprocessor.handle_missing_values()
+    preprocessor.scale_features()
+    X, y = preprocessor.get_preprocessed_data()
+    return X.to_numpy(), y.to_numpy()
+
+
+def time_model(model, X_train, y_train, X_test, y_test):
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    return fit_time, time.perf_counter() - start, r2_score(y_test, y_pred)
+
+
+def run(rows, buildings, test_rows, exact_limit, data_dir, seed):
+    # Rows come in time order, so the last test_rows rows are a chronological holdout
+    file_path = cached_campus_csv(data_dir, max(rows) + test_rows, buildings, seed=seed)
+    X, y = preprocess(file_path)
+    X_test, y_test = X[-test_rows:], y[-test_rows:]
+
+    print(f"{'rows':>9} {'model':<12} {'fit s':>9} {'predict s':>10} {'R2':>7}")
+    for n_rows in rows:
+        X_train, y_train = X[:n_rows], y[:n_rows]
+        candidates = [('NystroemSVR', build_model('SVR', n_rows=EnergyConfig.SVR_APPROXIMATION_ROWS + 1))]
+        if n_rows <= exact_limit:
+            candidates.insert(0, ('SVR', build_model('SVR')))
+        for label, model in candidates:
+            fit_time, predict_time, r2 = time_model(model, X_train, y_train, X_test, y_test)
+            print(f"{n_rows:>9} {label:<12} {fit_time:>9.2f} {predict_time:>10.3f} {r2:>7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact RBF SVR vs the Nystroem approximation")
+    parser.add_argument('--rows', type=int, nargs='+', default=[5000, 20000, 100000, 400000])
+    parser.add_argument('--buildings', type=int, default=1)
+    parser.add_argument('--test-rows', type=int, default=10000)
+    parser.add_argument('--exact-limit', type=int, default=40000, help="largest training set for exact SVR")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default='benchmark_data')
+    args = parser.parse_args()
+    run(sorted(args.rows), args.buildings, args.test_rows, args.exact_limit, args.data_dir, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#===========================================================================
+# INGESTION SERVER LOAD TEST
+# Simulates many ESP8266 devices posting readings to a running
+# energy_ingest_server.py and reports throughput and latency percentiles.
+#
+#   python energy_ingest_server.py --port 5000 &
+#   python benchmarks/load_test_ingest.py --devices 300 --interval-ms 40 --duration 20
+#===========================================================================
+
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+
+async def post_reading(reader, writer, host, port, payload):
+    body = json.dumps(payload).encode()
+    request = (
+        f"POST /iot HTTP/1.1\r\nHost: {host}:{port}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+    writer.write(request)
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def device(host, port, interval, stop_at, latencies, errors, rng):
+    # Each device keeps one connection open and posts on a fixed cadence
+    reader, writer = await asyncio.open_connection(host, port)
+    next_send = time.perf_counter() + rng.uniform(0, interval)
+    try:
+        while True:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if time.perf_counter() >= stop_at:
+                break
+            payload = {
+                'temperature': round(rng.uniform(22, 35), 2),
+                'humidity': round(rng.uniform(40, 80), 2),
+                'current': round(rng.uniform(0, 10), 3)
+            }
+            start = time.perf_counter()
+            try:
+                status = await post_reading(reader, writer, host, port, payload)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                errors.append('connection')
+                break
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+            next_send = max(next_send + interval, time.perf_counter())
+    finally:
+        writer.close()
+
+
+async def run(host, port, n_devices, interval, duration, seed):
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + duration
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        device(host, port, interval, stop_at, latencies, errors, random.Random(rng.random()))
+        for _ in range(n_devices)
+    ))
+    elapsed = time.perf_counter() - start
+
+    offered = n_devices / interval
+    print(f"\n{n_devices} devices every {interval * 1000:.0f} ms (offered {offered:,.0f} req/s) for {duration}s")
+    print(f"completed {len(latencies)} requests, {len(errors)} errors, {len(latencies) / elapsed:,.0f} req/s")
+    if latencies:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        print(f"latency p50 {p50:.1f} ms | p95 {p95:.1f} ms | p99 {p99:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the IoT ingestion server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--devices', type=int, default=200)
+    parser.add_argument('--interval-ms', type=float, default=40)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.devices, args.interval_ms / 1000, args.duration, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#===========================================================================
+# BENCHMARK SUITE
+# Runs the pipeline on synthetic campus data (synthetic_campus.py) at each
+# ROWSxBUILDINGS size and times every EnergyDataPreprocessor stage (through
+# the stage metrics), every MLModelComparator model (fit and predict), and
+# IoTEnergyMonitor single-reading and batch inference. Results go to a JSON
+# file per run; --baseline compares a run against an earlier one and flags
+# the timings that got slower.
+#
+#   python benchmarks/run_suite.py --cases 10000x1 100000x10 1000000x100
+#   python benchmarks/run_suite.py --results new.json --baseline old.json
+#===========================================================================
+
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from energy_model_training import (
+    METRICS, EnergyConfig, EnergyDataPreprocessor, IoTEnergyMonitor, MLModelComparator, chronological_split
+)
+from synthetic_campus import cached_campus_csv
+
+
+RESULTS_VERSION = 1
+
+
+def parse_case(text):
+    rows, _, buildings = text.lower().partition('x')
+    return int(float(rows)), int(buildings or 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def stage_results(prefix):
+    return {name: {key: stats[key] for key in ('runs', 'wall_seconds', 'cpu_seconds', 'peak_memory_bytes')}
+            for name, stats in METRICS.to_dict()['stages'].items() if name.startswith(prefix)}
+
+
+def preprocess(file_path, n_rows, chunked_above, chunk_dir):
+    # In memory up to chunked_above rows, like train_energy_models; chunked beyond
+    preprocessor = EnergyDataPreprocessor()
+    if n_rows > chunked_above:
+        X, y = preprocessor.preprocess_in_chunks(file_path, output_dir=chunk_dir)
+        return preprocessor, np.asarray(X), np.asarray(y)
+
+    preprocessor.load_data(file_path)
+    preprocessor.clean_data()
+    preprocessor.feature_engineering()
+    preprocessor.encode_categorical_variables()
+    preprocessor.handle_missing_values()
+    preprocessor.scale_features()
+    X, y = preprocessor.get_preprocessed_data()
+    return preprocessor, X.to_numpy(), y.to_numpy()
+
+
+def benchmark_models(preprocessor, X, y, fit_rows, time_budget, seed):
+    # Chronological holdout, then at most fit_rows training rows so the slowest
+    # models stay tractable at millions of rows
+    rng = np.random.default_rng(seed)
+    time_index = preprocessor.time_index
+    if time_index is not None and len(time_index) == len(y) and not time_index.isna().any():
+        train_idx, test_idx = chronological_split(time_index, test_size=0.2)
+    else:
+        order = rng.permutation(len(y))
+        train_idx, test_idx = order[len(y) // 5:], order[:len(y) // 5]
+    train_idx = np.sort(rng.choice(train_idx, min(fit_rows, len(train_idx)), replace=False))
+    test_idx = np.sort(rng.choice(test_idx, min(max(fit_rows // 4, 1), len(test_idx)), replace=False))
+
+    columns = preprocessor.feature_names
+    comparator = MLModelComparator()
+    comparator.initialize_models()
+    comparator.train_and_compare_models(
+        pd.DataFrame(X[train_idx], columns=columns), pd.DataFrame(X[test_idx], columns=columns),
+        y[train_idx], y[test_idx], parallel=False, time_budget=time_budget
+    )
+
+    models = {}
+    for name, status in comparator.status.items():
+        result = comparator.results.get(name)
+        models[name] = {'status': status, 'train_rows': len(train_idx), 'test_rows': len(test_idx)}
+        if result is not None:
+            timers = result.get('timers', {})
+            models[name].update({
+                'fit_seconds': result['fit_time'],
+                'predict_seconds': result['predict_time'],
+                'fit_cpu_seconds': timers['fit'].cpu if 'fit' in timers else None,
+                'r2': float(result['r2']),
+                'rmse': float(result['rmse'])
+            })
+    return comparator, models
+
+
+def benchmark_inference(comparator, preprocessor, X, n_single, batch_sizes, seed):
+    # Readings are training rows mapped back to sensor units
+    monitor = IoTEnergyMonitor(comparator, preprocessor)
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(X), min(max(n_single, max(batch_sizes)), len(X)), replace=False)
+    readings = pd.DataFrame(preprocessor.scaler.inverse_transform(X[rows]), columns=preprocessor.feature_names)
+    records = readings.head(n_single).to_dict('records')
+
+    monitor.predict_energy(records[0])  # warm-up
+    latencies = np.empty(len(records))
+    for i, reading in enumerate(records):
+        start = time.perf_counter()
+        monitor.predict_energy(reading)
+        latencies[i] = time.perf_counter() - start
+
+    batches = {}
+    for size in batch_sizes:
+        batch = readings.head(size)
+        repeats = max(3, min(50, 20000 // max(len(batch), 1)))
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            monitor.predict_batch(batch)
+            times.append(time.perf_counter() - start)
+        batches[str(len(batch))] = {'median_seconds': float(np.median(times)),
+                                    'rows_per_second': len(batch) / float(np.median(times))}
+
+    return {
+        'model': monitor.best_model_name,
+        'single': {
+            'readings': len(records),
+            'p50_seconds': float(np.percentile(latencies, 50)),
+            'p99_seconds': float(np.percentile(latencies, 99)),
+            'readings_per_second': len(records) / float(latencies.sum())
+        },
+        'batch': batches
+    }
+
+
+def run_case(n_rows, n_buildings, args):
+    case = {'rows': n_rows, 'buildings': n_buildings, 'missing': args.missing, 'outliers': args.outliers,
+            'seed': args.seed}
+    print(f"\n=== {n_rows} rows, {n_buildings} building(s) ===")
+
+    start = time.perf_counter()
+    file_path = cached_campus_csv(args.data_dir, n_rows, n_buildings, args.missing, args.outliers, args.seed)
+    case['data_seconds'] = time.perf_counter() - start
+
+    METRICS.reset()
+    preprocessor, X, y = preprocess(file_path, n_rows, args.chunked_above,
+                                    os.path.join(args.data_dir, f"chunks_r{n_rows}_b{n_buildings}"))
+    case['preprocess_mode'] = 'chunked' if n_rows > args.chunked_above else 'in_memory'
+    case['stages'] = stage_results('preprocess.')
+
+    comparator, case['models'] = benchmark_models(preprocessor, X, y, args.fit_rows, args.model_budget, args.seed)
+    if comparator.best_model is not None:
+        case['inference'] = benchmark_inference(comparator, preprocessor, X, args.single_readings,
+                                                args.batch_sizes, args.seed)
+    return case
+
+
+def run(args):
+    METRICS.enabled = True
+    METRICS.track_memory = args.trace_memory
+    EnergyConfig.PROFILE_MEMORY = args.trace_memory
+
+    results = {
+        'version': RESULTS_VERSION,
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                        'sklearn': sklearn.__version__, 'cpus': os.cpu_count(), 'machine': platform.machine()},
+        'settings': {key: value for key, value in vars(args).items() if key not in ('baseline', 'results', 'output')},
+        'cases': []
+    }
+    for text in args.cases:
+        n_rows, n_buildings = parse_case(text)
+        results['cases'].append(run_case(n_rows, n_buildings, args))
+
+    output = args.output or os.path.join(
+        args.results_dir, f"{datetime.now():%Y%m%d_%H%M%S}_{results['commit'] or 'nocommit'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nBenchmark results saved to {output}")
+    return results
+
+
+#---------------------------------------------------------------------------
+# Comparing runs
+#---------------------------------------------------------------------------
+
+
+def timings(case):
+    # Flat {label: seconds} of one case, lower is better
+    flat = {f"stage {name}": stats['wall_seconds'] for name, stats in case.get('stages', {}).items()}
+    for name, model in case.get('models', {}).items():
+        for key in ('fit_seconds', 'predict_seconds'):
+            if model.get(key) is not None:
+                flat[f"{name} {key.split('_')[0]}"] = model[key]
+    inference = case.get('inference')
+    if inference:
+        flat['predict_energy p50'] = inference['single']['p50_seconds']
+        flat['predict_energy p99'] = inference['single']['p99_seconds']
+        for size, batch in inference['batch'].items():
+            flat[f"predict_batch {size} rows"] = batch['median_seconds']
+    return flat
+
+
+def compare(results, baseline, threshold):
+    # Prints every timing that moved by more than threshold; returns the regressions
+    key = lambda case: (case['rows'], case['buildings'], case['missing'], case['outliers'], case['seed'])
+    old_cases = {key(case): case for case in baseline['cases']}
+    regressions = []
+    print(f"\nComparing {results.get('commit')} against baseline {baseline.get('commit')} "
+          f"(threshold {threshold:.0%})")
+    for case in results['cases']:
+        old = old_cases.get(key(case))
+        if old is None:
+            print(f"{case['rows']} rows x {case['buildings']}: not in baseline")
+            continue
+        new_times, old_times = timings(case), timings(old)
+        for label in sorted(new_times):
+            if label not in old_times or old_times[label] <= 0:
+                continue
+            ratio = new_times[label] / old_times[label]
+            if abs(ratio - 1) > threshold:
+                verdict = "SLOWER" if ratio > 1 else "faster"
+                print(f"{case['rows']:>9} x {case['buildings']:<5} {label:<40} {old_times[label]:>10.4f}s -> "
+                      f"{new_times[label]:>10.4f}s  {ratio:5.2f}x {verdict}")
+                if ratio > 1:
+                    regressions.append((key(case), label, ratio))
+    print(f"{len(regressions)} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmarks on synthetic campus data")
+    parser.add_argument('--cases', nargs='+', default=['10000x1', '100000x10', '1000000x100'],
+                        help="ROWSxBUILDINGS, e.g. 10000000x1000")
+    parser.add_argument('--missing', type=float, default=0.01, help="fraction of sensor cells left empty")
+    parser.add_argument('--outliers', type=float, default=0.005, help="fraction of sensor cells turned into spikes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fit-rows', type=int, default=20000, help="training rows per model fit")
+    parser.add_argument('--model-budget', type=float, default=None, help="seconds per model before it is cancelled")
+    parser.add_argument('--chunked-above', type=int, default=2_000_000, help="use chunked preprocessing past this many rows")
+    parser.add_argument('--single-readings', type=int, default=2000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 10000])
+    parser.add_argument('--trace-memory', action='store_true', help="record peak memory per stage (slower)")
+    parser.add_argument('--data-dir', default='benchmark_data')
+    parser.add_argument('--results-dir', default='benchmark_results')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--results', default=None, help="compare this results file instead of running")
+    parser.add_argument('--baseline', default=None, help="earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as f:
+            results = json.load(f)
+    else:
+        results = run(args)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
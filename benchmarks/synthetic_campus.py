@@ -0,0 +1,204 @@
+#===========================================================================
+# SYNTHETIC CAMPUS DATA
+# Seeded generator for hourly campus data in the JIIT_Raw_Hourly_Energy_Data
+# schema (Date, DayOfWeek, Month, Year, Temperature, Humidity, Occupancy,
+# HVACUsage, LightingUsage, RenewableEnergy, academic-calendar flags,
+# EnergyConsumption, Hour, TimeOfDay), for 1..1000 buildings and 10k..10M
+# rows. With more than one building a Building column is added; rows are
+# ordered by hour, then building. Missing values and outliers are injected
+# into the sensor columns at configurable rates. The same seed and sizes
+# always give the same data.
+#
+#   python benchmarks/synthetic_campus.py --rows 1000000 --buildings 100 --output campus_1m.csv
+#===========================================================================
+
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# Columns that get missing values and outliers
+SENSOR_COLUMNS = ['Temperature', 'Humidity', 'Occupancy', 'RenewableEnergy', 'EnergyConsumption']
+
+DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+TIME_OF_DAY = np.array(['Late Night'] * 6 + ['Morning'] * 6 + ['Afternoon'] * 6 + ['Evening'] * 6)
+
+# Monthly mean temperature / humidity, as in the JIIT data
+MONTH_TEMPERATURE = np.array([17.1, 17.4, 17.1, 34.8, 34.8, 34.8, 31.0, 31.0, 31.0, 25.0, 25.0, 16.8])
+MONTH_HUMIDITY = np.array([51, 51, 51, 50, 51, 51, 75, 75, 75, 51, 51, 51], dtype=float)
+
+# Share of peak occupancy by hour on a regular teaching weekday
+HOUR_OCCUPANCY = np.array([0.03] * 6 + [0.1, 0.3, 0.7, 0.9, 1.0, 1.0, 0.8, 0.95, 1.0, 0.9, 0.7, 0.5,
+                                        0.45, 0.45, 0.45, 0.45, 0.22, 0.22])
+
+# Academic calendar as (month, day) ranges, inclusive
+CALENDAR = {
+    'IsVacation': [((5, 1), (6, 30)), ((12, 20), (12, 31)), ((1, 1), (1, 9))],
+    'IsExam': [((4, 15), (5, 20)), ((11, 20), (12, 15))],
+    'IsFestival': [((10, 15), (10, 25))],
+    'IsConvocation': [((3, 10), (3, 20))]
+}
+
+# Rows per generation block (rounded to whole hours of all buildings); blocks are
+# seeded by position, so the output only depends on the seed and sizes
+BLOCK_ROWS = 1 << 18
+
+
+def block_hours(n_buildings):
+    return max(1, BLOCK_ROWS // n_buildings)
+
+
+def calendar_flags(timestamps):
+    # Academic-calendar flags of each timestamp (DatetimeIndex)
+    month_day = timestamps.month.to_numpy() * 100 + timestamps.day.to_numpy()
+    flags = {}
+    for name, ranges in CALENDAR.items():
+        mask = np.zeros(len(timestamps), dtype=bool)
+        for (m0, d0), (m1, d1) in ranges:
+            mask |= (month_day >= m0 * 100 + d0) & (month_day <= m1 * 100 + d1)
+        flags[name] = mask.astype(np.int64)
+    flags['IsHoliday'] = (timestamps.dayofweek.to_numpy() >= 5).astype(np.int64)
+    flags['IsRegularAcademic'] = ((flags['IsVacation'] == 0) & (flags['IsExam'] == 0)).astype(np.int64)
+    return flags
+
+
+def building_profiles(n_buildings, seed):
+    # Size (scales occupancy and load) and base load of each building
+    rng = np.random.default_rng([seed, n_buildings, 0])
+    if n_buildings == 1:
+        return np.ones(1), np.full(1, 40.0)
+    return rng.lognormal(0, 0.5, n_buildings), rng.uniform(20, 60, n_buildings)
+
+
+def generate_block(block, n_buildings, seed, start='2021-01-01'):
+    # All buildings for the block's hours
+    rng = np.random.default_rng([seed, n_buildings, block + 1])
+    scale, base_load = building_profiles(n_buildings, seed)
+    n_hours = block_hours(n_buildings)
+    hours = pd.date_range(pd.Timestamp(start) + pd.Timedelta(hours=block * n_hours), periods=n_hours, freq='h')
+    flags = calendar_flags(hours)
+
+    n = n_hours * n_buildings
+    hour = np.repeat(hours.hour.to_numpy(), n_buildings)
+    month = np.repeat(hours.month.to_numpy(), n_buildings)
+    per_row = {name: np.repeat(values, n_buildings) for name, values in flags.items()}
+    building = np.tile(np.arange(n_buildings), n_hours)
+
+    # Weather is shared by the campus, plus a little local noise per building
+    diurnal = -6 * np.cos((hours.hour.to_numpy() - 4) / 24 * 2 * np.pi)
+    weather_noise = rng.normal(0, 2.0, n_hours)
+    temperature = np.repeat(MONTH_TEMPERATURE[hours.month.to_numpy() - 1] + diurnal + weather_noise, n_buildings)
+    temperature += rng.normal(0, 0.5, n)
+    humidity = np.clip(np.repeat(MONTH_HUMIDITY[hours.month.to_numpy() - 1], n_buildings) + rng.normal(0, 12, n), 10, 100)
+
+    # Occupancy: teaching-day profile, damped at weekends, vacations and festivals
+    activity = HOUR_OCCUPANCY[hour] * np.where(per_row['IsHoliday'] == 1, 0.35, 1.0)
+    activity *= np.where(per_row['IsVacation'] == 1, 0.3, 1.0) * np.where(per_row['IsFestival'] == 1, 0.4, 1.0)
+    activity *= np.where(per_row['IsExam'] == 1, 1.1, 1.0)
+    occupancy = np.maximum(0, 1500 * scale[building] * activity * rng.normal(1, 0.08, n) + rng.normal(50, 5, n))
+
+    hvac = ((np.abs(temperature - 24) > 5) & (occupancy > 150 * scale[building])) | (rng.random(n) < 0.05)
+    lighting = ((hour >= 18) | (hour < 6)) & (occupancy > 200 * scale[building]) | (rng.random(n) < 0.05)
+    sun = np.clip(np.sin((hour - 6) / 12 * np.pi), 0, None)
+    renewable = np.maximum(0, 60 * scale[building] * sun * rng.uniform(0.3, 1.0, n))
+
+    energy = (base_load[building] + 0.1 * occupancy + scale[building] * (35 * hvac + 18 * lighting)
+              + 0.9 * scale[building] * np.abs(temperature - 22) + rng.normal(0, 6 * np.sqrt(scale[building]), n))
+
+    frame = pd.DataFrame({
+        'Date': np.repeat(hours.strftime('%Y-%m-%d').to_numpy(), n_buildings),
+        'DayOfWeek': np.repeat(DAY_NAMES[hours.dayofweek.to_numpy()], n_buildings),
+        'Month': month,
+        'Year': np.repeat(hours.year.to_numpy(), n_buildings),
+        'Temperature': temperature.round(1),
+        'Humidity': humidity.round(1),
+        'Occupancy': occupancy.round(1),
+        'HVACUsage': hvac.astype(np.int64),
+        'LightingUsage': lighting.astype(np.int64),
+        'RenewableEnergy': renewable.round(1),
+        **{name: per_row[name] for name in ['IsHoliday', 'IsVacation', 'IsExam', 'IsRegularAcademic',
+                                            'IsFestival', 'IsConvocation']},
+        'EnergyConsumption': np.maximum(5, energy).round(1),
+        'Hour': hour,
+        'TimeOfDay': TIME_OF_DAY[hour]
+    })
+    if n_buildings > 1:
+        frame['Building'] = np.char.add('B', np.char.zfill(building.astype(str), len(str(n_buildings - 1))))
+    return frame, rng
+
+
+def inject_faults(frame, rng, missing_fraction, outlier_fraction):
+    # Outliers are spikes/dropouts of the sensor value; missing cells become NaN
+    n = len(frame)
+    for col in SENSOR_COLUMNS:
+        values = frame[col].to_numpy(dtype=float, copy=True)
+        if outlier_fraction:
+            rows = rng.random(n) < outlier_fraction
+            values[rows] *= rng.choice([0.0, 3.0, 5.0, 10.0], rows.sum())
+        if missing_fraction:
+            values[rng.random(n) < missing_fraction] = np.nan
+        frame[col] = values
+    return frame
+
+
+def iter_campus_data(n_rows, n_buildings=1, missing_fraction=0.0, outlier_fraction=0.0, seed=0):
+    # Yields DataFrame blocks that add up to n_rows rows
+    remaining = n_rows
+    block = 0
+    while remaining > 0:
+        frame, rng = generate_block(block, n_buildings, seed)
+        frame = inject_faults(frame, rng, missing_fraction, outlier_fraction)
+        if len(frame) > remaining:
+            frame = frame.iloc[:remaining]
+        remaining -= len(frame)
+        block += 1
+        yield frame
+
+
+def generate_campus_data(n_rows, n_buildings=1, missing_fraction=0.0, outlier_fraction=0.0, seed=0):
+    return pd.concat(list(iter_campus_data(n_rows, n_buildings, missing_fraction, outlier_fraction, seed)),
+                     ignore_index=True)
+
+
+def write_campus_csv(path, n_rows, n_buildings=1, missing_fraction=0.0, outlier_fraction=0.0, seed=0):
+    # Streams the blocks to CSV, so 10M rows never sit in memory at once
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        for i, frame in enumerate(iter_campus_data(n_rows, n_buildings, missing_fraction, outlier_fraction, seed)):
+            frame.to_csv(f, index=False, header=(i == 0))
+    os.replace(tmp_path, path)
+    return path
+
+
+def cached_campus_csv(data_dir, n_rows, n_buildings=1, missing_fraction=0.0, outlier_fraction=0.0, seed=0):
+    # Generated files are reused across benchmark runs with the same parameters
+    os.makedirs(data_dir, exist_ok=True)
+    name = f"campus_r{n_rows}_b{n_buildings}_m{missing_fraction:g}_o{outlier_fraction:g}_s{seed}.csv"
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        write_campus_csv(path, n_rows, n_buildings, missing_fraction, outlier_fraction, seed)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic campus energy data in the JIIT schema")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--buildings', type=int, default=1)
+    parser.add_argument('--missing', type=float, default=0.0, help="fraction of sensor cells left empty")
+    parser.add_argument('--outliers', type=float, default=0.0, help="fraction of sensor cells turned into spikes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='synthetic_campus.csv')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_campus_csv(args.output, args.rows, args.buildings, args.missing, args.outliers, args.seed)
+    print(f"Wrote {args.rows} rows for {args.buildings} building(s) to {args.output} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
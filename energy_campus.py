@@ -0,0 +1,430 @@
+#===========================================================================
+# CAMPUS MONITORING
+# Many buildings with many appliances each. Appliance state lives in flat
+# arrays (one entry per device, type codes instead of name matching), and
+# buildings are sharded across worker processes that each simulate, predict
+# and evaluate alerts for their buildings in one vectorized pass per cycle.
+#
+#   python energy_campus.py --buildings 200 --appliances-per-building 50
+#===========================================================================
+
+
+import argparse
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from energy_model_training import (
+    AlertRule, EnergyConfig, IoTEnergyMonitor, appliance_type, calendar_features, load_energy_models
+)
+
+
+# The rules AlertSystem evaluates (EnergyConfig.ALERT_RULES). An alert's code is
+# its rule's position here; building-level alerts have appliance index -1.
+# Rules on a change since the previous reading ('_change' fields) never hold in
+# a stateless cycle, like AlertSystem.check_batch.
+ALERT_RULES = [AlertRule(spec) for spec in EnergyConfig.ALERT_RULES]
+
+ALERT_NAMES = {code: rule.name for code, rule in enumerate(ALERT_RULES)}
+
+BUILDING_FIELDS = ('Temperature', 'Humidity', 'Occupancy', 'HVACUsage', 'LightingUsage', 'RenewableEnergy')
+
+
+def _empty_alerts():
+    return {
+        'code': np.zeros(0, dtype=np.int8),
+        'building': np.zeros(0, dtype=np.int32),
+        'appliance': np.zeros(0, dtype=np.int32)
+    }
+
+
+def _by_building(alerts):
+    # Stable sort on building: a building's alerts stay in rule order
+    order = np.argsort(alerts['building'], kind='stable')
+    return {key: values[order] for key, values in alerts.items()}
+
+
+class CampusRegistry:
+    def __init__(self):
+        self.building_names = []
+        self.appliance_names = []
+        self.locations = []
+        # Per appliance (filled by add_building, compacted by _compile on first use)
+        self._pending = []
+        self.building_index = np.zeros(0, dtype=np.int32)
+        self.type_code = np.zeros(0, dtype=np.int8)
+        self.power_min = np.zeros(0, dtype=np.float32)
+        self.power_max = np.zeros(0, dtype=np.float32)
+        self.power = np.zeros(0, dtype=np.float32)
+        # Global ids, so a shard's results can be mapped back to the full campus
+        self.building_ids = np.zeros(0, dtype=np.int32)
+        self.appliance_ids = np.zeros(0, dtype=np.int32)
+        # Per building, latest sensor readings
+        self.readings = {field: np.zeros(0) for field in BUILDING_FIELDS}
+
+
+    @property
+    def n_buildings(self):
+        return len(self.building_names)
+
+
+    @property
+    def n_appliances(self):
+        return len(self.appliance_names)
+
+
+    def add_building(self, name, appliance_profiles=None):
+        # appliance_profiles: {name: {"min", "max", "location", "type"}}, as in
+        # EnergyConfig.APPLIANCE_PROFILES (the default)
+        if appliance_profiles is None:
+            appliance_profiles = EnergyConfig.APPLIANCE_PROFILES
+        building = len(self.building_names)
+        self.building_names.append(name)
+        for appliance, profile in appliance_profiles.items():
+            code = EnergyConfig.APPLIANCE_TYPES[appliance_type(appliance, profile)]
+            self.appliance_names.append(appliance)
+            self.locations.append(profile.get('location', ''))
+            self._pending.append((building, code, profile['min'], profile['max']))
+        return building
+
+
+    @classmethod
+    def synthetic(cls, n_buildings, appliances_per_building=None):
+        # Buildings fitted out by repeating the EnergyConfig.APPLIANCE_PROFILES set
+        profiles = list(EnergyConfig.APPLIANCE_PROFILES.items())
+        per_building = appliances_per_building or len(profiles)
+        fit_out = {}
+        for i in range(per_building):
+            name, profile = profiles[i % len(profiles)]
+            copy_number = i // len(profiles)
+            fit_out[f"{name}_{copy_number}" if copy_number else name] = profile
+
+        registry = cls()
+        for b in range(n_buildings):
+            registry.building_names.append(f"Building_{b + 1}")
+            for appliance, profile in fit_out.items():
+                registry.appliance_names.append(appliance)
+                registry.locations.append(profile['location'])
+                registry._pending.append((
+                    b, EnergyConfig.APPLIANCE_TYPES[appliance_type(appliance, profile)],
+                    profile['min'], profile['max']
+                ))
+        registry._compile()
+        return registry
+
+
+    def _compile(self):
+        # Appends buildings added since the last call to the arrays, once, however
+        # many were added; cheap when there is nothing new
+        if not self._pending and len(self.building_ids) == self.n_buildings:
+            return
+        if self._pending:
+            building, code, low, high = zip(*self._pending)
+            self.building_index = np.concatenate([self.building_index, np.array(building, dtype=np.int32)])
+            self.type_code = np.concatenate([self.type_code, np.array(code, dtype=np.int8)])
+            self.power_min = np.concatenate([self.power_min, np.array(low, dtype=np.float32)])
+            self.power_max = np.concatenate([self.power_max, np.array(high, dtype=np.float32)])
+            self.power = np.concatenate([self.power, np.zeros(len(building), dtype=np.float32)])
+            self._pending = []
+        self.building_ids = np.arange(self.n_buildings, dtype=np.int32)
+        self.appliance_ids = np.arange(self.n_appliances, dtype=np.int32)
+        for field in BUILDING_FIELDS:
+            values = self.readings[field]
+            self.readings[field] = np.concatenate([values, np.zeros(self.n_buildings - len(values))])
+
+
+    def shard(self, n_shards):
+        # Round-robin buildings over shards; each shard is a self-contained registry
+        shards = []
+        for s in range(n_shards):
+            buildings = np.arange(s, self.n_buildings, n_shards)
+            if len(buildings):
+                shards.append(self.subset(buildings))
+        return shards
+
+
+    def subset(self, buildings):
+        self._compile()
+        buildings = np.asarray(buildings, dtype=np.int32)
+        local = np.full(self.n_buildings, -1, dtype=np.int32)
+        local[buildings] = np.arange(len(buildings), dtype=np.int32)
+        appliances = np.flatnonzero(local[self.building_index] >= 0)
+
+        part = CampusRegistry()
+        part.building_names = [self.building_names[b] for b in buildings]
+        part.appliance_names = [self.appliance_names[a] for a in appliances]
+        part.locations = [self.locations[a] for a in appliances]
+        part.building_index = local[self.building_index[appliances]]
+        part.type_code = self.type_code[appliances]
+        part.power_min = self.power_min[appliances]
+        part.power_max = self.power_max[appliances]
+        part.power = self.power[appliances].copy()
+        part.building_ids = self.building_ids[buildings]
+        part.appliance_ids = self.appliance_ids[appliances]
+        part.readings = {field: values[buildings].copy() for field, values in self.readings.items()}
+        return part
+
+
+    #-----------------------------------------------------------------------
+    # One monitoring cycle
+    #-----------------------------------------------------------------------
+
+
+    def simulate(self, rng):
+        # Vectorized simulate_iot_sensors for every building and appliance
+        self._compile()
+        n = self.n_buildings
+        self.readings['Temperature'] = rng.uniform(22, 35, n)
+        self.readings['Humidity'] = rng.uniform(40, 80, n)
+        self.readings['Occupancy'] = rng.integers(10, 101, n).astype(float)
+        self.readings['HVACUsage'] = rng.integers(0, 2, n).astype(float)
+        self.readings['LightingUsage'] = rng.integers(0, 2, n).astype(float)
+        self.readings['RenewableEnergy'] = rng.uniform(10, 60, n)
+
+        running = rng.integers(0, 2, self.n_appliances).astype(bool)
+        draw = self.power_min + rng.random(self.n_appliances, dtype=np.float32) * (self.power_max - self.power_min)
+        self.power = np.where(running, draw, np.float32(0))
+
+
+    def model_inputs(self, now=None):
+        # Building readings as column arrays for IoTEnergyMonitor.predict_batch, with
+        # the calendar inputs built the way the models were trained on them
+        now = now or datetime.now()
+        self._compile()
+        n = self.n_buildings
+        columns = dict(self.readings)
+        columns.update({name: np.full(n, value) for name, value in calendar_features(now).items()})
+        return columns
+
+
+    def appliance_load(self):
+        # Total appliance draw per building (W)
+        self._compile()
+        return np.bincount(self.building_index, weights=self.power, minlength=self.n_buildings)
+
+
+    def evaluate_alerts(self, energy=None):
+        # AlertSystem.check_batch for all buildings at once: every ALERT_RULES rule
+        # that holds (energy rules only when energy is given). Returns parallel
+        # arrays of alert code, building and appliance (global ids), in building order.
+        self._compile()
+        columns = dict(self.readings)
+        if energy is not None:
+            columns['energy'] = energy
+        running = self.power > 0
+
+        parts = []
+        for code, rule in enumerate(ALERT_RULES):
+            if not rule.appliance:
+                trigger, _ = rule.evaluate(columns, self.n_buildings)
+                parts.append((code, np.flatnonzero(trigger), None))
+                continue
+            # One row per appliance of the rule's type, with its building's readings
+            selected = np.flatnonzero(self.type_code == rule.type_code)
+            buildings = self.building_index[selected]
+            rule_columns = {field: values[buildings] for field, values in columns.items()}
+            trigger, _ = rule.evaluate(rule_columns, len(selected), running[selected])
+            parts.append((code, buildings[trigger], selected[trigger]))
+
+        codes, buildings, appliances = [], [], []
+        for code, building, appliance in parts:
+            codes.append(np.full(len(building), code, dtype=np.int8))
+            buildings.append(self.building_ids[building])
+            appliances.append(self.appliance_ids[appliance] if appliance is not None else np.full(len(building), -1, dtype=np.int32))
+        return _by_building({
+            'code': np.concatenate(codes),
+            'building': np.concatenate(buildings).astype(np.int32),
+            'appliance': np.concatenate(appliances).astype(np.int32)
+        })
+
+
+    def run_cycle(self, rng, monitor=None, now=None):
+        self.simulate(rng)
+        energy = None
+        if monitor is not None and monitor.best_model is not None:
+            energy = monitor.predict_batch(self.model_inputs(now))
+        return {
+            'building': self.building_ids,
+            'energy': energy,
+            'appliance_load': self.appliance_load(),
+            'temperature': self.readings['Temperature'],
+            'readings': dict(self.readings),
+            'alerts': self.evaluate_alerts(energy)
+        }
+
+
+def _shard_worker(conn, registry, model_comparator, preprocessor, seed):
+    # Runs in a child process and owns one shard; one reply per 'cycle' command
+    monitor = None
+    if model_comparator is not None and model_comparator.best_model is not None:
+        monitor = IoTEnergyMonitor(model_comparator, preprocessor)
+    rng = np.random.default_rng(seed)
+    try:
+        while True:
+            command, now = conn.recv()
+            if command == 'stop':
+                break
+            try:
+                conn.send(('ok', registry.run_cycle(rng, monitor, now)))
+            except Exception as e:
+                conn.send(('error', str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        conn.close()
+
+
+class CampusMonitor:
+    def __init__(self, registry, model_comparator=None, preprocessor=None, n_shards=None, seed=None):
+        self.registry = registry
+        self.model_comparator = model_comparator
+        self.preprocessor = preprocessor
+        if n_shards is None:
+            n_shards = EnergyConfig.CAMPUS_SHARDS or os.cpu_count() or 1
+        self.n_shards = max(1, min(n_shards, registry.n_buildings))
+        self.seed = seed
+        self.workers = []  # (process, connection)
+        self.local_monitor = None
+        self.local_rng = None
+
+
+    def start(self):
+        seeds = np.random.SeedSequence(self.seed).spawn(self.n_shards)
+        if self.n_shards == 1:
+            # Single shard: no worker process, run in this one
+            if self.model_comparator is not None and self.model_comparator.best_model is not None:
+                self.local_monitor = IoTEnergyMonitor(self.model_comparator, self.preprocessor)
+            self.local_rng = np.random.default_rng(seeds[0])
+            print(f"Monitoring {self.registry.n_buildings} buildings / {self.registry.n_appliances} appliances in-process")
+            return self
+
+        for s, shard in enumerate(self.registry.shard(self.n_shards)):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_shard_worker, args=(child, shard, self.model_comparator, self.preprocessor, seeds[s]),
+                name=f"campus-shard-{s}", daemon=True
+            )
+            process.start()
+            child.close()
+            self.workers.append((process, parent))
+        print(f"Monitoring {self.registry.n_buildings} buildings / {self.registry.n_appliances} appliances "
+              f"in {len(self.workers)} shard process(es)")
+        return self
+
+
+    def run_cycle(self, now=None):
+        # One cycle over the whole campus; results are merged and in building order
+        now = now or datetime.now()
+        if not self.workers:
+            if self.local_rng is None:
+                self.start()
+            return self.registry.run_cycle(self.local_rng, self.local_monitor, now)
+
+        for _, conn in self.workers:
+            conn.send(('cycle', now))
+        results = []
+        for process, conn in self.workers:
+            try:
+                kind, payload = conn.recv()
+            except EOFError:
+                raise RuntimeError(f"{process.name} exited with code {process.exitcode}")
+            if kind != 'ok':
+                raise RuntimeError(f"{process.name} failed: {payload}")
+            results.append(payload)
+        return self._merge(results)
+
+
+    def _merge(self, results):
+        n = self.registry.n_buildings
+        merged = {
+            'building': np.arange(n, dtype=np.int32),
+            'energy': np.zeros(n) if results[0]['energy'] is not None else None,
+            'appliance_load': np.zeros(n),
+            'temperature': np.zeros(n),
+            'readings': {field: np.zeros(n) for field in results[0]['readings']},
+            'alerts': _by_building({key: np.concatenate([r['alerts'][key] for r in results]) for key in _empty_alerts()})
+        }
+        for r in results:
+            if merged['energy'] is not None:
+                merged['energy'][r['building']] = r['energy']
+            merged['appliance_load'][r['building']] = r['appliance_load']
+            merged['temperature'][r['building']] = r['temperature']
+            for field, values in r['readings'].items():
+                merged['readings'][field][r['building']] = values
+        return merged
+
+
+    def alert_messages(self, result, building=None):
+        # Render alerts with their rule's message, only for what is displayed
+        alerts = result['alerts']
+        selected = np.flatnonzero(alerts['building'] == building) if building is not None else range(len(alerts['code']))
+        messages = []
+        for i in selected:
+            b = alerts['building'][i]
+            a = alerts['appliance'][i]
+            values = {field: values[b] for field, values in result['readings'].items()}
+            values['energy'] = result['energy'][b] if result['energy'] is not None else 0.0
+            values['appliance'] = self.registry.appliance_names[a] if a >= 0 else ''
+            text = ALERT_RULES[int(alerts['code'][i])].message.format(**values)
+            messages.append((self.registry.building_names[b], text))
+        return messages
+
+
+    def close(self):
+        for process, conn in self.workers:
+            try:
+                conn.send(('stop', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process, conn in self.workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            conn.close()
+        self.workers = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor a synthetic campus of many buildings")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--buildings', type=int, default=100)
+    parser.add_argument('--appliances-per-building', type=int, default=None)
+    parser.add_argument('--shards', type=int, default=None)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--interval', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    model_comparator, preprocessor, _ = load_energy_models(args.data)
+    registry = CampusRegistry.synthetic(args.buildings, args.appliances_per_building)
+    campus = CampusMonitor(registry, model_comparator, preprocessor, n_shards=args.shards, seed=args.seed).start()
+    try:
+        for cycle in range(args.cycles):
+            start = time.perf_counter()
+            result = campus.run_cycle()
+            elapsed = time.perf_counter() - start
+
+            print(f"\nCYCLE {cycle + 1}: {elapsed * 1000:.1f} ms")
+            if result['energy'] is not None:
+                print(f"   Campus predicted energy: {result['energy'].sum():.1f} kWh "
+                      f"(max building {result['energy'].max():.1f} kWh)")
+            print(f"   Appliance load: {result['appliance_load'].sum() / 1000:.1f} kW")
+            codes, counts = np.unique(result['alerts']['code'], return_counts=True)
+            print(f"   Alerts: {len(result['alerts']['code'])} "
+                  + ", ".join(f"{ALERT_NAMES[c]}={n}" for c, n in zip(codes, counts)))
+            for building, message in campus.alert_messages(result)[:5]:
+                print(f"   {building}: {message}")
+
+            if cycle < args.cycles - 1:
+                time.sleep(args.interval)
+    finally:
+        campus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+#===========================================================================
+# MULTI-HORIZON FORECASTING
+# Hourly energy forecasts 1..168 hours ahead per building, for peak-demand
+# planning (PeakDemandChart.jsx). One direct model predicts every horizon
+# at once from lag and rolling features of the hourly series that are all
+# known at the forecast origin, so a whole horizon is a single vectorized
+# predict. Forecasts are cached per (building, origin hour).
+#
+#   python energy_forecast.py --horizon 168 --output forecast.json
+#===========================================================================
+
+
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.metrics import r2_score, mean_squared_error
+
+from energy_model_training import (
+    CompactTreeEnsemble, EnergyConfig, EnergyDataPreprocessor, build_model, compute_data_fingerprint
+)
+
+
+# Academic calendar flags, known in advance for the hours in the data; hours past
+# the data carry the last known flags forward
+CALENDAR_COLUMNS = ['IsHoliday', 'IsVacation', 'IsExam', 'IsRegularAcademic', 'IsFestival', 'IsConvocation']
+
+FORECAST_FEATURES = [
+    'horizon', 'hour', 'day_of_week', 'month', 'is_weekend',
+    'lag_168', 'lag_336', 'same_hour_mean_4w',
+    'last', 'mean_24', 'max_24', 'mean_168'
+] + CALENDAR_COLUMNS
+
+# Hours of history a forecast needs (four weeks of same-hour lags)
+MIN_HISTORY = 4 * 168
+
+# Bump when the features or model setup change so saved forecasters are retrained
+FORECAST_VERSION = 1
+
+
+def load_hourly_series(file_path, target_column='EnergyConsumption', building_column='Building'):
+    # {building: hourly frame of 'energy' + CALENDAR_COLUMNS} from Date + Hour rows;
+    # files without a building column are one building, 'campus'. Missing hours are
+    # interpolated (energy) or carried forward (calendar).
+    data = pd.read_csv(file_path)
+    data.columns = EnergyDataPreprocessor._clean_column_names(data.columns)
+    timestamps = pd.to_datetime(data['Date'])
+    if 'Hour' in data.columns:
+        timestamps = timestamps + pd.to_timedelta(data['Hour'], unit='h')
+    frame = pd.DataFrame({
+        'time': timestamps,
+        'energy': pd.to_numeric(data[target_column], errors='coerce'),
+        'building': data[building_column].astype(str) if building_column in data.columns else 'campus'
+    })
+    for col in CALENDAR_COLUMNS:
+        frame[col] = pd.to_numeric(data[col], errors='coerce') if col in data.columns else 0
+
+    series = {}
+    for building, group in frame.groupby('building'):
+        hourly = group.drop(columns='building').groupby('time').mean().sort_index().asfreq('h')
+        hourly['energy'] = hourly['energy'].interpolate(limit_direction='both')
+        hourly[CALENDAR_COLUMNS] = hourly[CALENDAR_COLUMNS].ffill().fillna(0).round()
+        series[building] = hourly
+    return series
+
+
+def forecast_features(values, start, origins, horizons, calendar=None):
+    # Feature matrix for every (origin, horizon) pair, origin-major. values is the
+    # hourly series starting at timestamp start; an origin is the position of the
+    # last observed hour. Every energy input sits at or before the origin; calendar
+    # (hours x CALENDAR_COLUMNS) is read at the target hour.
+    origins = np.asarray(origins)[:, None]
+    horizons = np.asarray(horizons)[None, :]
+    target = origins + horizons
+    shape = target.shape
+
+    prefix = np.concatenate([[0.0], np.cumsum(values)])
+    max_24 = sliding_window_view(values, 24).max(axis=1)
+    target_time = np.datetime64(start, 'h') + target.astype('timedelta64[h]')
+    day = target_time.astype('datetime64[D]')
+    weekday = (day.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+
+    columns = {
+        'horizon': horizons,
+        'hour': (target_time - day).astype(np.int64),
+        'day_of_week': weekday,
+        'month': target_time.astype('datetime64[M]').astype(np.int64) % 12 + 1,
+        'is_weekend': (weekday >= 5).astype(np.int64),
+        'lag_168': values[target - 168],
+        'lag_336': values[target - 336],
+        'same_hour_mean_4w': sum(values[target - 168 * k] for k in range(1, 5)) / 4,
+        'last': values[origins],
+        'mean_24': (prefix[origins + 1] - prefix[origins - 23]) / 24,
+        'max_24': max_24[origins - 23],
+        'mean_168': (prefix[origins + 1] - prefix[origins - 167]) / 168
+    }
+    known = np.minimum(target, len(values) - 1)
+    for i, name in enumerate(CALENDAR_COLUMNS):
+        columns[name] = calendar[known, i] if calendar is not None else np.zeros(shape)
+    return np.stack([np.broadcast_to(columns[name], shape).ravel() for name in FORECAST_FEATURES], axis=1)
+
+
+class EnergyForecaster:
+    def __init__(self, horizon=None, cache_size=None):
+        self.horizon = horizon or EnergyConfig.FORECAST_HORIZON
+        self.cache_size = cache_size or EnergyConfig.FORECAST_CACHE_SIZE
+        self.model = None
+        self.metrics = {}
+        self.fingerprint = None
+        # Per building: (hourly values, timestamp of the first one, calendar flags)
+        self.history = {}
+        self.cache = OrderedDict()  # (building, origin time) -> predictions for 1..horizon
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        # Per building: [hour, energy sum, readings] of the live hour not yet in history
+        self.open_hours = {}
+
+
+    #-----------------------------------------------------------------------
+    # Training
+    #-----------------------------------------------------------------------
+
+
+    def fit(self, series, holdout=0.2, max_rows=None, random_state=42):
+        # One model for all buildings and horizons. Origins are spread over every
+        # hour of the day; targets in the last `holdout` share of time are scored only.
+        max_rows = max_rows or EnergyConfig.FORECAST_TRAINING_ROWS
+        horizons = np.arange(1, self.horizon + 1)
+        self.history = {
+            building: (frame['energy'].to_numpy(dtype=float), frame.index[0],
+                       frame[CALENDAR_COLUMNS].to_numpy(dtype=np.int8))
+            for building, frame in series.items()
+        }
+
+        X_parts, y_parts, t_parts = [], [], []
+        for building, (values, start, calendar) in self.history.items():
+            origins = np.arange(MIN_HISTORY - 1, len(values) - self.horizon, EnergyConfig.FORECAST_ORIGIN_STRIDE)
+            if len(origins) == 0:
+                print(f"{building}: not enough history to train on ({len(values)} hours)")
+                continue
+            X_parts.append(forecast_features(values, start, origins, horizons, calendar))
+            y_parts.append(values[origins[:, None] + horizons].ravel())
+            t_parts.append((np.datetime64(start, 'h') + (origins[:, None] + horizons).astype('timedelta64[h]')).ravel())
+        if not X_parts:
+            raise ValueError("No building has enough history for forecasting")
+        X, y, t = np.concatenate(X_parts), np.concatenate(y_parts), np.concatenate(t_parts)
+
+        cutoff = np.quantile(t.astype(np.int64), 1 - holdout).astype('datetime64[h]')
+        train = np.flatnonzero(t < cutoff)
+        test = np.flatnonzero(t >= cutoff)
+        rng = np.random.default_rng(random_state)
+        if len(train) > max_rows:
+            train = np.sort(rng.choice(train, max_rows, replace=False))
+
+        print(f"Training forecaster on {len(train)} (origin, horizon) rows, "
+              f"{len(self.history)} building(s), horizon {self.horizon}h...")
+        start_time = time.perf_counter()
+        model = build_model('Gradient Boosting', EnergyConfig.FORECAST_MODEL_PARAMS)
+        model.fit(X[train], y[train])
+        self.model = CompactTreeEnsemble.from_sklearn(model)
+        fit_time = time.perf_counter() - start_time
+
+        y_pred = self.model.predict(X[test])
+        horizon_col = X[test, FORECAST_FEATURES.index('horizon')]
+        self.metrics = {
+            'r2': float(r2_score(y[test], y_pred)),
+            'rmse': float(np.sqrt(mean_squared_error(y[test], y_pred))),
+            'fit_time': fit_time,
+            'by_day_ahead': {}
+        }
+        for day_ahead in range(1, int(np.ceil(self.horizon / 24)) + 1):
+            mask = (horizon_col > (day_ahead - 1) * 24) & (horizon_col <= day_ahead * 24)
+            if mask.any():
+                self.metrics['by_day_ahead'][day_ahead] = float(r2_score(y[test][mask], y_pred[mask]))
+        print(f"Forecaster holdout R2: {self.metrics['r2']:.4f} | RMSE: {self.metrics['rmse']:.2f} "
+              f"| fit {fit_time:.1f}s")
+        self.cache.clear()
+        return self
+
+
+    def save(self, path=None):
+        path = path or EnergyConfig.FORECAST_ARTIFACT
+        joblib.dump({
+            'version': FORECAST_VERSION, 'horizon': self.horizon, 'model': self.model,
+            'metrics': self.metrics, 'history': self.history, 'fingerprint': self.fingerprint
+        }, path)
+        return path
+
+
+    @classmethod
+    def load_or_train(cls, file_path, path=None, horizon=None):
+        # Saved forecaster if it was trained on this file with this setup, else retrain
+        path = path or EnergyConfig.FORECAST_ARTIFACT
+        horizon = horizon or EnergyConfig.FORECAST_HORIZON
+        fingerprint = compute_data_fingerprint(file_path, {
+            'forecast_version': FORECAST_VERSION, 'horizon': horizon,
+            'params': EnergyConfig.FORECAST_MODEL_PARAMS, 'stride': EnergyConfig.FORECAST_ORIGIN_STRIDE
+        })
+        if os.path.exists(path):
+            try:
+                saved = joblib.load(path)
+                if saved.get('fingerprint') == fingerprint:
+                    forecaster = cls(horizon)
+                    forecaster.model, forecaster.metrics = saved['model'], saved['metrics']
+                    forecaster.history, forecaster.fingerprint = saved['history'], fingerprint
+                    print(f"Loaded forecaster ({len(forecaster.history)} building(s), horizon {horizon}h)")
+                    return forecaster
+                print("Saved forecaster is stale")
+            except Exception as e:
+                print(f"Could not load saved forecaster: {e}")
+
+        forecaster = cls(horizon).fit(load_hourly_series(file_path))
+        forecaster.fingerprint = fingerprint
+        forecaster.save(path)
+        return forecaster
+
+
+    #-----------------------------------------------------------------------
+    # Forecasts
+    #-----------------------------------------------------------------------
+
+
+    def update_history(self, building, series):
+        # Append newer hourly energy values (Series indexed by hour) to a known
+        # building; later origins then get their own cache entries
+        values, start, calendar = self.history[building]
+        known_until = pd.Timestamp(start) + pd.Timedelta(hours=len(values) - 1)
+        index = pd.date_range(start, periods=len(values), freq='h')
+        full = pd.concat([pd.Series(values, index=index), series[series.index > known_until]])
+        newer = full.resample('h').mean().interpolate()[known_until + pd.Timedelta(hours=1):]
+        # Calendar flags are carried forward from the last known hour
+        calendar = np.concatenate([calendar, np.repeat(calendar[-1:], len(newer), axis=0)])
+        self.history[building] = (np.concatenate([values, newer.to_numpy(dtype=float)]), start, calendar)
+
+
+    def add_readings(self, building, timestamps, energy):
+        # Live energy readings for a known building. Readings are averaged per hour,
+        # and an hour joins the history (update_history) once a later hour's reading
+        # arrives, so forecasts never start from a partly observed hour
+        hours = pd.DatetimeIndex(timestamps).floor('h')
+        totals = pd.DataFrame({'energy': np.asarray(energy, dtype=float), 'readings': 1}, index=hours)
+        totals = totals.groupby(level=0).sum()
+        if building in self.open_hours:
+            hour, energy_sum, readings = self.open_hours[building]
+            totals = totals.add(pd.DataFrame({'energy': [energy_sum], 'readings': [readings]}, index=[hour]),
+                                fill_value=0)
+        hour = totals.index[-1]
+        self.open_hours[building] = [hour, totals['energy'].iloc[-1], totals['readings'].iloc[-1]]
+        closed = totals.iloc[:-1]
+        if len(closed):
+            self.update_history(building, closed['energy'] / closed['readings'])
+
+
+    def _origin(self, building, origin):
+        values, start, _ = self.history[building]
+        if origin is None:
+            position = len(values) - 1
+        else:
+            position = int((pd.Timestamp(origin).floor('h') - pd.Timestamp(start)) / pd.Timedelta(hours=1))
+        if position < MIN_HISTORY - 1 or position >= len(values):
+            raise ValueError(f"{building}: forecast origin needs {MIN_HISTORY} hours of history up to it")
+        return position, pd.Timestamp(start) + pd.Timedelta(hours=position)
+
+
+    def forecast(self, building, horizon=None, origin=None):
+        # -> (hourly timestamps, predictions) for the `horizon` hours after origin
+        # (default: the latest known hour)
+        horizon = horizon or self.horizon
+        if not 1 <= horizon <= self.horizon:
+            raise ValueError(f"horizon must be between 1 and {self.horizon} hours")
+        position, origin_time = self._origin(building, origin)
+
+        key = (building, origin_time)
+        predictions = self.cache.get(key)
+        if predictions is not None:
+            self.cache.move_to_end(key)
+            self.cache_stats['hits'] += 1
+        else:
+            self.cache_stats['misses'] += 1
+            values, start, calendar = self.history[building]
+            features = forecast_features(values, start, [position], np.arange(1, self.horizon + 1), calendar)
+            predictions = np.maximum(0, self.model.predict(features))
+            self._store(key, predictions)
+
+        times = pd.date_range(origin_time + pd.Timedelta(hours=1), periods=horizon, freq='h')
+        return times, predictions[:horizon]
+
+
+    def forecast_all(self, origin=None):
+        # Fill the cache for every building in one batch (e.g. once per hour)
+        buildings, positions, blocks = [], [], []
+        for building in self.history:
+            try:
+                position, origin_time = self._origin(building, origin)
+            except ValueError:
+                continue
+            values, start, calendar = self.history[building]
+            buildings.append((building, origin_time))
+            blocks.append(forecast_features(values, start, [position], np.arange(1, self.horizon + 1), calendar))
+        if not blocks:
+            return 0
+        predictions = np.maximum(0, self.model.predict(np.concatenate(blocks))).reshape(len(blocks), self.horizon)
+        for key, row in zip(buildings, predictions):
+            self._store(key, row)
+        return len(blocks)
+
+
+    def _store(self, key, predictions):
+        self.cache[key] = predictions
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+
+    def chart_records(self, building, horizon=None, origin=None):
+        # PeakDemandChart.jsx rows: time, actual energy (when already known) and predicted
+        times, predictions = self.forecast(building, horizon, origin)
+        values, start, _ = self.history[building]
+        positions = ((times - pd.Timestamp(start)) / pd.Timedelta(hours=1)).astype(int)
+        return [
+            {'time': ts.isoformat(), 'energy': float(values[p]) if p < len(values) else None, 'predicted': float(pred)}
+            for ts, p, pred in zip(times, positions, predictions)
+        ]
+
+
+    def peak_demand(self, building, horizon=None, origin=None):
+        # Daily predicted peak (kWh and hour), with the actual peak where known
+        records = pd.DataFrame(self.chart_records(building, horizon, origin))
+        records['time'] = pd.to_datetime(records['time'])
+        peaks = []
+        for day, group in records.groupby(records['time'].dt.date):
+            predicted = group.loc[group['predicted'].idxmax()]
+            peak = {'date': str(day), 'predicted_peak': float(predicted['predicted']),
+                    'predicted_peak_hour': int(predicted['time'].hour), 'actual_peak': None}
+            if group['energy'].notna().all():
+                actual = group.loc[group['energy'].astype(float).idxmax()]
+                peak.update({'actual_peak': float(actual['energy']), 'actual_peak_hour': int(actual['time'].hour)})
+            peaks.append(peak)
+        return peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hourly energy forecasts for peak-demand planning")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--building', default=None, help="default: every building")
+    parser.add_argument('--horizon', type=int, default=None, help="hours ahead (1-168)")
+    parser.add_argument('--origin', default=None, help="last observed hour, default the latest in the data")
+    parser.add_argument('--output', default=None, help="write chart records and peaks as JSON")
+    args = parser.parse_args()
+
+    forecaster = EnergyForecaster.load_or_train(args.data)
+    buildings = [args.building] if args.building else list(forecaster.history)
+
+    start = time.perf_counter()
+    forecaster.forecast_all(args.origin)
+    print(f"Forecast {len(buildings)} building(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    output = {}
+    for building in buildings:
+        start = time.perf_counter()
+        records = forecaster.chart_records(building, args.horizon, args.origin)
+        served = (time.perf_counter() - start) * 1000
+        peaks = forecaster.peak_demand(building, args.horizon, args.origin)
+        output[building] = {'records': records, 'peaks': peaks}
+
+        print(f"\n{building}: {len(records)} hours from {records[0]['time']} (served in {served:.2f} ms)")
+        for peak in peaks:
+            actual = f" | actual {peak['actual_peak']:.1f} kWh at {peak['actual_peak_hour']:02d}:00" \
+                if peak['actual_peak'] is not None else ""
+            print(f"   {peak['date']}: peak {peak['predicted_peak']:.1f} kWh at {peak['predicted_peak_hour']:02d}:00{actual}")
+    print(f"\nCache: {forecaster.cache_stats}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'metrics': forecaster.metrics, 'buildings': output}, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
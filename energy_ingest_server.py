@@ -0,0 +1,432 @@
+#===========================================================================
+# IOT INGESTION SERVER
+# Accepts the ESP8266 posts (sketch_nov11a.ino) on POST /iot, micro-batches
+# concurrent readings into one predict_batch call and answers each device
+# with its prediction and alert level. GET /alerts lists the active alerts;
+# with --forecast, GET /forecast?building=campus&horizon=48 serves cached
+# multi-horizon forecasts (energy_forecast.py) whose history is extended with
+# the hourly mean of the served predictions (per "building" in the posts, or
+# for the forecaster's only building), and with --rollup,
+# GET /rollup?level=day&start=2022-01-01&end=2023-01-01 serves chart rows
+# and totals from pre-aggregated rollups (energy_rollup.py), for one device
+# with &device=<name>. GET /metrics
+# exposes stage timings and latency histograms in the Prometheus text format.
+# Readings and predictions are kept in a compressed TimeSeriesStore
+# (energy_store.py, one series per device) with --store, and/or appended to
+# the live_data.csv text log with --log-file.
+#
+#   python energy_ingest_server.py --port 5000 --store live_store
+#===========================================================================
+
+
+import argparse
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import pandas as pd
+
+from energy_forecast import EnergyForecaster
+from energy_model_training import METRICS, EnergyConfig, EnergyMonitoringSystem, calendar_features
+from energy_rollup import ROLLUP_LEVELS, RollupStore
+from energy_store import TimeSeriesStore
+
+
+MAX_BODY_BYTES = 64 * 1024
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def device_payload_to_building_data(payload, timestamp):
+    # {"temperature": .., "humidity": .., "current": ..} -> model input. Calendar
+    # features come from the receive time, built like the training data's (and
+    # like load_live_readings, so online updates learn what is served); any extra
+    # key that is a training feature name (e.g. "Occupancy") is passed through.
+    building_data = {key: value for key, value in payload.items() if isinstance(value, (int, float))}
+    building_data.update({
+        'Temperature': float(payload['temperature']),
+        'Humidity': float(payload['humidity']),
+        **calendar_features(timestamp)
+    })
+    return building_data
+
+
+def validate_payload(payload):
+    if not isinstance(payload, dict):
+        return "body must be a JSON object"
+    for key in ('temperature', 'humidity', 'current'):
+        value = payload.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return f"'{key}' must be a number"
+    # JSON accepts NaN/Infinity (and 1e999 overflows to inf); none is a usable reading
+    for key, value in payload.items():
+        if isinstance(value, float) and not math.isfinite(value):
+            return f"'{key}' must be finite"
+    return None
+
+
+def alert_level(energy, alerts):
+    if energy >= EnergyConfig.CRITICAL_THRESHOLD:
+        return 'critical'
+    if energy >= EnergyConfig.HIGH_THRESHOLD:
+        return 'high'
+    if alerts:
+        return 'warning'
+    return 'normal'
+
+
+class IngestionServer:
+    def __init__(self, energy_system, max_batch_size=512, max_batch_delay=0.002, log_path=None, forecaster=None, rollups=None,
+                 store=None):
+        self.energy_system = energy_system
+        self.forecaster = forecaster
+        self.rollups = rollups
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.log_path = log_path
+        self.store = store
+        # Model calls run off the event loop, one batch at a time
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-predict")
+        self.queue = None
+        self.server = None
+        self.batch_task = None
+        self.stats = {'requests': 0, 'batches': 0, 'largest_batch': 0}
+
+
+    async def start(self, host, port):
+        self.queue = asyncio.Queue()
+        self.batch_task = asyncio.create_task(self._batch_loop())
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in self.server.sockets)
+        print(f"Ingestion server listening on {addresses}")
+        return self.server
+
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.batch_task is not None:
+            self.batch_task.cancel()
+        self.executor.shutdown(wait=False)
+        if self.store is not None:
+            self.store.close()
+
+
+    async def submit(self, payload):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((payload, datetime.now(), future))
+        return await future
+
+
+    #-----------------------------------------------------------------------
+    # Micro-batching
+    #-----------------------------------------------------------------------
+
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+
+            # Give concurrent requests a moment to join, unless the batch is already full
+            if self.queue.qsize() < self.max_batch_size - 1 and self.max_batch_delay > 0:
+                await asyncio.sleep(self.max_batch_delay)
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            self.stats['batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+
+            try:
+                responses = await loop.run_in_executor(
+                    self.executor, self._process_batch, [(payload, ts) for payload, ts, _ in batch]
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, _, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+
+    @METRICS.latency('ingest_batch')
+    def _process_batch(self, items):
+        # Runs in the executor thread
+        monitor = self.energy_system.iot_monitor
+        alert_system = self.energy_system.alert_system
+
+        readings = [device_payload_to_building_data(payload, ts) for payload, ts in items]
+        predictions = monitor.predict_batch(readings)
+
+        # Each device gets every alert that holds for its reading, from the same
+        # evaluation that updates the tracked (deduplicated) alerts behind GET /alerts
+        columns = pd.DataFrame(readings)
+        columns['energy'] = predictions
+        columns['source'] = [str(payload.get('device', 'device')) for payload, _ in items]
+        columns['timestamp'] = [ts for _, ts in items]
+        batch_alerts = alert_system.evaluate(columns, messages=True)['messages']
+
+        responses = []
+        for prediction, alerts in zip(predictions, batch_alerts):
+            energy = float(prediction)
+            responses.append({
+                'prediction': energy,
+                'alert_level': alert_level(energy, alerts),
+                'alerts': alerts,
+                'model_used': monitor.best_model_name
+            })
+
+        if self.forecaster is not None:
+            self._extend_forecast_history(items, columns)
+
+        if self.rollups is not None:
+            # One device rollup per device, like the tracked alerts; each is a
+            # building-scale estimate, so they stay out of the campus totals
+            for source, rows in columns.groupby('source').indices.items():
+                self.rollups.devices.add(columns['timestamp'].iloc[rows], predictions[rows], source)
+
+        if self.store is not None:
+            for source, rows in columns.groupby('source').indices.items():
+                payloads = [items[i][0] for i in rows]
+                self.store.append(columns['timestamp'].iloc[rows], {
+                    'temperature': [payload['temperature'] for payload in payloads],
+                    'humidity': [payload['humidity'] for payload in payloads],
+                    'current': [payload['current'] for payload in payloads],
+                    'pred': predictions[rows]
+                }, source)
+
+        if self.log_path:
+            self._append_log(items, predictions)
+        return responses
+
+
+    def _extend_forecast_history(self, items, columns):
+        # Each prediction is a building-scale estimate, so a building's hourly value
+        # is the mean over its readings. Posts name their building; without one they
+        # belong to the forecaster's building when it only has one.
+        known = list(self.forecaster.history)
+        default = known[0] if len(known) == 1 else None
+        buildings = [payload.get('building', default) for payload, _ in items]
+        buildings = pd.Series([building if isinstance(building, str) else None for building in buildings])
+        for building, rows in columns.groupby(buildings).indices.items():
+            if building in self.forecaster.history:
+                self.forecaster.add_readings(building, columns['timestamp'].iloc[rows],
+                                             columns['energy'].to_numpy()[rows])
+
+
+    def _active_alerts(self):
+        alert_system = self.energy_system.alert_system
+        return {'alerts': list(alert_system.active_alerts.values()), **alert_system.stats}
+
+
+    def _append_log(self, items, predictions):
+        # Same columns as the existing live_data.csv
+        write_header = not os.path.exists(self.log_path)
+        with open(self.log_path, 'a') as f:
+            if write_header:
+                f.write("timestamp,temp,hum,current,pred\n")
+            for (payload, ts), prediction in zip(items, predictions):
+                f.write(f"{ts},{payload['temperature']},{payload['humidity']},{payload['current']},{prediction}\n")
+
+
+    #-----------------------------------------------------------------------
+    # Minimal HTTP/1.1 handling
+    #-----------------------------------------------------------------------
+
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').split("\r\n")
+                parts = request_line.split()
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, keep_alive=False)
+                    break
+                method, path, version = parts
+
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'body too large'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+                if path.partition('?')[0] != '/metrics':
+                    status, response = await self._route(method, path, body)
+                    await self._respond(writer, status, response, keep_alive)
+                elif method != 'GET':
+                    await self._respond(writer, 405, {'error': 'use GET'}, keep_alive)
+                else:
+                    await self._respond_text(writer, 200, METRICS.prometheus_text(), keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+    async def _route(self, method, path, body):
+        path, _, query = path.partition('?')
+        if path == '/forecast':
+            # A cache miss runs the forecasting models, so keep it off the event loop
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._forecast, parse_qs(query))
+        if path == '/rollup':
+            # Read on the executor thread, which is also where batches add readings
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._rollup, parse_qs(query))
+        if path == '/health':
+            return 200, {'status': 'ok', 'model': self.energy_system.iot_monitor.best_model_name, **self.stats}
+        if path == '/alerts':
+            # Active alerts in the shape AlertPanel.jsx renders; read on the executor
+            # thread so it cannot interleave with a batch updating them
+            return 200, await asyncio.get_running_loop().run_in_executor(self.executor, self._active_alerts)
+        if path != '/iot':
+            return 404, {'error': f'unknown path {path}'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {'error': 'body is not valid JSON'}
+        error = validate_payload(payload)
+        if error:
+            return 400, {'error': error}
+
+        self.stats['requests'] += 1
+        try:
+            return 200, await self.submit(payload)
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+
+    def _forecast(self, query):
+        # Runs in the executor thread; repeated queries are cache lookups
+        if self.forecaster is None:
+            return 404, {'error': 'forecasting is not enabled (start with --forecast)'}
+        building = query.get('building', [next(iter(self.forecaster.history), '')])[0]
+        if building not in self.forecaster.history:
+            return 404, {'error': f'unknown building {building}'}
+        try:
+            horizon = int(query.get('horizon', [24])[0])
+            origin = query.get('origin', [None])[0]
+            records = self.forecaster.chart_records(building, horizon, origin)
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        return 200, {'building': building, 'records': records}
+
+
+    def _rollup(self, query):
+        # HistoricalChart.jsx rows for one group plus per-group totals for the
+        # summary cards and cost pie
+        if self.rollups is None:
+            return 404, {'error': 'rollups are not enabled (start with --rollup)'}
+        device = query.get('device', [None])[0]
+        group = device or query.get('group', ['campus'])[0]
+        level = query.get('level', ['day'])[0]
+        if level not in ROLLUP_LEVELS:
+            return 400, {'error': f"level must be one of {', '.join(ROLLUP_LEVELS)}"}
+        try:
+            start = pd.Timestamp(query['start'][0])
+            end = pd.Timestamp(query['end'][0])
+        except (KeyError, ValueError) as e:
+            return 400, {'error': f'start and end must be dates ({e})'}
+        series = self.rollups.devices if device else self.rollups
+        return 200, {'group': group, 'level': level, 'records': series.chart_records(start, end, level, group),
+                     **self.rollups.summary(start, end)}
+
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        await self._respond_text(writer, status, json.dumps(payload), keep_alive, 'application/json')
+
+
+    async def _respond_text(self, writer, status, text, keep_alive, content_type='text/plain; version=0.0.4'):
+        body = text.encode()
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+async def serve(energy_system, host, port, **kwargs):
+    server = IngestionServer(energy_system, **kwargs)
+    await server.start(host, port)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP ingestion server for IoT energy readings")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--max-batch-size', type=int, default=512)
+    parser.add_argument('--max-batch-delay-ms', type=float, default=2.0)
+    parser.add_argument('--log-file', default=None, help="append readings and predictions to this CSV")
+    parser.add_argument('--store', default=None, help="keep readings and predictions in this TimeSeriesStore directory")
+    parser.add_argument('--forecast', action='store_true', help="serve GET /forecast from a cached forecaster")
+    parser.add_argument('--rollup', action='store_true', help="serve GET /rollup from rollups of --data and live readings")
+    args = parser.parse_args()
+
+    energy_system = EnergyMonitoringSystem(args.data)
+    if not hasattr(energy_system, 'iot_monitor'):
+        print("Cannot start ingestion server - system initialization failed")
+        return
+
+    forecaster = None
+    if args.forecast:
+        forecaster = EnergyForecaster.load_or_train(args.data)
+        forecaster.forecast_all()
+
+    rollups = RollupStore.from_csv(args.data) if args.rollup else None
+
+    try:
+        asyncio.run(serve(
+            energy_system, args.host, args.port,
+            max_batch_size=args.max_batch_size,
+            max_batch_delay=args.max_batch_delay_ms / 1000,
+            log_path=args.log_file,
+            forecaster=forecaster,
+            rollups=rollups,
+            store=TimeSeriesStore(args.store) if args.store else None
+        ))
+    except KeyboardInterrupt:
+        print("\nIngestion server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,60 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.svm import SVR
+from sklearn.svm import SVR, LinearSVR
+from sklearn.kernel_approximation import Nystroem
+from sklearn.metrics.pairwise import rbf_kernel
+from sklearn.linear_model import SGDRegressor
 from sklearn.tree import DecisionTreeRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
+from sklearn.base import BaseEstimator, RegressorMixin, clone
 from sklearn.metrics import r2_score, mean_squared_error
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.impute import SimpleImputer, KNNImputer
+from sklearn.neighbors import NearestNeighbors
+from sklearn.dummy import DummyRegressor
+import sklearn
 import joblib
 import random
+import bisect
+import copy
+import functools
+import hashlib
+import json
+import os
+import shutil
+import string
+import sys
+import threading
+import time
+import tracemalloc
+import multiprocessing
+import multiprocessing.connection
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict, deque
 from datetime import datetime
 import warnings
 
+from energy_store import TimeSeriesStore
+
+try:
+    # Cython kernel behind GradientBoostingRegressor.predict, used by the compiled inference path
+    from sklearn.ensemble._gradient_boosting import predict_stages
+except ImportError:
+    predict_stages = None
+
+try:
+    # Unix only: peak resident set size for the metrics endpoint
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    # Optional: lets the dataset cache use Parquet instead of per-column .npy files
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
@@ -46,12 +89,490 @@ class EnergyConfig:
    
     # Appliance power profiles (Watts)
     APPLIANCE_PROFILES = {
-        "AC_Floor1": {"min": 1500, "max": 3000, "location": "Floor 1"},
-        "AC_Floor2": {"min": 1500, "max": 3000, "location": "Floor 2"},
-        "Lights_Lab": {"min": 400, "max": 800, "location": "Computer Lab"},
-        "Computers_Lab": {"min": 800, "max": 2000, "location": "Computer Lab"},
-        "Water_Cooler": {"min": 100, "max": 300, "location": "Common Area"}
+        "AC_Floor1": {"min": 1500, "max": 3000, "location": "Floor 1", "type": "AC"},
+        "AC_Floor2": {"min": 1500, "max": 3000, "location": "Floor 2", "type": "AC"},
+        "Lights_Lab": {"min": 400, "max": 800, "location": "Computer Lab", "type": "Lights"},
+        "Computers_Lab": {"min": 800, "max": 2000, "location": "Computer Lab", "type": "Computers"},
+        "Water_Cooler": {"min": 100, "max": 300, "location": "Common Area", "type": "Water_Cooler"}
+    }
+    # Appliance type codes (stored per device instead of matching on names)
+    APPLIANCE_TYPES = {"Other": 0, "AC": 1, "Lights": 2, "Computers": 3, "Water_Cooler": 4}
+   
+    # Alert conditions
+    AC_MIN_OCCUPANCY = 20
+    LIGHTS_MIN_OCCUPANCY = 10
+    HIGH_TEMPERATURE = 32
+    ENERGY_SPIKE_KWH = 25  # rise since the previous reading from the same source
+   
+    # Alert rules. 'when' conditions (all must hold) raise an alert; it stays active
+    # until the 'clear' conditions hold (hysteresis; default: 'when' no longer holds).
+    # A field ending in '_change' is the change since the source's previous reading.
+    # Appliance rules apply to running appliances of the given type. A cleared alert
+    # that comes back within ALERT_COOLDOWN seconds is tracked but not re-sent.
+    ALERT_COOLDOWN = 15 * 60
+    ALERT_RULES = [
+        {"name": "energy_critical", "level": "critical", "title": "Critical energy consumption",
+         "when": [("energy", ">=", CRITICAL_THRESHOLD)],
+         "clear": [("energy", "<", CRITICAL_THRESHOLD - 5)],
+         "message": "CRITICAL: Energy consumption {energy:.1f} kWh exceeds critical threshold!"},
+        {"name": "energy_high", "level": "warning", "title": "High energy consumption",
+         "when": [("energy", ">=", HIGH_THRESHOLD), ("energy", "<", CRITICAL_THRESHOLD)],
+         "clear": [("energy", "<", HIGH_THRESHOLD - 5)],
+         "message": "HIGH: Energy consumption {energy:.1f} kWh above high threshold"},
+        {"name": "ac_low_occupancy", "level": "warning", "title": "AC in low occupancy", "appliance": "AC",
+         "when": [("Occupancy", "<", AC_MIN_OCCUPANCY)],
+         "clear": [("Occupancy", ">=", AC_MIN_OCCUPANCY + 5)],
+         "message": "AC running in low occupancy: {appliance}"},
+        {"name": "lights_empty", "level": "warning", "title": "Lights in empty area", "appliance": "Lights",
+         "when": [("Occupancy", "<", LIGHTS_MIN_OCCUPANCY)],
+         "clear": [("Occupancy", ">=", LIGHTS_MIN_OCCUPANCY + 5)],
+         "message": "Lights on in empty area: {appliance}"},
+        {"name": "high_temperature", "level": "info", "title": "High temperature",
+         "when": [("Temperature", ">", HIGH_TEMPERATURE)],
+         "clear": [("Temperature", "<=", HIGH_TEMPERATURE - 1)],
+         "message": "High temperature ({Temperature:.1f}C) increasing AC load"},
+        {"name": "energy_spike", "level": "warning", "title": "Energy spike",
+         "when": [("energy_change", ">", ENERGY_SPIKE_KWH)],
+         "message": "Energy rose {energy_change:.1f} kWh since the previous reading"}
+    ]
+   
+    # Campus monitoring: buildings are split across this many worker processes
+    CAMPUS_SHARDS = None  # None = one per CPU
+   
+    # Persisted artifacts (written by train_energy_models, read on warm start)
+    PREPROCESSOR_ARTIFACT = "energy_preprocessor.joblib"
+    MODEL_ARTIFACT_PATTERN = "model_{}.joblib"
+    # Bump whenever preprocessing or model setup changes so old artifacts are retrained
+    PIPELINE_VERSION = 2
+    # How often (s) predictions check whether the artifacts were rewritten on disk
+    # (by hand or a retrain in another process); changed artifacts are reloaded
+    ARTIFACT_CHECK_SECONDS = 5.0
+   
+    # Serving export: only the best model is exported for serving, tree models as
+    # flat float32 arrays (depth-capped while R2 drops by at most EXPORT_MAX_R2_DROP).
+    # 'mmap' files are uncompressed so worker processes can share one mapped copy;
+    # 'compressed' files are smallest on disk but loaded privately by each worker.
+    SERVING_ARTIFACT = "energy_serving_model.joblib"
+    SERVING_ARTIFACT_MODE = 'mmap'
+    EXPORT_MAX_R2_DROP = 0.002
+    # Also write every candidate's full sklearn model (the best one is always written)
+    SAVE_ALL_MODELS = False
+   
+    # Monitoring history: ring buffer size and rolling windows (seconds)
+    HISTORY_CAPACITY = 2 ** 18
+    HISTORY_WINDOWS = {"hour": 3600, "day": 24 * 3600, "month": 30 * 24 * 3600}
+   
+    # Model training: fit candidates in parallel worker processes; a candidate still
+    # fitting after MODEL_TIME_BUDGET seconds is cancelled (None = no limit)
+    PARALLEL_TRAINING = True
+    TRAINING_WORKERS = None  # None = one per CPU
+    MODEL_TIME_BUDGET = None
+   
+    # Exact RBF SVR fits in O(n^2)-O(n^3) and predicts against every support vector;
+    # above SVR_APPROXIMATION_ROWS training rows the 'SVR' candidate becomes a
+    # NystroemSVR on SVR_APPROXIMATION_COMPONENTS landmarks (linear in rows)
+    SVR_APPROXIMATION_ROWS = 20000
+    SVR_APPROXIMATION_COMPONENTS = 500
+   
+    # Hyperparameter search (successive halving): sampled configurations per family,
+    # rung sizes shrink the candidate set by TUNING_HALVING_FACTOR each round
+    TUNING_CANDIDATES = 9
+    TUNING_HALVING_FACTOR = 3
+    TUNING_CACHE_DIR = "energy_tuning"
+    TUNING_SPACES = {
+        'Random Forest': {
+            'n_estimators': [50, 100, 200, 300],
+            'max_depth': [None, 10, 16, 24],
+            'min_samples_leaf': [1, 2, 4, 8],
+            'max_features': [1.0, 0.7, 0.5, 'sqrt']
+        },
+        'Gradient Boosting': {
+            'n_estimators': [100, 200, 400],
+            'learning_rate': [0.03, 0.05, 0.1, 0.2],
+            'max_depth': [2, 3, 4, 5],
+            'subsample': [0.7, 0.85, 1.0]
+        },
+        'SVR': {
+            'C': [0.3, 1.0, 3.0, 10.0, 30.0, 100.0],
+            'gamma': ['scale', 0.01, 0.03, 0.1],
+            'epsilon': [0.1, 0.5, 1.0, 2.0]
+        },
+        'Decision Tree': {
+            'max_depth': [None, 6, 8, 10, 12, 16],
+            'min_samples_leaf': [1, 5, 10, 20, 40]
+        }
     }
+   
+    # Model selection: walk-forward validation on the Date/Hour axis. Folds split the
+    # hours after the first WALK_FORWARD_MIN_TRAIN share; each trains on all earlier
+    # hours except a WALK_FORWARD_GAP_HOURS gap (0 folds = judge on the holdout only)
+    WALK_FORWARD_FOLDS = 5
+    WALK_FORWARD_GAP_HOURS = 24
+    WALK_FORWARD_MIN_TRAIN = 0.5
+    VALIDATION_CACHE_DIR = "energy_validation"
+   
+    # Multi-horizon forecasting (energy_forecast.py): hours ahead, cached forecasts,
+    # training rows sampled from origins every FORECAST_ORIGIN_STRIDE hours
+    FORECAST_HORIZON = 168
+    FORECAST_CACHE_SIZE = 4096
+    FORECAST_ORIGIN_STRIDE = 7
+    FORECAST_TRAINING_ROWS = 100_000
+    FORECAST_MODEL_PARAMS = {'n_estimators': 200, 'max_depth': 5, 'subsample': 0.8}
+    FORECAST_ARTIFACT = "energy_forecaster.joblib"
+   
+    # Dataset cache: cleaned/encoded/imputed data keyed on source file hash + config.
+    # Format 'npy' (memory-mapped column files), 'parquet' (needs pyarrow) or 'auto'
+    DATASET_CACHE = True
+    DATASET_CACHE_DIR = "energy_cache"
+    DATASET_CACHE_FORMAT = 'auto'
+   
+    # Chunked preprocessing: None keeps the whole CSV in memory; otherwise rows per
+    # chunk, with the preprocessed matrix written as .npy files under CHUNK_OUTPUT_DIR
+    CHUNK_SIZE = None
+    CHUNK_OUTPUT_DIR = "energy_chunks"
+    # Relative accuracy of the quantile sketch used for IQR bounds in chunked mode
+    QUANTILE_SKETCH_ACCURACY = 0.001
+   
+    # Online updates from live readings
+    ONLINE_MIN_BATCH = 24                # labelled rows needed before an update
+    ONLINE_TREES_PER_UPDATE = {'Gradient Boosting': 20, 'Random Forest': 10}
+    ONLINE_MAX_ESTIMATORS = 1000         # past this, ask for a full retrain instead
+    ONLINE_DRIFT_RMSE_RATIO = 2.0        # batch RMSE vs training RMSE that counts as drift
+    ONLINE_DRIFT_FEATURE_SHIFT = 3.0     # batch mean shift (in training std units) that counts as drift
+    SUPPLY_VOLTAGE = 230.0               # V, to turn device current readings into kWh
+    LIVE_MAX_READING_GAP = 60.0          # s, longest gap a reading is assumed to cover
+    LIVE_MIN_HOUR_COVERAGE = 0.5         # share of an hour a device must cover to label it
+    # A device meters one circuit, the model predicts the whole building: building kWh
+    # per metered kWh for each live series ('live' for live_data.csv, else the
+    # TimeSeriesStore series name). Only calibrated series become labels.
+    LIVE_LOAD_SCALE = {}
+   
+    # Prediction cache: LRU of up to PREDICTION_CACHE_SIZE predictions keyed on the
+    # model version and the feature vector, with the sensor columns quantized to
+    # PREDICTION_CACHE_DECIMALS (0 disables the cache). Readings off that grid are
+    # snapped onto it with PREDICTION_CACHE_SNAP, otherwise they skip the cache, so
+    # predictions are exactly those of the model
+    PREDICTION_CACHE_SIZE = 16384
+    PREDICTION_CACHE_DECIMALS = {'Temperature': 1, 'Humidity': 0}
+    PREDICTION_CACHE_SNAP = False
+   
+    # Stage metrics: wall/CPU time per pipeline and monitoring stage, peak memory via
+    # tracemalloc (training runs ~10% slower with it; a monitoring cycle ~5x, so
+    # cycles only trace memory when PROFILE_MONITOR_MEMORY is set), latency histogram
+    # bounds in seconds, and where the JSON dump goes when no server exposes /metrics
+    PROFILE_STAGES = True
+    PROFILE_MEMORY = True
+    PROFILE_MONITOR_MEMORY = False
+    LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+    METRICS_FILE = "energy_metrics.json"
+   
+    # Missing value imputation: 'knn', 'fast_knn', 'interpolate' or 'none'
+    IMPUTATION_STRATEGY = 'fast_knn'
+    IMPUTATION_NEIGHBORS = 5
+    # Reference rows searched by 'fast_knn' (complete rows are subsampled above this)
+    IMPUTATION_MAX_REFERENCE_ROWS = 5000
+
+
+#===========================================================================
+# 1b. STAGE METRICS
+#===========================================================================
+
+
+class StageTimer:
+    # Wall time, CPU time (this process) and peak memory growth of one run of a
+    # stage. Memory is traced with tracemalloc only while at least one timer that
+    # tracks it is open, so nothing else pays for tracing; nested timers keep the
+    # peak of the timers around them intact. The peak is process-wide, so only
+    # timers on the main thread track memory (a worker thread resetting it would
+    # corrupt theirs); elsewhere peak_memory stays None.
+    _open = []
+    _lock = threading.Lock()
+    _started_tracing = False
+
+
+    def __init__(self, track_memory=True):
+        self.track_memory = track_memory
+        self.wall = self.cpu = 0.0
+        self.peak_memory = None
+
+
+    def __enter__(self):
+        self._tracing = self.track_memory and threading.current_thread() is threading.main_thread()
+        if self._tracing:
+            with StageTimer._lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    StageTimer._started_tracing = True
+                current, peak = tracemalloc.get_traced_memory()
+                # The enclosing timer keeps the peak seen so far before it is reset
+                if StageTimer._open:
+                    StageTimer._open[-1]._carried_peak = max(StageTimer._open[-1]._carried_peak, peak)
+                tracemalloc.reset_peak()
+                self._start_memory = self._carried_peak = current
+                StageTimer._open.append(self)
+        self._start_cpu = time.process_time()
+        self._start_wall = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._start_wall
+        self.cpu = time.process_time() - self._start_cpu
+        if self._tracing:
+            with StageTimer._lock:
+                peak = max(tracemalloc.get_traced_memory()[1], self._carried_peak)
+                self.peak_memory = max(0, peak - self._start_memory)
+                StageTimer._open.remove(self)
+                if StageTimer._open:
+                    StageTimer._open[-1]._carried_peak = max(StageTimer._open[-1]._carried_peak, peak)
+                elif StageTimer._started_tracing:
+                    tracemalloc.stop()
+                    StageTimer._started_tracing = False
+        return False
+
+
+class LatencyHistogram:
+    # Cumulative-bucket histogram in the Prometheus layout (seconds)
+    def __init__(self, buckets=None):
+        self.buckets = sorted(buckets or EnergyConfig.LATENCY_BUCKETS)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+    def cumulative(self):
+        return dict(zip([*map(repr, self.buckets), '+Inf'], np.cumsum(self.counts).tolist()))
+
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-quantile
+        if self.count == 0:
+            return None
+        index = int(np.searchsorted(np.cumsum(self.counts), q * self.count))
+        return self.buckets[index] if index < len(self.buckets) else float('inf')
+
+
+class StageMetrics:
+    # Per-stage totals (runs, wall, CPU, last run, peak memory) and latency
+    # histograms for the training pipeline and the monitoring loop. Read them with
+    # report(), to_dict()/dump_json() or prometheus_text() (GET /metrics on the
+    # ingestion server).
+    def __init__(self, enabled=None, track_memory=None):
+        self.enabled = EnergyConfig.PROFILE_STAGES if enabled is None else enabled
+        self.track_memory = EnergyConfig.PROFILE_MEMORY if track_memory is None else track_memory
+        self.stages = {}
+        self.histograms = {}
+        # name -> callable returning a cache's counters (PredictionCache.stats)
+        self.caches = {}
+        self.lock = threading.Lock()
+
+
+    def stage(self, name, track_memory=None):
+        # track_memory=None follows the metrics-wide setting
+        return _StageContext(self, name, self.track_memory if track_memory is None else track_memory)
+
+
+    def timed(self, name):
+        # Decorator form of stage() for methods that are a stage as a whole
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+    def latency(self, name):
+        # Decorator recording every call's wall time in the `name` histogram
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+
+    def record(self, name, wall, cpu=None, peak_memory=None):
+        # Also used for runs measured elsewhere, e.g. model fits in worker processes
+        if not self.enabled:
+            return
+        with self.lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = {'runs': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'last_wall_seconds': 0.0,
+                                             'max_wall_seconds': 0.0, 'peak_memory_bytes': None}
+            stats['runs'] += 1
+            stats['wall_seconds'] += wall
+            stats['cpu_seconds'] += cpu or 0.0
+            stats['last_wall_seconds'] = wall
+            stats['max_wall_seconds'] = max(stats['max_wall_seconds'], wall)
+            if peak_memory is not None:
+                stats['peak_memory_bytes'] = max(stats['peak_memory_bytes'] or 0, int(peak_memory))
+
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.observe(seconds)
+
+
+    def register_cache(self, name, stats):
+        # Registering a name again replaces the earlier cache
+        with self.lock:
+            self.caches[name] = stats
+
+
+    def reset(self):
+        with self.lock:
+            self.stages, self.histograms = {}, {}
+
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'stages': {name: dict(stats) for name, stats in self.stages.items()},
+                'latency': {
+                    name: {'count': h.count, 'sum_seconds': h.sum, 'p50_seconds': h.quantile(0.5),
+                           'p99_seconds': h.quantile(0.99),
+                           'buckets': h.cumulative()}
+                    for name, h in self.histograms.items()
+                },
+                'caches': {name: stats() for name, stats in self.caches.items()},
+                'max_rss_bytes': _max_rss_bytes()
+            }
+
+
+    def dump_json(self, path=None):
+        path = path or EnergyConfig.METRICS_FILE
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+    def prometheus_text(self, prefix='energy'):
+        lines = []
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+       
+        data = self.to_dict()
+        stages = sorted(data['stages'].items())
+        family('stage_runs_total', 'counter', "Completed runs of each stage",
+               [([('stage', name)], stats['runs']) for name, stats in stages])
+        family('stage_wall_seconds_total', 'counter', "Wall time spent in each stage",
+               [([('stage', name)], repr(stats['wall_seconds'])) for name, stats in stages])
+        family('stage_cpu_seconds_total', 'counter', "CPU time of this process spent in each stage",
+               [([('stage', name)], repr(stats['cpu_seconds'])) for name, stats in stages])
+        family('stage_last_wall_seconds', 'gauge', "Wall time of the latest run of each stage",
+               [([('stage', name)], repr(stats['last_wall_seconds'])) for name, stats in stages])
+        family('stage_peak_memory_bytes', 'gauge', "Largest memory growth traced during a run of each stage",
+               [([('stage', name)], stats['peak_memory_bytes']) for name, stats in stages
+                if stats['peak_memory_bytes'] is not None])
+       
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            lines.append(f"# HELP {prefix}_latency_seconds Latency of predictions and alert checks")
+            lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+            for name, h in histograms:
+                for bound, count in h.cumulative().items():
+                    lines.append(f'{prefix}_latency_seconds_bucket{{operation="{name}",le="{bound}"}} {count}')
+                lines.append(f'{prefix}_latency_seconds_sum{{operation="{name}"}} {h.sum!r}')
+                lines.append(f'{prefix}_latency_seconds_count{{operation="{name}"}} {h.count}')
+               
+        caches = sorted(data['caches'].items())
+        for key, kind, help_text in [('hits', 'counter', "Lookups answered from the cache"),
+                                     ('misses', 'counter', "Lookups that ran the model"),
+                                     ('bypassed', 'counter', "Readings that could not use the cache"),
+                                     ('evictions', 'counter', "Entries dropped to stay within capacity"),
+                                     ('invalidations', 'counter', "Times the cache was emptied for a new model"),
+                                     ('entries', 'gauge', "Entries currently cached"),
+                                     ('hit_rate', 'gauge', "Hits per lookup since start")]:
+            name = f"cache_{key}_total" if kind == 'counter' else f"cache_{key}"
+            family(name, kind, help_text, [([('cache', cache)], stats[key]) for cache, stats in caches
+                                           if stats[key] is not None])
+               
+        if data['max_rss_bytes'] is not None:
+            family('process_max_rss_bytes', 'gauge', "Peak resident set size of this process",
+                   [([], data['max_rss_bytes'])])
+        return "\n".join(lines) + "\n"
+
+
+    def report(self, top=None):
+        # Stages by total wall time, slowest first
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: -item[1]['wall_seconds'])[:top]
+            caches = {name: stats() for name, stats in self.caches.items()}
+        caches = {name: stats for name, stats in caches.items() if stats['hit_rate'] is not None}
+        if not stages and not caches:
+            return
+        print("\n" + "-"*50)
+        print("STAGE TIMINGS")
+        print("-"*50)
+        print(f"{'stage':<40} {'runs':>5} {'wall s':>9} {'cpu s':>9} {'peak MB':>9}")
+        for name, stats in stages:
+            peak = stats['peak_memory_bytes']
+            peak_text = f"{peak / 2**20:9.1f}" if peak is not None else f"{'-':>9}"
+            print(f"{name:<40} {stats['runs']:>5} {stats['wall_seconds']:>9.3f} {stats['cpu_seconds']:>9.3f} {peak_text}")
+        for name, stats in caches.items():
+            print(f"{name} cache: {stats['hits']} hits, {stats['misses']} misses, {stats['bypassed']} bypassed "
+                  f"({stats['hit_rate']:.1%} hit rate), {stats['entries']} entries")
+
+
+class _StageContext:
+    def __init__(self, metrics, name, track_memory):
+        self.metrics = metrics
+        self.name = name
+        self.track_memory = track_memory
+        self.timer = None
+
+
+    def __enter__(self):
+        if self.metrics.enabled:
+            self.timer = StageTimer(self.track_memory).__enter__()
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.timer is not None:
+            self.timer.__exit__(exc_type, exc, tb)
+            # Failed runs are not counted
+            if exc_type is None:
+                self.metrics.record(self.name, self.timer.wall, self.timer.cpu, self.timer.peak_memory)
+        return False
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(rss) if sys.platform == 'darwin' else int(rss) * 1024
+
+
+# Process-wide metrics of the pipeline and the monitoring loop
+METRICS = StageMetrics()
 
 
 #===========================================================================
@@ -59,15 +580,212 @@ class EnergyConfig:
 #===========================================================================
 
 
+class FullKNNImputer:
+    # Original behaviour: KNNImputer over every row of the numeric matrix
+    def __init__(self, n_neighbors=EnergyConfig.IMPUTATION_NEIGHBORS):
+        self.n_neighbors = n_neighbors
+
+
+    def fit_transform(self, data, time_index=None):
+        imputed = KNNImputer(n_neighbors=self.n_neighbors, keep_empty_features=True).fit_transform(data)
+        return pd.DataFrame(imputed, columns=data.columns, index=data.index)
+
+
+class FastKNNImputer:
+    # Only rows with missing values are queried, against a subsampled set of
+    # complete rows indexed by a KD/ball tree, one search per missingness pattern
+    def __init__(self, n_neighbors=EnergyConfig.IMPUTATION_NEIGHBORS,
+                 max_reference_rows=EnergyConfig.IMPUTATION_MAX_REFERENCE_ROWS, random_state=42):
+        self.n_neighbors = n_neighbors
+        self.max_reference_rows = max_reference_rows
+        self.random_state = random_state
+
+
+    def fit_transform(self, data, time_index=None):
+        values = data.to_numpy(dtype=float, copy=True)
+        missing = np.isnan(values)
+        query_rows = np.flatnonzero(missing.any(axis=1))
+        if len(query_rows) == 0:
+            return data
+           
+        column_means = np.nanmean(values, axis=0)
+        column_means = np.where(np.isnan(column_means), 0.0, column_means)
+       
+        reference = values[~missing.any(axis=1)]
+        if len(reference) > self.max_reference_rows:
+            rng = np.random.default_rng(self.random_state)
+            reference = reference[rng.choice(len(reference), self.max_reference_rows, replace=False)]
+           
+        patterns, pattern_ids = np.unique(missing[query_rows], axis=0, return_inverse=True)
+        pattern_ids = pattern_ids.ravel()
+        for pattern_id, pattern in enumerate(patterns):
+            rows = query_rows[pattern_ids == pattern_id]
+            observed = ~pattern
+           
+            # Nothing to measure distance on (or nothing to measure against): fall back to means
+            if len(reference) == 0 or not observed.any():
+                values[np.ix_(rows, pattern)] = column_means[pattern]
+                continue
+               
+            k = min(self.n_neighbors, len(reference))
+            index = NearestNeighbors(n_neighbors=k).fit(reference[:, observed])
+            _, neighbors = index.kneighbors(values[np.ix_(rows, observed)])
+            values[np.ix_(rows, pattern)] = reference[:, pattern][neighbors].mean(axis=1)
+           
+        return pd.DataFrame(values, columns=data.columns, index=data.index)
+
+
+class TimeInterpolationImputer:
+    # Interpolates each gap along the hourly series (falls back to row order
+    # when no usable timestamp is available); leftover gaps get the column median
+    def fit_transform(self, data, time_index=None):
+        result = data.copy()
+        if time_index is not None and not time_index.isna().any():
+            order = time_index.sort_values(kind='stable').index
+            ordered = result.loc[order]
+            ordered.index = pd.DatetimeIndex(time_index.loc[order])
+            ordered = ordered.interpolate(method='time', limit_direction='both')
+            result.loc[order] = ordered.to_numpy()
+        else:
+            result = result.interpolate(method='linear', limit_direction='both')
+           
+        return result.fillna(result.median()).fillna(0)
+
+
+class NoOpImputer:
+    def fit_transform(self, data, time_index=None):
+        return data
+
+
+IMPUTATION_STRATEGIES = {
+    'knn': FullKNNImputer,
+    'fast_knn': FastKNNImputer,
+    'interpolate': TimeInterpolationImputer,
+    'none': NoOpImputer
+}
+
+
+def make_imputer(strategy):
+    # Accepts a strategy name or any object with fit_transform(data, time_index)
+    if not isinstance(strategy, str):
+        return strategy
+    if strategy not in IMPUTATION_STRATEGIES:
+        raise ValueError(f"Unknown imputation strategy '{strategy}', choose from {sorted(IMPUTATION_STRATEGIES)}")
+    return IMPUTATION_STRATEGIES[strategy]()
+
+
+class QuantileSketch:
+    # Mergeable quantile sketch so IQR bounds can be computed chunk by chunk.
+    # Columns with few distinct values (flags, years, 0.1-resolution sensors) are
+    # counted exactly and give the same quantiles as pandas; past
+    # max_exact_values it switches to relative-error log buckets (DDSketch-style).
+    def __init__(self, relative_accuracy=None, max_exact_values=4096):
+        accuracy = relative_accuracy or EnergyConfig.QUANTILE_SKETCH_ACCURACY
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.max_exact_values = max_exact_values
+        self.exact = {}
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        unique, counts = np.unique(values, return_counts=True)
+        if self.exact is not None:
+            for value, count in zip(unique.tolist(), counts.tolist()):
+                self.exact[value] = self.exact.get(value, 0) + count
+            if len(self.exact) > self.max_exact_values:
+                self._to_buckets()
+        else:
+            self._add_to_buckets(unique, counts)
+        return self
+
+
+    def merge(self, other):
+        self.count += other.count
+        if self.exact is not None and other.exact is not None:
+            for value, count in other.exact.items():
+                self.exact[value] = self.exact.get(value, 0) + count
+            if len(self.exact) > self.max_exact_values:
+                self._to_buckets()
+            return self
+           
+        if self.exact is not None:
+            self._to_buckets()
+        if other.exact is not None:
+            self._add_to_buckets(np.array(list(other.exact), dtype=float), np.array(list(other.exact.values())))
+        else:
+            for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+                for key, count in other_store.items():
+                    store[key] = store.get(key, 0) + count
+            self.zero_count += other.zero_count
+        return self
+
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        rank = q * (self.count - 1)
+        if self.exact is not None:
+            # Linear interpolation between order statistics, as pandas does
+            values = np.array(sorted(self.exact))
+            cumulative = np.cumsum([self.exact[v] for v in values])
+            lower = values[np.searchsorted(cumulative, np.floor(rank), side='right')]
+            upper = values[np.searchsorted(cumulative, np.ceil(rank), side='right')]
+            return float(lower + (upper - lower) * (rank - np.floor(rank)))
+           
+        seen = 0
+        # Ascending order: most negative buckets first, then zero, then positive
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+
+    def _to_buckets(self):
+        exact, self.exact = self.exact, None
+        self._add_to_buckets(np.array(list(exact), dtype=float), np.array(list(exact.values())))
+
+
+    def _add_to_buckets(self, values, counts):
+        tiny = np.abs(values) < 1e-12
+        self.zero_count += int(counts[tiny].sum())
+        for store, mask, sign in ((self.positive, values >= 1e-12, 1), (self.negative, values <= -1e-12, -1)):
+            if mask.any():
+                keys = np.ceil(np.log(sign * values[mask]) / self.log_gamma).astype(np.int64)
+                for key, count in zip(keys.tolist(), counts[mask].tolist()):
+                    store[key] = store.get(key, 0) + count
+
+
+    def _bucket_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+
 class EnergyDataPreprocessor:
-    def __init__(self):
+    def __init__(self, imputation_strategy=None):
         self.scaler = StandardScaler()
-        self.numeric_imputer = KNNImputer(n_neighbors=5)
+        self.imputation_strategy = imputation_strategy or EnergyConfig.IMPUTATION_STRATEGY
+        self.numeric_imputer = make_imputer(self.imputation_strategy)
         self.categorical_imputer = SimpleImputer(strategy='most_frequent')
         self.label_encoders = {}
         self.feature_names = []
+        self.time_index = None
 
 
+    @METRICS.timed('preprocess.load')
     def load_data(self, file_path):
         print("Loading data...")
         try:
@@ -79,12 +797,13 @@ class EnergyDataPreprocessor:
             return None
 
 
+    @METRICS.timed('preprocess.clean')
     def clean_data(self):
         print("Cleaning data...")
         self.cleaned_data = self.raw_data.copy()
        
         # Fix column names
-        self.cleaned_data.columns = [col.strip().replace(' ', '_').replace('-', '_') for col in self.cleaned_data.columns]
+        self.cleaned_data.columns = self._clean_column_names(self.cleaned_data.columns)
        
         # Handle duplicates
         self.cleaned_data = self.cleaned_data.drop_duplicates()
@@ -92,47 +811,79 @@ class EnergyDataPreprocessor:
         # Handle outliers (clip to 1.5 IQR)
         self.numeric_cols = self.cleaned_data.select_dtypes(include=[np.number]).columns.tolist()
        
+        self.clip_bounds = {}
         for col in self.numeric_cols:
             Q1 = self.cleaned_data[col].quantile(0.25)
             Q3 = self.cleaned_data[col].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            self.cleaned_data[col] = np.clip(self.cleaned_data[col], lower_bound, upper_bound)
+            self.clip_bounds[col] = self._iqr_bounds(Q1, Q3)
+        self._clip_outliers(self.cleaned_data, self.clip_bounds)
            
         return self.cleaned_data
 
 
+    @staticmethod
+    def _clean_column_names(columns):
+        return [col.strip().replace(' ', '_').replace('-', '_') for col in columns]
+
+
+    @staticmethod
+    def _iqr_bounds(Q1, Q3):
+        IQR = Q3 - Q1
+        return Q1 - 1.5 * IQR, Q3 + 1.5 * IQR
+
+
+    @staticmethod
+    def _clip_outliers(data, bounds):
+        for col, (lower_bound, upper_bound) in bounds.items():
+            data[col] = np.clip(data[col], lower_bound, upper_bound)
+
+
+    @METRICS.timed('preprocess.features')
     def feature_engineering(self):
         print("Feature engineering...")
+        self.cleaned_data, self.time_index = self._engineer_features(self.cleaned_data)
+        return self.cleaned_data
+
+
+    @staticmethod
+    def _engineer_features(data, verbose=True):
+        # Returns the frame with time and polynomial features, plus the hourly time
+        # axis (Date + Hour) used by time-aware imputation, or None if unparseable
+        time_index = None
        
         # Create time-based features
-        timestamp_cols = [col for col in self.cleaned_data.columns if 'time' in col.lower() or 'date' in col.lower()]
+        timestamp_cols = [col for col in data.columns if 'time' in col.lower() or 'date' in col.lower()]
         if timestamp_cols:
             timestamp_col = timestamp_cols[0]
             try:
-                self.cleaned_data[timestamp_col] = pd.to_datetime(self.cleaned_data[timestamp_col])
+                data[timestamp_col] = pd.to_datetime(data[timestamp_col])
                
-                self.cleaned_data['hour'] = self.cleaned_data[timestamp_col].dt.hour
-                self.cleaned_data['day_of_week'] = self.cleaned_data[timestamp_col].dt.dayofweek
-                self.cleaned_data['month'] = self.cleaned_data[timestamp_col].dt.month
-                self.cleaned_data['is_weekend'] = (self.cleaned_data['day_of_week'] >= 5).astype(int)
+                time_index = data[timestamp_col]
+                if 'Hour' in data.columns:
+                    time_index = time_index + pd.to_timedelta(data['Hour'], unit='h')
                
-                self.cleaned_data = self.cleaned_data.drop(columns=[timestamp_col])
+                data['hour'] = data[timestamp_col].dt.hour
+                data['day_of_week'] = data[timestamp_col].dt.dayofweek
+                data['month'] = data[timestamp_col].dt.month
+                data['is_weekend'] = (data['day_of_week'] >= 5).astype(int)
+               
+                data = data.drop(columns=[timestamp_col])
             except Exception as e:
-                print(f"Could not parse timestamp: {e}")
-                self.cleaned_data = self.cleaned_data.drop(columns=[timestamp_col])
+                if verbose:
+                    print(f"Could not parse timestamp: {e}")
+                data = data.drop(columns=[timestamp_col])
        
         # Create polynomial features
-        if 'Temperature' in self.cleaned_data.columns:
-            self.cleaned_data['Temperature_squared'] = self.cleaned_data['Temperature'] ** 2
+        if 'Temperature' in data.columns:
+            data['Temperature_squared'] = data['Temperature'] ** 2
            
-        if 'Occupancy' in self.cleaned_data.columns:
-            self.cleaned_data['Occupancy_squared'] = self.cleaned_data['Occupancy'] ** 2
+        if 'Occupancy' in data.columns:
+            data['Occupancy_squared'] = data['Occupancy'] ** 2
            
-        return self.cleaned_data
+        return data, time_index
 
 
+    @METRICS.timed('preprocess.encode')
     def encode_categorical_variables(self, target_column='EnergyConsumption'):
         print("Encoding categorical variables...")
        
@@ -149,20 +900,167 @@ class EnergyDataPreprocessor:
         return self.cleaned_data
 
 
+    @METRICS.timed('preprocess.impute')
     def handle_missing_values(self):
         print("Handling missing values...")
        
         # Re-identify numeric columns after encoding
         self.numeric_cols = self.cleaned_data.select_dtypes(include=[np.number]).columns.tolist()
+        self.cleaned_data = self._impute(self.cleaned_data, self.numeric_cols, self.time_index)
+        return self.cleaned_data
+
+
+    def _impute(self, data, numeric_cols, time_index, verbose=True):
+        if not numeric_cols:
+            return data
+           
+        # Skip the stage entirely when nothing is missing
+        missing_cols = [col for col in numeric_cols if data[col].isna().any()]
+        if not missing_cols:
+            if verbose:
+                print(" - No missing values, skipping imputation")
+            return data
+           
+        if verbose:
+            print(f" - Imputing {len(missing_cols)} column(s) with '{self.imputation_strategy}'")
+        imputed = self.numeric_imputer.fit_transform(data[numeric_cols], time_index)
        
-        if self.numeric_cols:
-            self.cleaned_data[self.numeric_cols] = self.numeric_imputer.fit_transform(
-                self.cleaned_data[self.numeric_cols]
-            )
+        # Complete columns only take part in neighbour search; write back the gaps
+        data[missing_cols] = imputed[missing_cols]
            
+        return data
+
+
+    #-----------------------------------------------------------------------
+    # Dataset cache: load -> clean -> features -> encode -> impute, stored once
+    #-----------------------------------------------------------------------
+
+
+    def prepare_dataset(self, file_path, use_cache=None):
+        # Runs every stage before scaling, or restores their result (and the fitted
+        # encoders/bounds) from the cache. Returns cleaned_data, or None on load failure.
+        if use_cache is None:
+            use_cache = EnergyConfig.DATASET_CACHE
+           
+        cache_dir = None
+        if use_cache:
+            try:
+                key = compute_data_fingerprint(file_path, pipeline_config(imputation_strategy=self.imputation_strategy))
+            except OSError as e:
+                print(f"Error loading data: {e}")
+                return None
+            cache_dir = os.path.join(EnergyConfig.DATASET_CACHE_DIR, key[:24])
+            if self.load_dataset_cache(cache_dir):
+                return self.cleaned_data
+               
+        if self.load_data(file_path) is None:
+            return None
+        self.clean_data()
+        self.feature_engineering()
+        self.encode_categorical_variables() # Fix for text columns
+        self.handle_missing_values()
+       
+        if cache_dir is not None:
+            try:
+                self.save_dataset_cache(cache_dir)
+            except Exception as e:
+                print(f"Could not write dataset cache: {e}")
         return self.cleaned_data
 
 
+    @staticmethod
+    def _compact_column(values):
+        # Smallest dtype that round-trips exactly; integral floats are stored as ints
+        if values.dtype.kind == 'f' and len(values) and not np.isnan(values).any() \
+                and np.array_equal(values, np.round(values)) and np.abs(values).max() < 2 ** 31:
+            values = values.astype(np.int64)
+        if values.dtype.kind in 'iub':
+            for dtype in (np.int8, np.int16, np.int32):
+                info = np.iinfo(dtype)
+                if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+                    return values.astype(dtype)
+            return values
+        if values.dtype.kind == 'f':
+            compact = values.astype(np.float32)
+            if np.array_equal(compact.astype(values.dtype), values, equal_nan=True):
+                return compact
+        return values
+
+
+    @METRICS.timed('preprocess.cache_save')
+    def save_dataset_cache(self, cache_dir):
+        fmt = EnergyConfig.DATASET_CACHE_FORMAT
+        if fmt == 'auto':
+            fmt = 'parquet' if pyarrow is not None else 'npy'
+           
+        # Build in a scratch directory and rename, so readers never see a partial cache
+        tmp_dir = f"{cache_dir}.tmp{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+       
+        data = self.cleaned_data
+        dtypes = {col: str(data[col].dtype) for col in data.columns}
+        if fmt == 'parquet':
+            # Decoded into memory on load anyway, so columns are stored in their smallest dtype
+            compact = {col: self._compact_column(data[col].to_numpy()) for col in data.columns}
+            pd.DataFrame(compact).to_parquet(os.path.join(tmp_dir, "data.parquet"), index=False)
+        else:
+            # Stored in their final dtype, so the loaded frame can use the memory maps as they are
+            for i, col in enumerate(data.columns):
+                np.save(os.path.join(tmp_dir, f"col_{i}.npy"), data[col].to_numpy())
+        if self.time_index is not None:
+            np.save(os.path.join(tmp_dir, "time_index.npy"), self.time_index.to_numpy())
+           
+        joblib.dump({
+            'format': fmt,
+            'columns': list(data.columns),
+            'dtypes': dtypes,
+            'n_rows': len(data),
+            'numeric_cols': self.numeric_cols,
+            'clip_bounds': self.clip_bounds,
+            'label_encoders': self.label_encoders
+        }, os.path.join(tmp_dir, "meta.joblib"))
+       
+        if os.path.exists(cache_dir):
+            shutil.rmtree(cache_dir)
+        os.replace(tmp_dir, cache_dir)
+        print(f"Dataset cached to {cache_dir} ({fmt})")
+
+
+    @METRICS.timed('preprocess.cache_load')
+    def load_dataset_cache(self, cache_dir):
+        meta_path = os.path.join(cache_dir, "meta.joblib")
+        if not os.path.exists(meta_path):
+            return False
+        try:
+            meta = joblib.load(meta_path)
+            if meta['format'] == 'parquet':
+                stored = pd.read_parquet(os.path.join(cache_dir, "data.parquet"), memory_map=True)
+                columns = {col: stored[col].to_numpy() for col in meta['columns']}
+            else:
+                columns = {
+                    col: np.load(os.path.join(cache_dir, f"col_{i}.npy"), mmap_mode='r')
+                    for i, col in enumerate(meta['columns'])
+                }
+            # Restore the original dtypes so downstream stages see exactly what they would
+            # have; npy columns already have them and stay memory-mapped, not copied
+            self.cleaned_data = pd.DataFrame({
+                col: values.astype(meta['dtypes'][col], copy=False) for col, values in columns.items()
+            }, copy=False)
+           
+            time_index_path = os.path.join(cache_dir, "time_index.npy")
+            self.time_index = pd.Series(np.load(time_index_path)) if os.path.exists(time_index_path) else None
+        except Exception as e:
+            print(f"Ignoring unreadable dataset cache {cache_dir}: {e}")
+            return False
+           
+        self.numeric_cols = meta['numeric_cols']
+        self.clip_bounds = meta['clip_bounds']
+        self.label_encoders = meta['label_encoders']
+        print(f"Loaded cached dataset from {cache_dir}: {meta['n_rows']} rows, {len(meta['columns'])} columns")
+        return True
+
+
+    @METRICS.timed('preprocess.scale')
     def scale_features(self, target_column='EnergyConsumption'):
         print("Scaling features...")
        
@@ -182,14 +1080,9 @@ class EnergyDataPreprocessor:
 
     def get_preprocessed_data(self, target_column='EnergyConsumption'):
         # Auto-detect target if not found
-        if target_column not in self.cleaned_data.columns:
-            possible = [c for c in self.cleaned_data.columns if 'energy' in c.lower() or 'consum' in c.lower()]
-            if possible:
-                target_column = possible[0]
-                print(f"Target detected: {target_column}")
-            else:
-                print("No target column found!")
-                return None, None
+        target_column = self._detect_target(self.cleaned_data.columns, target_column)
+        if target_column is None:
+            return None, None
                
         X = self.cleaned_data[self.feature_names]
         y = self.cleaned_data[target_column]
@@ -197,69 +1090,428 @@ class EnergyDataPreprocessor:
         return X, y
 
 
+    @staticmethod
+    def _detect_target(columns, target_column):
+        if target_column in columns:
+            return target_column
+        possible = [c for c in columns if 'energy' in c.lower() or 'consum' in c.lower()]
+        if possible:
+            print(f"Target detected: {possible[0]}")
+            return possible[0]
+        print("No target column found!")
+        return None
+
+
+    #-----------------------------------------------------------------------
+    # Chunked mode: the same stages, streamed over the CSV
+    #-----------------------------------------------------------------------
+
+
+    def preprocess_in_chunks(self, file_path, chunk_size=None, output_dir=None,
+                             target_column='EnergyConsumption', dtype=np.float64):
+        # Pass 1 streams the CSV once for row counts, IQR sketches and category
+        # vocabularies. Pass 2 cleans/engineers/encodes/imputes each chunk, feeds the
+        # scaler's running moments and writes rows to .npy memmaps; the scaler is then
+        # applied in place, chunk by chunk. Peak memory is a few chunks, not the file.
+        # Duplicates are only dropped within a chunk.
+        chunk_size = chunk_size or EnergyConfig.CHUNK_SIZE or 100_000
+        output_dir = output_dir or EnergyConfig.CHUNK_OUTPUT_DIR
+        os.makedirs(output_dir, exist_ok=True)
+       
+        print(f"Chunked preprocessing of {file_path} ({chunk_size} rows per chunk)...")
+        sketches, categories, n_rows, numeric_cols = {}, {}, 0, None
+        with METRICS.stage('preprocess.chunked.scan'):
+            for chunk in pd.read_csv(file_path, chunksize=chunk_size):
+                chunk.columns = self._clean_column_names(chunk.columns)
+                chunk = chunk.drop_duplicates()
+                n_rows += len(chunk)
+                if numeric_cols is None:
+                    numeric_cols = chunk.select_dtypes(include=[np.number]).columns.tolist()
+                    # The timestamp column is turned into features before encoding, never encoded
+                    timestamp_cols = [col for col in chunk.columns if 'time' in col.lower() or 'date' in col.lower()]
+                    timestamp_col = timestamp_cols[0] if timestamp_cols else None
+                for col in numeric_cols:
+                    sketches.setdefault(col, QuantileSketch()).update(chunk[col].to_numpy(dtype=float))
+                for col in chunk.select_dtypes(include=['object']).columns:
+                    if col != timestamp_col:
+                        categories.setdefault(col, set()).update(chunk[col].astype(str).unique())
+               
+        if n_rows == 0:
+            print("No rows to preprocess")
+            return None, None
+           
+        self.numeric_cols = numeric_cols
+        self.clip_bounds = {
+            col: self._iqr_bounds(sketch.quantile(0.25), sketch.quantile(0.75))
+            for col, sketch in sketches.items()
+        }
+        print(f" - Pass 1: {n_rows} rows, IQR bounds for {len(self.clip_bounds)} numeric columns")
+       
+        # Fitting on the full vocabulary gives the same codes as the in-memory encoder
+        self.label_encoders = {}
+        for col, values in categories.items():
+            if col != target_column:
+                self.label_encoders[col] = LabelEncoder().fit(sorted(values))
+               
+        self.scaler = StandardScaler()
+        X_out, y_out, row = None, None, 0
+        times = np.full(n_rows, np.datetime64('NaT'), dtype='datetime64[ns]')
+        with METRICS.stage('preprocess.chunked.transform'):
+            for chunk in pd.read_csv(file_path, chunksize=chunk_size):
+                chunk, time_index = self._transform_chunk(chunk)
+                if time_index is not None:
+                    times[row:row + len(chunk)] = time_index.to_numpy(dtype='datetime64[ns]')
+           
+                if X_out is None:
+                    target_column = self._detect_target(chunk.columns, target_column)
+                    if target_column is None:
+                        return None, None
+                    self.feature_names = [col for col in chunk.columns if col != target_column]
+                    X_out = np.lib.format.open_memmap(
+                        os.path.join(output_dir, "X.npy"), mode='w+', dtype=dtype, shape=(n_rows, len(self.feature_names))
+                    )
+                    y_out = np.lib.format.open_memmap(
+                        os.path.join(output_dir, "y.npy"), mode='w+', dtype=dtype, shape=(n_rows,)
+                    )
+               
+                features = chunk[self.feature_names]
+                self.scaler.partial_fit(features)
+                X_out[row:row + len(chunk)] = features.to_numpy(dtype=dtype)
+                y_out[row:row + len(chunk)] = chunk[target_column].to_numpy(dtype=dtype)
+                row += len(chunk)
+        print(f" - Pass 2: wrote {row} x {len(self.feature_names)} features to {output_dir}")
+           
+        with METRICS.stage('preprocess.scale'):
+            for start in range(0, n_rows, chunk_size):
+                block = pd.DataFrame(X_out[start:start + chunk_size], columns=self.feature_names)
+                X_out[start:start + chunk_size] = self.scaler.transform(block)
+            X_out.flush()
+            y_out.flush()
+        self.time_index = pd.Series(times)
+        print(f"Scaled {len(self.feature_names)} numeric features")
+       
+        return X_out, y_out
+
+
+    def _transform_chunk(self, chunk):
+        # Stage metrics add up over the chunks, under the in-memory stage names
+        with METRICS.stage('preprocess.clean'):
+            chunk.columns = self._clean_column_names(chunk.columns)
+            chunk = chunk.drop_duplicates()
+            self._clip_outliers(chunk, self.clip_bounds)
+        with METRICS.stage('preprocess.features'):
+            chunk, time_index = self._engineer_features(chunk, verbose=False)
+       
+        with METRICS.stage('preprocess.encode'):
+            for col, encoder in self.label_encoders.items():
+                if col in chunk.columns:
+                    chunk[col] = encoder.transform(chunk[col].astype(str))
+               
+        with METRICS.stage('preprocess.impute'):
+            numeric_cols = chunk.select_dtypes(include=[np.number]).columns.tolist()
+            chunk = self._impute(chunk, numeric_cols, time_index, verbose=False)
+        return chunk.select_dtypes(exclude=['datetime64']), time_index
+
+
 #===========================================================================
 # 3. ML MODELS COMPARISON (FIXED LOGIC)
 #===========================================================================
 
 
+# Worker processes are spawned, not forked: training also runs from the retrain
+# thread while the server threads hold locks, and a forked child inherits those
+# locks held with no thread left to release them
+_WORKER_CONTEXT = multiprocessing.get_context('spawn')
+
+
+def _single_threaded(model):
+    # Unfitted copy of model for a worker process; parallelism comes from the
+    # workers, so n_jobs=-1 in each would oversubscribe the cores
+    model = clone(model)
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+    return model
+
+
+def _fit_and_score(model, X_train, X_test, y_train, y_test):
+    # Timed here rather than through METRICS, since this may run in a worker process
+    track_memory = EnergyConfig.PROFILE_STAGES and EnergyConfig.PROFILE_MEMORY
+    with StageTimer(track_memory) as fit_timer:
+        model.fit(X_train, y_train)
+       
+    with StageTimer(track_memory) as predict_timer:
+        y_pred = model.predict(X_test)
+   
+    return {
+        'model': model,
+        'r2': r2_score(y_test, y_pred),
+        'rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
+        'y_pred': y_pred,
+        'fit_time': fit_timer.wall,
+        'predict_time': predict_timer.wall,
+        'timers': {'fit': fit_timer, 'predict': predict_timer}
+    }
+
+
+def _model_worker(conn, model, X_train, X_test, y_train, y_test):
+    # Runs in a child process; reports back through the pipe
+    try:
+        conn.send(('ok', _fit_and_score(model, X_train, X_test, y_train, y_test)))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+
+class NystroemSVR(RegressorMixin, BaseEstimator):
+    # RBF-kernel SVR for large training sets: the kernel is approximated by a
+    # Nystroem map onto n_components sampled landmark rows and a linear
+    # epsilon-insensitive SVR is fitted on the mapped features, so fit and predict
+    # grow linearly with the rows. C, gamma and epsilon mean what they do for SVR
+    def __init__(self, n_components=500, gamma='scale', C=1.0, epsilon=0.1, max_iter=5000, random_state=None):
+        self.n_components = n_components
+        self.gamma = gamma
+        self.C = C
+        self.epsilon = epsilon
+        self.max_iter = max_iter
+        self.random_state = random_state
+       
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        gamma = self.gamma
+        if gamma == 'scale':
+            # Same rule as SVR(gamma='scale')
+            variance = X.var()
+            gamma = 1.0 / (X.shape[1] * variance) if variance > 0 else 1.0
+       
+        feature_map = Nystroem(kernel='rbf', gamma=gamma, n_components=min(self.n_components, len(X)),
+                               random_state=self.random_state)
+        linear = LinearSVR(C=self.C, epsilon=self.epsilon, max_iter=self.max_iter, dual=True,
+                           random_state=self.random_state)
+        linear.fit(feature_map.fit_transform(X), y)
+       
+        # Fold the map's normalization into the weights: prediction is one kernel
+        # block against the landmarks and a dot product
+        self.gamma_ = gamma
+        self.components_ = feature_map.components_
+        self.weights_ = feature_map.normalization_.T @ linear.coef_
+        self.intercept_ = float(linear.intercept_[0])
+        self.n_features_in_ = X.shape[1]
+        return self
+       
+    def predict(self, X, block_rows=4096):
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty(len(X))
+        # Blocks keep the rows x landmarks kernel matrix small
+        for start in range(0, len(X), block_rows):
+            block = X[start:start + block_rows]
+            out[start:start + block_rows] = rbf_kernel(block, self.components_, gamma=self.gamma_) @ self.weights_
+        return out + self.intercept_
+
+
+# Estimator and default configuration of each candidate family
+MODEL_FAMILIES = {
+    'Random Forest': (RandomForestRegressor, {'n_estimators': 100, 'random_state': 42, 'n_jobs': -1}),
+    'Gradient Boosting': (GradientBoostingRegressor, {'n_estimators': 100, 'random_state': 42}),
+    'SVR': (SVR, {'kernel': 'rbf', 'C': 1.0}),
+    'Decision Tree': (DecisionTreeRegressor, {'random_state': 42})
+}
+
+# Stand-ins for families whose exact estimator does not scale past
+# EnergyConfig.SVR_APPROXIMATION_ROWS training rows; they take the same tuned params
+APPROXIMATE_FAMILIES = {
+    'SVR': (NystroemSVR, {'n_components': EnergyConfig.SVR_APPROXIMATION_COMPONENTS, 'C': 1.0, 'random_state': 42})
+}
+
+
+def build_model(name, params=None, n_rows=None):
+    # n_rows: training rows the model will see; large sets get the approximate stand-in
+    estimator, defaults = MODEL_FAMILIES[name]
+    if uses_approximation(name, n_rows):
+        estimator, defaults = APPROXIMATE_FAMILIES[name]
+    return estimator(**{**defaults, **(params or {})})
+
+
+def uses_approximation(name, n_rows):
+    return name in APPROXIMATE_FAMILIES and n_rows is not None and n_rows > EnergyConfig.SVR_APPROXIMATION_ROWS
+
+
 class MLModelComparator:
     def __init__(self):
         self.models = {}
         self.results = {}
+        # Per-model outcome of the last run: 'ok', 'timed out' or 'error: ...'
+        self.status = {}
         self.best_model = None
         # FIX 1: Initialize with Negative Infinity because we want to MAXIMIZE R2 Score
         self.best_score = -np.inf 
+        # Walk-forward scores per model ({name: {'r2', 'r2_std', 'rmse', 'folds'}})
+        self.cv_scores = {}
 
 
-    def initialize_models(self):
+    def initialize_models(self, tuned_params=None, n_rows=None):
+        # tuned_params: {family: params} from HyperparameterTuner, overriding the defaults
+        # n_rows: training set size, picks the approximate stand-ins on large data
         print("Initializing ML models...")
-        self.models = {
-            'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1),
-            'Gradient Boosting': GradientBoostingRegressor(n_estimators=100, random_state=42),
-            'SVR': SVR(kernel='rbf', C=1.0),
-            'Decision Tree': DecisionTreeRegressor(random_state=42)
-        }
+        tuned_params = tuned_params or {}
+        self.tuned_params = tuned_params
+        self.models = {name: build_model(name, tuned_params.get(name), n_rows) for name in MODEL_FAMILIES}
+        for name in tuned_params:
+            print(f" - {name}: tuned {tuned_params[name]}")
+        self._report_approximations(n_rows)
         print(f"Initialized {len(self.models)} models")
         return self.models
 
 
-    def train_and_compare_models(self, X_train, X_test, y_train, y_test):
+    def size_models(self, n_rows):
+        # Swaps exact models for their approximate stand-ins (or back) to suit n_rows
+        # training rows, keeping the tuned params
+        tuned_params = getattr(self, 'tuned_params', {})
+        for name in APPROXIMATE_FAMILIES:
+            if name not in self.models:
+                continue
+            estimator = APPROXIMATE_FAMILIES[name][0] if uses_approximation(name, n_rows) else MODEL_FAMILIES[name][0]
+            if not isinstance(self.models[name], estimator):
+                self.models[name] = build_model(name, tuned_params.get(name), n_rows)
+                print(f" - {name}: switched to {estimator.__name__} for {n_rows} training rows")
+
+
+    def _report_approximations(self, n_rows):
+        for name in APPROXIMATE_FAMILIES:
+            if uses_approximation(name, n_rows) and name in self.models:
+                print(f" - {name}: {type(self.models[name]).__name__} approximation "
+                      f"({n_rows} rows > {EnergyConfig.SVR_APPROXIMATION_ROWS})")
+
+
+    def train_and_compare_models(self, X_train, X_test, y_train, y_test, parallel=None, time_budget=None):
         print("\nTraining and comparing models...")
         self.results = {}
+        self.status = {}
         # Reset best score for new training run
         self.best_score = -np.inf 
+        self.size_models(len(X_train))
         
-        for name, model in self.models.items():
-            print(f"Training {name}...")
-            try:
-                model.fit(X_train, y_train)
-                y_pred = model.predict(X_test)
-                
-                r2 = r2_score(y_test, y_pred)
-                rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-                
-                self.results[name] = {
-                    'model': model,
-                    'r2': r2,
-                    'rmse': rmse,
-                    'y_pred': y_pred
-                }
-                
+        if parallel is None:
+            parallel = EnergyConfig.PARALLEL_TRAINING
+        if time_budget is None:
+            time_budget = EnergyConfig.MODEL_TIME_BUDGET
+           
+        data = (X_train, X_test, y_train, y_test)
+        if parallel or time_budget:
+            # A budget can only be enforced out of process, so it implies worker processes
+            max_workers = (EnergyConfig.TRAINING_WORKERS or os.cpu_count() or 1) if parallel else 1
+            outcomes = self._train_in_workers(data, max_workers, time_budget)
+        else:
+            outcomes = self._train_in_process(data)
+            
+        # Collect in model order so ties resolve the same way regardless of mode
+        for name in self.models:
+            kind, payload = outcomes[name]
+            if kind == 'ok':
+                self.results[name] = payload
+                self.status[name] = 'ok'
+                for step, timer in payload.get('timers', {}).items():
+                    METRICS.record(f'model.{name}.{step}', timer.wall, timer.cpu, timer.peak_memory)
+               
                 # FIX 2: Logic changed to Maximize R2 Score instead of minimizing RMSE
                 # This prioritizes model accuracy/fit over raw error minimization
-                if r2 > self.best_score:
-                    self.best_score = r2
+                if payload['r2'] > self.best_score:
+                    self.best_score = payload['r2']
                     self.best_model = name
-                    
-                print(f"   -> R2: {r2:.4f} | RMSE: {rmse:.4f}")
-                
-            except Exception as e:
-                print(f"   Error in {name}: {e}")
+            else:
                 self.results[name] = None
+                self.status[name] = 'timed out' if kind == 'timeout' else f'error: {payload}'
         
         return self.results
 
 
+    def _train_in_process(self, data):
+        outcomes = {}
+        for name, model in self.models.items():
+            print(f"Training {name}...")
+            try:
+                result = _fit_and_score(model, *data)
+                outcomes[name] = ('ok', result)
+                print(f"   -> R2: {result['r2']:.4f} | RMSE: {result['rmse']:.4f} | fit {result['fit_time']:.2f}s")
+            except Exception as e:
+                print(f"   Error in {name}: {e}")
+                outcomes[name] = ('error', str(e))
+        return outcomes
+
+
+    def _train_in_workers(self, data, max_workers, time_budget):
+        budget_note = f", {time_budget}s budget per model" if time_budget else ""
+        print(f"Training {len(self.models)} models in {min(max_workers, len(self.models))} worker process(es){budget_note}...")
+       
+        pending = list(self.models.items())
+        running = {}  # name -> (process, connection, deadline)
+        outcomes = {}
+        try:
+            while pending or running:
+                while pending and len(running) < max_workers:
+                    name, model = pending.pop(0)
+                    if max_workers > 1:
+                        model = _single_threaded(model)
+                    receiver, sender = _WORKER_CONTEXT.Pipe(duplex=False)
+                    process = _WORKER_CONTEXT.Process(
+                        target=_model_worker, args=(sender, model) + data, name=f"train-{name}", daemon=True
+                    )
+                    process.start()
+                    sender.close()
+                    deadline = time.monotonic() + time_budget if time_budget else None
+                    running[name] = (process, receiver, deadline)
+                   
+                ready = multiprocessing.connection.wait([conn for _, conn, _ in running.values()], timeout=0.1)
+                for name, (process, receiver, deadline) in list(running.items()):
+                    if receiver in ready:
+                        try:
+                            outcomes[name] = receiver.recv()
+                            if outcomes[name][0] == 'ok' and 'n_jobs' in self.models[name].get_params():
+                                # Serve with the configured n_jobs, not the worker's
+                                outcomes[name][1]['model'].set_params(n_jobs=self.models[name].n_jobs)
+                        except EOFError:
+                            outcomes[name] = ('error', f"worker exited with code {process.exitcode}")
+                    elif deadline is not None and time.monotonic() > deadline:
+                        process.terminate()
+                        outcomes[name] = ('timeout', None)
+                    else:
+                        continue
+                       
+                    process.join()
+                    receiver.close()
+                    del running[name]
+                    self._report_outcome(name, outcomes[name])
+        finally:
+            # Don't leave workers behind if we are interrupted
+            for process, receiver, _ in running.values():
+                process.terminate()
+                process.join()
+                receiver.close()
+               
+        return outcomes
+
+
+    def _report_outcome(self, name, outcome):
+        kind, payload = outcome
+        if kind == 'ok':
+            print(f"   {name} -> R2: {payload['r2']:.4f} | RMSE: {payload['rmse']:.4f} | fit {payload['fit_time']:.2f}s")
+        elif kind == 'timeout':
+            print(f"   {name} -> timed out, cancelled")
+        else:
+            print(f"   Error in {name}: {payload}")
+
+
+    def select_best_by_validation(self, cv_scores):
+        # Pick the winner on walk-forward R2 instead of the single holdout split
+        self.cv_scores = cv_scores
+        candidates = [name for name, result in self.results.items() if result is not None and name in cv_scores]
+        if candidates:
+            self.best_model = max(candidates, key=lambda name: cv_scores[name]['r2'])
+            self.best_score = self.results[self.best_model]['r2']
+        return self.best_model
+
+
     def display_comparison_results(self):
         print("\n" + "-"*50)
         print("MODEL COMPARISON RESULTS")
@@ -270,86 +1522,1259 @@ class MLModelComparator:
             if result:
                 comparison_data.append({
                     'Model': name,
+                    'CV_R2': self.cv_scores.get(name, {}).get('r2'),
                     'R2_Score': result['r2'],
-                    'RMSE': result['rmse']
+                    'RMSE': result['rmse'],
+                    'Fit_Time_s': result.get('fit_time'),
+                    'Predict_Time_s': result.get('predict_time')
                 })
         
         # Sort by R2 Score Descending (Best on top)
-        df = pd.DataFrame(comparison_data).sort_values('R2_Score', ascending=False)
+        df = pd.DataFrame(comparison_data, columns=['Model', 'CV_R2', 'R2_Score', 'RMSE', 'Fit_Time_s', 'Predict_Time_s'])
+        if self.cv_scores:
+            df = df.sort_values('CV_R2', ascending=False)
+        else:
+            df = df.drop(columns=['CV_R2']).sort_values('R2_Score', ascending=False)
         print(df.to_string(index=False))
+       
+        for name, status in self.status.items():
+            if status != 'ok':
+                print(f"{name}: {status}")
         
-        print(f"\nWINNER: {self.best_model} (Highest R2 Score)")
+        if self.cv_scores:
+            print(f"\nWINNER: {self.best_model} (Highest walk-forward R2)")
+        else:
+            print(f"\nWINNER: {self.best_model} (Highest R2 Score)")
         return df
 
 
 
 
+#===========================================================================
+# 3a. HYPERPARAMETER SEARCH (SUCCESSIVE HALVING)
+#===========================================================================
+
+
+# Memory-mapped tuning data, opened once per worker process
+_TUNING_DATA = {}
+
+
+def _open_tuning_data(data_dir):
+    for name in ('X_fit', 'y_fit', 'X_val', 'y_val'):
+        _TUNING_DATA[name] = np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode='r')
+
+
+def _evaluate_candidate(family, params, n_rows):
+    # Fits on the last n_rows of the fit set (the hours just before the validation
+    # hours when the data has a time axis), scores on the validation set
+    X_fit, y_fit = _TUNING_DATA['X_fit'], _TUNING_DATA['y_fit']
+    model = build_model(family, params, n_rows)
+    if 'n_jobs' in model.get_params():
+        # Parallelism comes from the worker pool
+        model.set_params(n_jobs=1)
+       
+    start = time.perf_counter()
+    model.fit(X_fit[-n_rows:], y_fit[-n_rows:])
+    y_pred = model.predict(_TUNING_DATA['X_val'])
+    return {
+        'r2': float(r2_score(_TUNING_DATA['y_val'], y_pred)),
+        'seconds': time.perf_counter() - start
+    }
+
+
+class HyperparameterTuner:
+    # Successive halving over EnergyConfig.TUNING_SPACES. Each family samples
+    # n_candidates configurations, scores them on a small share of the training
+    # rows and promotes the best 1/factor to a rung with factor x more rows, until
+    # the survivors are scored on all rows. Workers share one memory-mapped copy of
+    # the data, and every evaluation is appended to a results log so an
+    # interrupted search resumes where it stopped. With a time index the validation
+    # set is the latest hours (chronological_split), like the final test split.
+    def __init__(self, n_candidates=None, factor=None, max_workers=None, cache_dir=None,
+                 validation_size=0.2, random_state=42):
+        self.n_candidates = n_candidates or EnergyConfig.TUNING_CANDIDATES
+        self.factor = factor or EnergyConfig.TUNING_HALVING_FACTOR
+        self.max_workers = max_workers or EnergyConfig.TRAINING_WORKERS or os.cpu_count() or 1
+        self.cache_dir = cache_dir or EnergyConfig.TUNING_CACHE_DIR
+        self.validation_size = validation_size
+        self.random_state = random_state
+        self.best_params = {}
+        self.best_scores = {}
+        self.history = []
+
+
+    def sample_candidates(self, family):
+        # Deterministic for a given random_state, so a resumed search asks for the same configs
+        space = EnergyConfig.TUNING_SPACES[family]
+        rng = random.Random(f"{self.random_state}-{family}")
+        candidates, seen = [], set()
+        grid_size = int(np.prod([len(values) for values in space.values()]))
+        while len(candidates) < min(self.n_candidates, grid_size):
+            params = {name: rng.choice(values) for name, values in space.items()}
+            key = json.dumps(params, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(params)
+        return candidates
+
+
+    def rung_sizes(self, n_rows, n_candidates):
+        n_rungs = max(1, int(np.ceil(np.log(max(n_candidates, 1)) / np.log(self.factor))) + 1)
+        return [max(100, int(n_rows / self.factor ** (n_rungs - 1 - i))) for i in range(n_rungs)]
+
+
+    def tune(self, X_train, y_train, families=None, time_index=None):
+        families = families or list(EnergyConfig.TUNING_SPACES)
+        data_dir = self._prepare_data(X_train, y_train, time_index)
+        n_rows = len(np.load(os.path.join(data_dir, "y_fit.npy"), mmap_mode='r'))
+        log_path = os.path.join(data_dir, "results.jsonl")
+        done = self._load_log(log_path)
+        print(f"\nTuning {len(families)} model families on {n_rows} rows "
+              f"({len(done)} cached evaluations, {self.max_workers} worker(s))...")
+       
+        executor = None
+        if self.max_workers > 1:
+            executor = ProcessPoolExecutor(self.max_workers, mp_context=_WORKER_CONTEXT,
+                                           initializer=_open_tuning_data, initargs=(data_dir,))
+        else:
+            _open_tuning_data(data_dir)
+           
+        try:
+            with open(log_path, 'a') as log:
+                for family in families:
+                    self._halve(family, n_rows, done, log, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+               
+        return self.best_params
+
+
+    def _halve(self, family, n_rows, done, log, executor):
+        alive = self.sample_candidates(family)
+        for rung, rows in enumerate(self.rung_sizes(n_rows, len(alive))):
+            rows = min(rows, n_rows)
+            keys = [json.dumps({'family': family, 'params': params, 'rows': rows}, sort_keys=True) for params in alive]
+            todo = [(key, params) for key, params in zip(keys, alive) if key not in done]
+           
+            if executor is not None:
+                futures = {key: executor.submit(_evaluate_candidate, family, params, rows) for key, params in todo}
+                outcomes = ((key, self._outcome(future.result)) for key, future in futures.items())
+            else:
+                outcomes = ((key, self._outcome(_evaluate_candidate, family, params, rows)) for key, params in todo)
+            for key, outcome in outcomes:
+                done[key] = outcome
+                log.write(json.dumps({'key': key, **outcome}) + "\n")
+                log.flush()
+               
+            scores = [done[key]['r2'] for key in keys]
+            self.history.extend(
+                {'family': family, 'rung': rung, 'rows': rows, 'params': params, 'r2': score}
+                for params, score in zip(alive, scores)
+            )
+            order = np.argsort(scores)[::-1]
+            print(f" - {family} rung {rung}: {len(alive)} candidate(s) on {rows} rows, best R2 {scores[order[0]]:.4f}")
+           
+            if rows >= n_rows or len(alive) == 1:
+                break
+            alive = [alive[i] for i in order[:max(1, len(alive) // self.factor)]]
+           
+        if not np.isfinite(scores[order[0]]):
+            print(f" - {family}: every candidate failed, keeping the default parameters")
+            return
+        self.best_params[family] = alive[order[0]]
+        self.best_scores[family] = scores[order[0]]
+
+
+    @staticmethod
+    def _outcome(evaluate, *args):
+        # A candidate that fails to fit scores -inf instead of aborting the search;
+        # it is logged like any other outcome, so a resumed search does not retry it
+        try:
+            return evaluate(*args)
+        except Exception as e:
+            print(f"   candidate failed: {type(e).__name__}: {e}")
+            return {'r2': float('-inf'), 'seconds': 0.0, 'error': f"{type(e).__name__}: {e}"}
+
+
+    def _prepare_data(self, X_train, y_train, time_index=None):
+        # One copy of the fit/validation split on disk, keyed by its content: the
+        # latest hours validate when there is a time index, else a shuffled split
+        X = np.ascontiguousarray(X_train, dtype=np.float64)
+        y = np.ascontiguousarray(y_train, dtype=np.float64)
+        digest = hashlib.sha256(X.tobytes())
+        digest.update(y.tobytes())
+        digest.update(repr((self.validation_size, self.random_state)).encode())
+        if time_index is not None:
+            digest.update(pd.Series(time_index).to_numpy(dtype='datetime64[ns]').tobytes())
+        data_dir = os.path.join(self.cache_dir, digest.hexdigest()[:24])
+       
+        if not os.path.exists(os.path.join(data_dir, "y_val.npy")):
+            os.makedirs(data_dir, exist_ok=True)
+            if time_index is not None:
+                fit_idx, val_idx = chronological_split(time_index, test_size=self.validation_size)
+                X_fit, X_val, y_fit, y_val = X[fit_idx], X[val_idx], y[fit_idx], y[val_idx]
+            else:
+                X_fit, X_val, y_fit, y_val = train_test_split(
+                    X, y, test_size=self.validation_size, random_state=self.random_state
+                )
+            # y_val is written last and marks the set as complete
+            for name, array in (('X_fit', X_fit), ('y_fit', y_fit), ('X_val', X_val), ('y_val', y_val)):
+                np.save(os.path.join(data_dir, f"{name}.npy"), array)
+        return data_dir
+
+
+    @staticmethod
+    def _load_log(log_path):
+        done = {}
+        if os.path.exists(log_path):
+            with open(log_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # partially written line from an interrupted run
+                    done[entry.pop('key')] = entry
+        return done
+
+
+#===========================================================================
+# 3b. COMPACT SERVING MODELS
+#===========================================================================
+
+
+class CompactTreeEnsemble:
+    # Flat-array form of a fitted DecisionTree / RandomForest / GradientBoosting
+    # regressor: all trees' nodes concatenated, int16 features, float32 thresholds and
+    # leaf values, leaves pointing at themselves so prediction is a fixed number of
+    # vectorized steps. Arrays are plain NumPy, so joblib can memory-map them.
+    def __init__(self, feature, threshold, left, right, value, roots, depth, combine,
+                 init=0.0, learning_rate=1.0, source=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.combine = combine
+        self.init = init
+        self.learning_rate = learning_rate
+        self.source = source
+
+
+    @classmethod
+    def from_sklearn(cls, model, max_depth=None, value_dtype=np.float32):
+        if isinstance(model, DecisionTreeRegressor):
+            trees, combine, init, learning_rate = [model.tree_], 'mean', 0.0, 1.0
+        elif isinstance(model, RandomForestRegressor):
+            trees, combine, init, learning_rate = [e.tree_ for e in model.estimators_], 'mean', 0.0, 1.0
+        elif isinstance(model, GradientBoostingRegressor) and \
+                (model.init_ == 'zero' or isinstance(model.init_, DummyRegressor)):
+            trees, combine = [e.tree_ for e in model.estimators_.ravel()], 'sum'
+            init = 0.0 if model.init_ == 'zero' else float(model.init_.constant_.ravel()[0])
+            learning_rate = model.learning_rate
+        else:
+            raise ValueError(f"Cannot export {type(model).__name__} as a compact tree ensemble")
+        if trees[0].n_outputs != 1:
+            raise ValueError("Only single-output trees can be exported")
+           
+        parts, roots, offset, depth = [], [], 0, 0
+        for tree in trees:
+            part = cls._flatten_tree(tree, max_depth)
+            for key in ('left', 'right'):
+                part[key] += offset
+            roots.append(offset)
+            offset += len(part['feature'])
+            depth = max(depth, part['depth'])
+            parts.append(part)
+           
+        threshold = np.concatenate([p['threshold'] for p in parts])
+        # Round thresholds down to float32 so (float32 x <= t) decides exactly as before
+        threshold32 = threshold.astype(np.float32)
+        too_high = threshold32.astype(np.float64) > threshold
+        threshold32[too_high] = np.nextafter(threshold32[too_high], np.float32(-np.inf))
+       
+        feature_dtype = np.int16 if trees[0].n_features < 2 ** 15 else np.int32
+        return cls(
+            feature=np.concatenate([p['feature'] for p in parts]).astype(feature_dtype),
+            threshold=threshold32,
+            left=np.concatenate([p['left'] for p in parts]).astype(np.int32),
+            right=np.concatenate([p['right'] for p in parts]).astype(np.int32),
+            value=np.concatenate([p['value'] for p in parts]).astype(value_dtype),
+            roots=np.array(roots, dtype=np.int32),
+            depth=depth,
+            combine=combine,
+            init=init,
+            learning_rate=learning_rate,
+            source=type(model).__name__
+        )
+
+
+    @staticmethod
+    def _flatten_tree(tree, max_depth):
+        # Nodes deeper than max_depth are dropped and their parents become leaves,
+        # predicting the mean already stored on every internal node
+        left, right = tree.children_left, tree.children_right
+        n_nodes = tree.node_count
+        node_depth = np.zeros(n_nodes, dtype=np.int64)
+        frontier = np.array([0])
+        level = 0
+        while len(frontier):
+            node_depth[frontier] = level
+            internal = frontier[left[frontier] >= 0]
+            frontier = np.concatenate([left[internal], right[internal]])
+            level += 1
+           
+        cap = node_depth.max() if max_depth is None else min(max_depth, node_depth.max())
+        keep = node_depth <= cap
+        leaf = (left < 0) | (node_depth == cap)
+        new_index = np.cumsum(keep) - 1
+        ids = new_index[keep]
+        kept_leaf = leaf[keep]
+       
+        return {
+            'feature': np.where(kept_leaf, 0, tree.feature[keep]),
+            'threshold': np.where(kept_leaf, np.inf, tree.threshold[keep]),
+            'left': np.where(kept_leaf, ids, new_index[np.maximum(left[keep], 0)]),
+            'right': np.where(kept_leaf, ids, new_index[np.maximum(right[keep], 0)]),
+            'value': tree.value[keep][:, 0, 0],
+            'depth': int(cap)
+        }
+
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+
+    def predict(self, X, block_rows=4096):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        out = np.empty(len(X))
+        for start in range(0, len(X), block_rows):
+            out[start:start + block_rows] = self._predict_block(X[start:start + block_rows])
+        return out
+
+
+    def _predict_block(self, X):
+        rows = np.arange(len(X))
+        node = np.repeat(self.roots[:, None], len(X), axis=1)
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        leaves = self.value[node].astype(np.float64)
+        if self.combine == 'mean':
+            return leaves.mean(axis=0)
+        return self.init + self.learning_rate * leaves.sum(axis=0)
+
+
+def export_serving_model(model, X_val, y_val, path=None, mode=None, max_r2_drop=None):
+    # Writes the serving artifact and returns a report dict (path, mode, sizes, R2s)
+    path = path or EnergyConfig.SERVING_ARTIFACT
+    mode = mode or EnergyConfig.SERVING_ARTIFACT_MODE
+    max_r2_drop = EnergyConfig.EXPORT_MAX_R2_DROP if max_r2_drop is None else max_r2_drop
+   
+    X_val = np.asarray(X_val, dtype=np.float64)
+    r2_full = r2_score(y_val, model.predict(X_val))
+    report = {'path': path, 'mode': mode, 'format': 'sklearn', 'r2_full': r2_full, 'r2_exported': r2_full}
+   
+    exported = model
+    try:
+        compact = CompactTreeEnsemble.from_sklearn(model)
+    except ValueError:
+        compact = None
+    if compact is not None:
+        # Deepest tree first, then shallower caps while accuracy holds
+        exported, report['format'] = compact, 'compact'
+        report['r2_exported'] = r2_score(y_val, compact.predict(X_val))
+        report['depth'] = compact.depth
+        for cap in range(compact.depth - 1, 0, -1):
+            capped = CompactTreeEnsemble.from_sklearn(model, max_depth=cap)
+            r2 = r2_score(y_val, capped.predict(X_val))
+            if r2 < r2_full - max_r2_drop:
+                break
+            exported, report['r2_exported'], report['depth'] = capped, r2, cap
+        report['nodes'] = exported.n_nodes
+       
+    joblib.dump(exported, path, compress=3 if mode == 'compressed' else 0)
+    report['bytes'] = os.path.getsize(path)
+    print(f"Serving model exported to {path} ({report['format']}, {mode}, {report['bytes'] / 1024:.0f} KB, "
+          f"R2 {report['r2_full']:.4f} -> {report['r2_exported']:.4f})")
+    return report
+
+
+#===========================================================================
+# 3c. WALK-FORWARD VALIDATION
+#===========================================================================
+
+
+# Time-ordered validation data, opened once per worker process
+_VALIDATION_DATA = {}
+
+
+def _open_validation_data(data_dir):
+    for name in ('X', 'y'):
+        _VALIDATION_DATA[name] = np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode='r')
+
+
+def _evaluate_fold(model, fold):
+    # fold = (train_end, test_start, test_end) over the time-sorted rows: fit on
+    # everything before train_end, score on the block that follows
+    train_end, test_start, test_end = fold
+    X, y = _VALIDATION_DATA['X'], _VALIDATION_DATA['y']
+    model = clone(model)
+    if 'n_jobs' in model.get_params():
+        # Parallelism comes from the worker pool
+        model.set_params(n_jobs=1)
+       
+    start = time.perf_counter()
+    model.fit(X[:train_end], y[:train_end])
+    y_pred = model.predict(X[test_start:test_end])
+    y_test = y[test_start:test_end]
+    return {
+        'r2': float(r2_score(y_test, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def chronological_split(time_index, test_size=0.2):
+    # Row positions of the earlier hours (train) and the latest test_size share of
+    # hours (test), each in time order. Rows of one timestamp stay on one side.
+    times = pd.Series(time_index).to_numpy(dtype='datetime64[ns]')
+    order = np.argsort(times, kind='stable')
+    sorted_times = times[order]
+    cut = np.searchsorted(sorted_times, sorted_times[int(len(times) * (1 - test_size))], side='left')
+    return order[:cut], order[cut:]
+
+
+class WalkForwardValidator:
+    # Expanding-window validation on the hourly time axis (Date + Hour): the rows
+    # after the first min_train_fraction of hours are split into n_folds blocks,
+    # and each fold trains on every hour up to gap_hours before its block. Folds
+    # are computed once and shared by all models; (model, fold) pairs run on a
+    # process pool over one memory-mapped copy of the data, and each result is
+    # logged under a key of data, fold and model parameters, so a model that was
+    # already scored is never refitted.
+    def __init__(self, n_folds=None, gap_hours=None, min_train_fraction=None, max_workers=None, cache_dir=None):
+        self.n_folds = n_folds or EnergyConfig.WALK_FORWARD_FOLDS
+        self.gap_hours = EnergyConfig.WALK_FORWARD_GAP_HOURS if gap_hours is None else gap_hours
+        self.min_train_fraction = min_train_fraction or EnergyConfig.WALK_FORWARD_MIN_TRAIN
+        self.max_workers = max_workers or EnergyConfig.TRAINING_WORKERS or os.cpu_count() or 1
+        self.cache_dir = cache_dir or EnergyConfig.VALIDATION_CACHE_DIR
+        self.folds = []
+        self.scores = {}
+
+
+    def make_folds(self, sorted_times):
+        # -> [(train_end, test_start, test_end)] row positions over time-sorted rows
+        n_rows = len(sorted_times)
+        first_test = int(n_rows * self.min_train_fraction)
+        edges = np.linspace(first_test, n_rows, self.n_folds + 1).astype(int)
+        # Move block edges to timestamp boundaries
+        edges = np.searchsorted(sorted_times, sorted_times[np.minimum(edges, n_rows - 1)], side='left')
+        edges[-1] = n_rows
+        gap = np.timedelta64(int(self.gap_hours * 3600), 's')
+       
+        folds = []
+        for test_start, test_end in zip(edges[:-1], edges[1:]):
+            train_end = np.searchsorted(sorted_times, sorted_times[test_start] - gap, side='left')
+            if test_end > test_start and train_end > 0:
+                folds.append((int(train_end), int(test_start), int(test_end)))
+        return folds
+
+
+    def validate(self, models, X, y, time_index):
+        # models: {name: unfitted estimator}. Returns {name: {'r2', 'r2_std', 'rmse', 'folds'}}
+        times = pd.Series(time_index).to_numpy(dtype='datetime64[ns]')
+        order = np.argsort(times, kind='stable')
+        self.folds = self.make_folds(times[order])
+        if not self.folds:
+            print("Not enough history for walk-forward validation")
+            return {}
+           
+        data_dir = self._prepare_data(X, y, order)
+        log_path = os.path.join(data_dir, "results.jsonl")
+        done = HyperparameterTuner._load_log(log_path)
+       
+        keys = {name: [self._fold_key(name, model, fold) for fold in self.folds] for name, model in models.items()}
+        todo = [(name, fold, key) for name in models for fold, key in zip(self.folds, keys[name]) if key not in done]
+        print(f"\nWalk-forward validation: {len(self.folds)} folds x {len(models)} models "
+              f"({len(self.folds) * len(models) - len(todo)} cached, {len(todo)} to fit on {self.max_workers} worker(s))...")
+       
+        executor = None
+        if self.max_workers > 1 and len(todo) > 1:
+            executor = ProcessPoolExecutor(min(self.max_workers, len(todo)), mp_context=_WORKER_CONTEXT,
+                                           initializer=_open_validation_data, initargs=(data_dir,))
+        else:
+            _open_validation_data(data_dir)
+           
+        try:
+            with open(log_path, 'a') as log:
+                if executor is not None:
+                    futures = {key: executor.submit(_evaluate_fold, models[name], fold) for name, fold, key in todo}
+                    outcomes = ((key, future) for key, future in futures.items())
+                else:
+                    outcomes = ((key, (name, fold)) for name, fold, key in todo)
+                for key, job in outcomes:
+                    try:
+                        outcome = job.result() if executor is not None else _evaluate_fold(models[job[0]], job[1])
+                    except Exception as e:
+                        print(f"   Fold failed: {e}")
+                        continue
+                    done[key] = outcome
+                    log.write(json.dumps({'key': key, **outcome}) + "\n")
+                    log.flush()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+               
+        self.scores = {}
+        for name in models:
+            folds = [done[key] for key in keys[name] if key in done]
+            if len(folds) < len(self.folds):
+                continue
+            r2 = np.array([fold['r2'] for fold in folds])
+            self.scores[name] = {
+                'r2': float(r2.mean()),
+                'r2_std': float(r2.std()),
+                'rmse': float(np.mean([fold['rmse'] for fold in folds])),
+                'folds': folds
+            }
+            print(f"   {name} -> walk-forward R2: {r2.mean():.4f} +/- {r2.std():.4f}")
+        return self.scores
+
+
+    def _fold_key(self, name, model, fold):
+        params = json.dumps(model.get_params(deep=False), sort_keys=True, default=repr)
+        return json.dumps({'model': name, 'class': type(model).__name__, 'params': params, 'fold': fold})
+
+
+    def _prepare_data(self, X, y, order):
+        # Rows in time order on disk, keyed by their content
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float64)[order])
+        y = np.ascontiguousarray(np.asarray(y, dtype=np.float64)[order])
+        digest = hashlib.sha256(X.tobytes())
+        digest.update(y.tobytes())
+        data_dir = os.path.join(self.cache_dir, digest.hexdigest()[:24])
+       
+        if not os.path.exists(os.path.join(data_dir, "y.npy")):
+            os.makedirs(data_dir, exist_ok=True)
+            # y is written last and marks the set as complete
+            np.save(os.path.join(data_dir, "X.npy"), X)
+            np.save(os.path.join(data_dir, "y.npy"), y)
+        return data_dir
+
+
 #===========================================================================
 # 4. COMPLETE ML PIPELINE
 #===========================================================================
 
 
-def train_energy_models(file_path):
+def model_artifact_path(model_name):
+    return EnergyConfig.MODEL_ARTIFACT_PATTERN.format(model_name.replace(' ', '_'))
+
+
+def artifact_signature():
+    # (path, mtime, size) of the saved preprocessor and serving model; changes
+    # whenever either file is rewritten
+    signature = []
+    for path in (EnergyConfig.PREPROCESSOR_ARTIFACT, EnergyConfig.SERVING_ARTIFACT):
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def pipeline_config(chunk_size=None, tune=False, imputation_strategy=None):
+    # Everything besides the data file that changes what training produces, with
+    # the values a train_energy_models call with these arguments actually uses
+    # (an imputer object counts by its class)
+    strategy = imputation_strategy or EnergyConfig.IMPUTATION_STRATEGY
+    return {
+        'pipeline_version': EnergyConfig.PIPELINE_VERSION,
+        'sklearn_version': sklearn.__version__,
+        'imputation_strategy': strategy if isinstance(strategy, str) else type(strategy).__name__,
+        'chunk_size': chunk_size or EnergyConfig.CHUNK_SIZE,
+        'tune': bool(tune)
+    }
+
+
+def compute_data_fingerprint(file_path, config=None):
+    if config is None:
+        config = pipeline_config()
+       
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(repr(sorted(config.items())).encode())
+    return digest.hexdigest()
+
+
+def train_energy_models(file_path, chunk_size=None, tune=False, imputation_strategy=None):
+    # Stage timings of the run are printed, and dumped to METRICS_FILE for when no
+    # server exposes them
+    with METRICS.stage('train.total'):
+        trained = _train_energy_models(file_path, chunk_size, tune, imputation_strategy)
+    if trained[0] is not None and METRICS.enabled:
+        METRICS.report()
+        print(f"Stage metrics saved to {METRICS.dump_json()}")
+    return trained
+
+
+def _train_energy_models(file_path, chunk_size, tune, imputation_strategy):
     print("Starting ML training pipeline...")
    
-    preprocessor = EnergyDataPreprocessor()
+    preprocessor = EnergyDataPreprocessor(imputation_strategy)
+    chunk_size = chunk_size or EnergyConfig.CHUNK_SIZE
    
-    raw_data = preprocessor.load_data(file_path)
-    if raw_data is None:
-        return None, None, None
+    with METRICS.stage('train.preprocess'):
+        if chunk_size:
+            X, y = preprocessor.preprocess_in_chunks(file_path, chunk_size)
+            if X is None or y is None:
+                return None, None, None
+        else:
+            if preprocessor.prepare_dataset(file_path) is None:
+                return None, None, None
+            preprocessor.scale_features()
        
-    preprocessor.clean_data()
-    preprocessor.feature_engineering()
-    preprocessor.encode_categorical_variables() # Fix for text columns
-    preprocessor.handle_missing_values()
-    preprocessor.scale_features()
-   
-    X, y = preprocessor.get_preprocessed_data()
-    if X is None or y is None:
-        return None, None, None
+            X, y = preprocessor.get_preprocessed_data()
+            if X is None or y is None:
+                return None, None, None
        
     model_comparator = MLModelComparator()
-    model_comparator.initialize_models()
    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Hold out the latest hours, so no model is scored on hours before ones it trained on
+    time_index = preprocessor.time_index
+    if time_index is not None and len(time_index) == len(y) and not time_index.isna().any():
+        train_idx, test_idx = chronological_split(time_index, test_size=0.2)
+    else:
+        print("No usable Date/Hour axis - falling back to a random split")
+        train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
+        time_index = None
+       
+    if chunk_size:
+        # Only the selected rows are read from the memmaps; the estimators still
+        # need their training rows in memory
+        X_train = pd.DataFrame(X[train_idx], columns=preprocessor.feature_names)
+        X_test = pd.DataFrame(X[test_idx], columns=preprocessor.feature_names)
+        y_train, y_test = y[train_idx], y[test_idx]
+    else:
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+       
+    # Tuning only sees the training split; the test split still judges the final models
+    tuned_params = None
+    if tune:
+        with METRICS.stage('train.tune'):
+            tuned_params = HyperparameterTuner().tune(
+                X_train, y_train, time_index=time_index.iloc[train_idx] if time_index is not None else None
+            )
+    model_comparator.initialize_models(tuned_params, n_rows=len(X_train))
    
-    results = model_comparator.train_and_compare_models(X_train, X_test, y_train, y_test)
+    with METRICS.stage('train.walk_forward'):
+        cv_scores = {}
+        if time_index is not None and EnergyConfig.WALK_FORWARD_FOLDS:
+            cv_scores = WalkForwardValidator().validate(
+                model_comparator.models, X_train, y_train, time_index.iloc[train_idx]
+            )
+       
+    with METRICS.stage('train.compare'):
+        results = model_comparator.train_and_compare_models(X_train, X_test, y_train, y_test)
+    if cv_scores:
+        model_comparator.select_best_by_validation(cv_scores)
     comparison_df = model_comparator.display_comparison_results()
    
-    # Save models
-    for name, result in model_comparator.results.items():
-        if result is not None:
-            joblib.dump(result['model'], f"model_{name.replace(' ', '_')}.joblib")
+    with METRICS.stage('train.save'):
+        # Save models: the full best model always, the other candidates only on request
+        for name, result in model_comparator.results.items():
+            if result is not None and (EnergyConfig.SAVE_ALL_MODELS or name == model_comparator.best_model):
+                joblib.dump(result['model'], model_artifact_path(name))
            
-    # Save preprocessor
-    preprocess_data = {
-        "scaler": preprocessor.scaler,
-        "feature_names": preprocessor.feature_names,
-        "best_model_name": model_comparator.best_model
-    }
-    joblib.dump(preprocess_data, "energy_preprocessor.joblib")
+        best_result = model_comparator.results.get(model_comparator.best_model)
+        serving_artifact = None
+        if best_result is not None:
+            serving_artifact = export_serving_model(best_result['model'], X_test, y_test)
+           
+        # Save preprocessor
+        preprocess_data = {
+            "scaler": preprocessor.scaler,
+            "feature_names": preprocessor.feature_names,
+            "best_model_name": model_comparator.best_model,
+            "best_model_metrics": {
+                "r2": best_result['r2'] if best_result else None,
+                "rmse": best_result['rmse'] if best_result else None,
+                "cv_r2": model_comparator.cv_scores.get(model_comparator.best_model, {}).get('r2')
+            },
+            "serving_artifact": serving_artifact,
+            "fingerprint": compute_data_fingerprint(
+                file_path, pipeline_config(chunk_size, tune, preprocessor.imputation_strategy)
+            )
+        }
+        joblib.dump(preprocess_data, EnergyConfig.PREPROCESSOR_ARTIFACT)
    
     print("Models and Preprocessor saved successfully.")
     return model_comparator, preprocessor, comparison_df
 
 
+@METRICS.timed('load_models')
+def load_energy_models(file_path, chunk_size=None, tune=False, imputation_strategy=None):
+    # Warm start: rebuild the comparator/preprocessor pair from saved artifacts.
+    # Returns (model_comparator, preprocessor, is_fresh); (None, None, False) if nothing usable.
+    # The artifacts are fresh if trained from this data with these train_energy_models arguments.
+    print("Loading saved models...")
+    try:
+        preprocess_data = joblib.load(EnergyConfig.PREPROCESSOR_ARTIFACT)
+        best_model_name = preprocess_data["best_model_name"]
+        serving = preprocess_data.get("serving_artifact")
+        full_model_path = model_artifact_path(best_model_name)
+        if serving and os.path.exists(serving['path']):
+            # Memory-mapped arrays are shared by every process that loads this file
+            best_model = joblib.load(serving['path'], mmap_mode='r' if serving['mode'] == 'mmap' else None)
+        else:
+            best_model = joblib.load(full_model_path)
+    except Exception as e:
+        print(f"No usable saved models: {e}")
+        return None, None, False
+       
+    preprocessor = EnergyDataPreprocessor()
+    preprocessor.scaler = preprocess_data["scaler"]
+    preprocessor.feature_names = list(preprocess_data["feature_names"])
+   
+    metrics = preprocess_data.get("best_model_metrics") or {}
+    model_comparator = MLModelComparator()
+    model_comparator.models = {best_model_name: best_model}
+    model_comparator.results = {
+        best_model_name: {
+            'model': best_model,
+            'r2': metrics.get('r2'),
+            'rmse': metrics.get('rmse'),
+            'y_pred': None,
+            # The sklearn estimator behind a compact serving model, for online updates
+            'full_model_path': full_model_path
+        }
+    }
+    model_comparator.best_model = best_model_name
+    if metrics.get('r2') is not None:
+        model_comparator.best_score = metrics['r2']
+       
+    try:
+        config = pipeline_config(chunk_size, tune, imputation_strategy)
+        is_fresh = preprocess_data.get("fingerprint") == compute_data_fingerprint(file_path, config)
+    except OSError as e:
+        # Without the data file there is nothing to retrain from, so serve what we have
+        print(f"Cannot fingerprint data file ({e}), using saved models as-is")
+        is_fresh = True
+       
+    print(f"Loaded {best_model_name} ({'up to date' if is_fresh else 'stale'})")
+    return model_comparator, preprocessor, is_fresh
+
+
 #===========================================================================
 # 5. IOT MONITORING SYSTEM
 #===========================================================================
 
 
+class CompiledInferencePipeline:
+    # Pandas-free single-reading inference, built once per (preprocessor, model) pair:
+    # a feature -> column index map, the scaler's mean/scale vectors and reusable
+    # row buffers. The buffers are per thread, so one instance serves concurrent
+    # callers (ingestion executor, background retrain) without mixing their rows.
+    SQUARED_FEATURES = {'Temperature_squared': 'Temperature', 'Occupancy_squared': 'Occupancy'}
+
+
+    def __init__(self, feature_names, scaler, model):
+        self.feature_names = list(feature_names)
+        self.column_index = {name: i for i, name in enumerate(self.feature_names)}
+        self.squared_features = [
+            (self.column_index[name], base) for name, base in self.SQUARED_FEATURES.items()
+            if name in self.column_index
+        ]
+       
+        n_features = len(self.feature_names)
+        self.mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        self.scale = scaler.scale_ if scaler.with_std and scaler.scale_ is not None else np.ones(n_features)
+       
+        self.n_features = n_features
+        self._local = threading.local()
+        self.model = model
+        self.kernel = 'predict'
+        self._predict_row = self._compile_model(model)
+
+
+    def buffers(self):
+        # This thread's (float64, float32) row buffers, created on first use
+        local = self._local
+        try:
+            return local.buffer, local.buffer32
+        except AttributeError:
+            local.buffer = np.zeros((1, self.n_features))
+            local.buffer32 = np.zeros((1, self.n_features), dtype=np.float32)
+            return local.buffer, local.buffer32
+
+
+    @property
+    def buffer(self):
+        return self.buffers()[0]
+
+
+    def fill(self, building_data):
+        # Unscaled features of preprocess_real_time_data, written into self.buffer
+        row = self.buffer[0]
+        row.fill(0.0)
+        column_index = self.column_index
+        for name, value in building_data.items():
+            i = column_index.get(name)
+            if i is not None:
+                row[i] = value
+        for i, base in self.squared_features:
+            value = building_data.get(base)
+            if value is not None:
+                row[i] = value ** 2
+        return self.buffer
+
+
+    def transform(self, building_data):
+        # Same features as preprocess_real_time_data, written into self.buffer
+        row = self.fill(building_data)[0]
+        np.subtract(row, self.mean, out=row)
+        np.divide(row, self.scale, out=row)
+        return self.buffer
+
+
+    def predict(self, building_data):
+        return self._predict_row(self.transform(building_data))
+
+
+    def predict_filled(self):
+        # Scales and predicts the row left in self.buffer by fill()
+        row = self.buffer[0]
+        np.subtract(row, self.mean, out=row)
+        np.divide(row, self.scale, out=row)
+        return self._predict_row(self.buffer)
+
+
+    def _compile_model(self, model):
+        generic = lambda X: model.predict(X)[0]
+        try:
+            fast = self._fast_kernel(model)
+        except Exception:
+            fast = None
+        if fast is None:
+            return generic
+           
+        # Only keep the fast kernel if it reproduces model.predict on a probe row
+        probe = self.buffer
+        probe[0] = np.linspace(-2, 2, probe.shape[1])
+        if not np.isclose(fast(probe), generic(probe)):
+            return generic
+        self.kernel = type(model).__name__
+        return fast
+
+
+    def _fast_kernel(self, model):
+        # Tree models skip sklearn's input validation and walk the fitted trees directly
+        buffers = self.buffers
+       
+        if isinstance(model, DecisionTreeRegressor) and model.n_outputs_ == 1:
+            tree = model.tree_
+           
+            def predict_tree(X):
+                buffer32 = buffers()[1]
+                np.copyto(buffer32, X, casting='unsafe')
+                return tree.predict(buffer32)[0, 0]
+            return predict_tree
+           
+        if isinstance(model, RandomForestRegressor) and model.n_outputs_ == 1:
+            trees = [estimator.tree_ for estimator in model.estimators_]
+           
+            def predict_forest(X):
+                buffer32 = buffers()[1]
+                np.copyto(buffer32, X, casting='unsafe')
+                total = 0.0
+                for tree in trees:
+                    total += tree.predict(buffer32)[0, 0]
+                return total / len(trees)
+            return predict_forest
+           
+        if (isinstance(model, GradientBoostingRegressor) and predict_stages is not None
+                and (model.init_ == 'zero' or isinstance(model.init_, DummyRegressor))):
+            # Constant initial prediction, so it can be computed once
+            init_raw = model._raw_predict_init(buffers()[1]).copy()
+            estimators, learning_rate = model.estimators_, model.learning_rate
+           
+            def predict_boosting(X):
+                buffer32 = buffers()[1]
+                np.copyto(buffer32, X, casting='unsafe')
+                raw = init_raw.copy()
+                predict_stages(estimators, buffer32, learning_rate, raw)
+                return raw[0, 0]
+            return predict_boosting
+           
+        if isinstance(model, CompactTreeEnsemble):
+            # Served artifact after a warm start: every tree walked at once on the one
+            # row, without predict()'s block setup
+            feature, threshold, left, right = model.feature, model.threshold, model.left, model.right
+            value, roots, depth = model.value, model.roots, model.depth
+            mean, init, learning_rate = model.combine == 'mean', model.init, model.learning_rate
+           
+            def predict_compact(X):
+                row = X[0].astype(np.float32)
+                node = roots
+                for _ in range(depth):
+                    node = np.where(row[feature[node]] <= threshold[node], left[node], right[node])
+                leaves = value[node].astype(np.float64)
+                return leaves.mean() if mean else init + learning_rate * leaves.sum()
+            return predict_compact
+           
+        return None
+
+
+class _RollingWindow:
+    # Running sum plus monotonic min/max deques (absolute reading indices) for one window
+    def __init__(self, seconds, columns):
+        self.seconds = seconds
+        self.start = 0
+        self.sums = {col: 0.0 for col in columns}
+        self.mins = {col: deque() for col in columns}
+        self.maxs = {col: deque() for col in columns}
+
+
+class EnergyHistory:
+    # Fixed-capacity ring buffer of monitoring readings backed by NumPy columns.
+    # Rolling sum/min/max for each window in EnergyConfig.HISTORY_WINDOWS are kept up
+    # to date on append (amortised O(1)), so window queries never scan the buffer.
+    # Windows only see readings still held in the buffer.
+    COLUMNS = ('energy', 'temperature')
+
+
+    def __init__(self, capacity=None, windows=None):
+        self.capacity = capacity or EnergyConfig.HISTORY_CAPACITY
+        self.timestamps = np.zeros(self.capacity)
+        self.columns = {col: np.zeros(self.capacity) for col in self.COLUMNS}
+        # Readings ever appended; reading i lives in slot i % capacity
+        self.total = 0
+        self.windows = {
+            name: _RollingWindow(seconds, self.COLUMNS)
+            for name, seconds in (windows or EnergyConfig.HISTORY_WINDOWS).items()
+        }
+
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+
+    def append(self, timestamp, energy, temperature):
+        t = timestamp.timestamp() if isinstance(timestamp, datetime) else float(timestamp)
+        if self.total and t < self.timestamps[(self.total - 1) % self.capacity]:
+            raise ValueError("EnergyHistory timestamps must be non-decreasing")
+           
+        # Drop what falls out of each window, and the reading about to be overwritten
+        oldest_kept = self.total + 1 - self.capacity
+        for window in self.windows.values():
+            self._evict(window, t - window.seconds, oldest_kept)
+           
+        i = self.total
+        slot = i % self.capacity
+        self.timestamps[slot] = t
+        self.columns['energy'][slot] = energy
+        self.columns['temperature'][slot] = temperature
+        self.total += 1
+       
+        for window in self.windows.values():
+            for col, values in self.columns.items():
+                value = values[slot]
+                window.sums[col] += value
+                mins, maxs = window.mins[col], window.maxs[col]
+                while mins and values[mins[-1] % self.capacity] >= value:
+                    mins.pop()
+                mins.append(i)
+                while maxs and values[maxs[-1] % self.capacity] <= value:
+                    maxs.pop()
+                maxs.append(i)
+               
+        # Recompute sums exactly once per buffer turn so float error can't accumulate
+        if self.total % self.capacity == 0:
+            self._resync_sums()
+
+
+    def _evict(self, window, cutoff, oldest_kept=0):
+        while window.start < self.total:
+            slot = window.start % self.capacity
+            if window.start >= oldest_kept and self.timestamps[slot] > cutoff:
+                break
+            for col, values in self.columns.items():
+                window.sums[col] -= values[slot]
+                if window.mins[col] and window.mins[col][0] == window.start:
+                    window.mins[col].popleft()
+                if window.maxs[col] and window.maxs[col][0] == window.start:
+                    window.maxs[col].popleft()
+            window.start += 1
+
+
+    def _resync_sums(self):
+        for window in self.windows.values():
+            slots = np.arange(window.start, self.total) % self.capacity
+            for col, values in self.columns.items():
+                window.sums[col] = float(values[slots].sum())
+
+
+    def window_stats(self, window_name, column='energy', now=None):
+        # now (datetime or epoch seconds) ages the window without a new reading
+        window = self.windows[window_name]
+        if now is not None:
+            now = now.timestamp() if isinstance(now, datetime) else float(now)
+            self._evict(window, now - window.seconds)
+           
+        count = self.total - window.start
+        if count == 0:
+            return {'count': 0, 'sum': 0.0, 'mean': None, 'min': None, 'max': None}
+        values = self.columns[column]
+        return {
+            'count': count,
+            'sum': float(window.sums[column]),
+            'mean': float(window.sums[column]) / count,
+            'min': float(values[window.mins[column][0] % self.capacity]),
+            'max': float(values[window.maxs[column][0] % self.capacity])
+        }
+
+
+    def average(self, window_name, column='energy', now=None):
+        return self.window_stats(window_name, column, now)['mean']
+
+
+    def as_arrays(self):
+        # Chronological copies of the buffered columns
+        slots = np.arange(self.total - len(self), self.total) % self.capacity
+        arrays = {'timestamp': self.timestamps[slots]}
+        arrays.update({col: values[slots] for col, values in self.columns.items()})
+        return arrays
+
+
+    def records(self):
+        # Old list-of-dicts view, for callers that still want it
+        arrays = self.as_arrays()
+        return [
+            {'timestamp': datetime.fromtimestamp(t), 'energy': float(e), 'temperature': float(temp)}
+            for t, e, temp in zip(arrays['timestamp'], arrays['energy'], arrays['temperature'])
+        ]
+
+
+class PredictionCache:
+    # Bounded LRU of predictions keyed on (model version, feature row). Sensors
+    # report at a fixed resolution and calendar features change hourly, so most
+    # live readings repeat a recent one. Columns in PREDICTION_CACHE_DECIMALS are
+    # quantized in place before the row becomes a key; off-grid rows are snapped
+    # (their squared terms recomputed) or given no key. Used by one
+    # IoTEnergyMonitor, which calls invalidate() whenever its model changes.
+    def __init__(self, feature_names, capacity=None, decimals=None, snap=None):
+        self.capacity = EnergyConfig.PREDICTION_CACHE_SIZE if capacity is None else capacity
+        self.decimals = EnergyConfig.PREDICTION_CACHE_DECIMALS if decimals is None else decimals
+        self.snap = EnergyConfig.PREDICTION_CACHE_SNAP if snap is None else snap
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = 0
+        self.hits = self.misses = self.bypassed = self.evictions = self.invalidations = 0
+        self._set_features(feature_names)
+
+
+    def _set_features(self, feature_names):
+        index = {name: i for i, name in enumerate(feature_names)}
+        squared = {base: name for name, base in CompiledInferencePipeline.SQUARED_FEATURES.items()}
+        self.grid = [(index[name], decimals, index.get(squared.get(name)))
+                     for name, decimals in self.decimals.items() if name in index]
+
+
+    def invalidate(self, feature_names=None):
+        # New model or preprocessor: entries of earlier versions can never hit again.
+        # Returns the new version
+        with self.lock:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version += 1
+            if feature_names is not None:
+                self._set_features(feature_names)
+            return self.version
+
+
+    def key(self, row, version=None):
+        # One unscaled feature row (quantized in place) -> key, or None if off-grid.
+        # version: the model version the prediction is made with (default: current)
+        for i, decimals, squared in self.grid:
+            value = row[i]
+            rounded = round(value, decimals)
+            if rounded != value:
+                if not self.snap:
+                    return None
+                row[i] = rounded
+                if squared is not None:
+                    row[squared] = rounded ** 2
+        return (self.version if version is None else version, row.tobytes())
+
+
+    def keys(self, matrix, version=None):
+        # key() for every row of an unscaled feature matrix
+        cacheable = np.ones(len(matrix), dtype=bool)
+        for i, decimals, squared in self.grid:
+            column = matrix[:, i]
+            rounded = np.round(column, decimals)
+            off = rounded != column
+            if not off.any():
+                continue
+            if self.snap:
+                column[off] = rounded[off]
+                if squared is not None:
+                    matrix[off, squared] = rounded[off] ** 2
+            else:
+                cacheable &= ~off
+        if version is None:
+            version = self.version
+        return [(version, row.tobytes()) if ok else None for row, ok in zip(matrix, cacheable)]
+
+
+    def get(self, key):
+        with self.lock:
+            if key is None:
+                self.bypassed += 1
+                return None
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def get_many(self, keys):
+        # Cached values for a batch of keys, NaN where there is none. A key repeated
+        # within the batch counts as one miss; the caller predicts it once
+        values = np.full(len(keys), np.nan)
+        pending = set()
+        with self.lock:
+            for j, key in enumerate(keys):
+                if key is None:
+                    self.bypassed += 1
+                    continue
+                value = self.entries.get(key)
+                if value is None:
+                    if key in pending:
+                        self.hits += 1
+                    else:
+                        pending.add(key)
+                        self.misses += 1
+                    continue
+                self.entries.move_to_end(key)
+                values[j] = value
+                self.hits += 1
+        return values
+
+
+    def put(self, key, value):
+        self.put_many([key], [value])
+
+
+    def put_many(self, keys, values):
+        with self.lock:
+            for key, value in zip(keys, values):
+                # Predictions made while the model was swapped out are dropped
+                if key is None or key[0] != self.version:
+                    continue
+                self.entries[key] = value
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses + self.bypassed
+            return {
+                'entries': len(self.entries), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses,
+                'bypassed': self.bypassed, 'evictions': self.evictions, 'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else None
+            }
+
+
 class IoTEnergyMonitor:
     def __init__(self, model_comparator, preprocessor):
+        self.prediction_cache = None
+        self.set_models(model_comparator, preprocessor)
+        self.appliances = {}
+        self.energy_history = EnergyHistory()
+        # (artifact_signature(), reload) when the models come from saved artifacts:
+        # reload() is called, at most every ARTIFACT_CHECK_SECONDS, once they change
+        self.artifact_watch = None
+        self.artifact_lock = threading.Lock()
+        self.next_artifact_check = 0.0
+        self.pending_artifacts = None
+
+
+    def watch_artifacts(self, reload):
+        # reload() swaps in the rewritten artifacts (set_models, which also
+        # invalidates the prediction cache) and returns False if they were unusable,
+        # to be retried at the next check
+        self.pending_artifacts = None
+        self.artifact_watch = (artifact_signature(), reload)
+
+
+    def check_artifacts(self):
+        watch = self.artifact_watch
+        if watch is None or time.monotonic() < self.next_artifact_check:
+            return
+        if not self.artifact_lock.acquire(blocking=False):
+            return  # another thread is checking
+        try:
+            self.next_artifact_check = time.monotonic() + EnergyConfig.ARTIFACT_CHECK_SECONDS
+            signature, reload = self.artifact_watch
+            current = artifact_signature()
+            if current == signature:
+                self.pending_artifacts = None
+            elif current != self.pending_artifacts:
+                # Training writes the serving model before the preprocessor, so a
+                # change is only loaded once it is unchanged for one more check
+                self.pending_artifacts = current
+            elif reload() is not False:
+                self.artifact_watch, self.pending_artifacts = (current, reload), None
+        finally:
+            self.artifact_lock.release()
+
+
+    def set_models(self, model_comparator, preprocessor):
+        # Also used to hot-swap models after a background retrain or online update;
+        # every call starts a new model version for the prediction cache.
+        # Predictions read self.serving, (preprocessor, model, compiled pipeline,
+        # cache version), once per call: swapping that one tuple is what makes the
+        # swap atomic, a call never pairs one model's scaler with another model.
+        best_model_name, best_model, compiled_pipeline = None, None, None
+        if model_comparator.best_model is not None:
+            best_model_name = model_comparator.best_model
+            best_model = model_comparator.results[best_model_name]['model']
+            compiled_pipeline = CompiledInferencePipeline(preprocessor.feature_names, preprocessor.scaler, best_model)
+           
+        version = None
+        if self.prediction_cache is not None:
+            # Predictions still running on the old tuple carry the old version,
+            # which put_many no longer accepts
+            version = self.prediction_cache.invalidate(preprocessor.feature_names)
+        elif EnergyConfig.PREDICTION_CACHE_SIZE and preprocessor.feature_names is not None:
+            self.prediction_cache = PredictionCache(preprocessor.feature_names)
+            METRICS.register_cache('prediction', self.prediction_cache.stats)
+            version = self.prediction_cache.version
+           
+        self.serving = (preprocessor, best_model, compiled_pipeline, version)
         self.model_comparator = model_comparator
         self.preprocessor = preprocessor
-        if model_comparator.best_model is not None:
-            self.best_model_name = model_comparator.best_model
-            self.best_model = model_comparator.results[self.best_model_name]['model']
-        else:
-            self.best_model_name = None
-            self.best_model = None
-        self.appliances = {}
-        self.energy_history = []
+        self.best_model_name = best_model_name
+        self.best_model = best_model
+        self.compiled_pipeline = compiled_pipeline
 
 
     def register_appliances(self):
@@ -416,45 +2841,678 @@ class IoTEnergyMonitor:
         return real_time_df_scaled
 
 
+    @METRICS.latency('predict')
     def predict_energy(self, building_data):
-        if self.best_model is None:
+        self.check_artifacts()
+        _, model, pipeline, version = self.serving
+        if model is None:
             print("No trained model available for prediction")
             return 0
            
+        cache = self.prediction_cache
+        if cache is None:
+            return max(0, pipeline.predict(building_data))
+           
+        key = cache.key(pipeline.fill(building_data)[0], version)
+        predicted_energy = cache.get(key)
+        if predicted_energy is None:
+            predicted_energy = max(0, pipeline.predict_filled())
+            cache.put(key, predicted_energy)
+        return predicted_energy
+
+
+    def predict_energy_reference(self, building_data):
+        # Original pandas path, kept to validate the compiled pipeline against
         processed_data = self.preprocess_real_time_data(building_data)
         predicted_energy = self.best_model.predict(processed_data)[0]
         return max(0, predicted_energy)
 
 
+    def assemble_feature_matrix(self, readings, feature_names=None):
+        # Batch counterpart of preprocess_real_time_data (before scaling): one column
+        # per training feature, squared terms derived, absent features set to 0
+        # (including readings that lack a key other readings in the batch have)
+        if feature_names is None:
+            feature_names = self.preprocessor.feature_names
+        if not isinstance(readings, pd.DataFrame):
+            readings = pd.DataFrame(readings)
+           
+        n_rows = len(readings)
+        matrix = np.zeros((n_rows, len(feature_names)))
+        for i, feature in enumerate(feature_names):
+            if feature in ('Temperature_squared', 'Occupancy_squared'):
+                base = feature[:-len('_squared')]
+                if base in readings.columns:
+                    matrix[:, i] = readings[base].fillna(0).to_numpy(dtype=float) ** 2
+                    continue
+            if feature in readings.columns:
+                matrix[:, i] = readings[feature].fillna(0).to_numpy(dtype=float)
+        return matrix
+
+
+    @METRICS.latency('predict_batch')
+    def predict_batch(self, readings, use_cache=True):
+        # readings: DataFrame, dict of column arrays or list of reading dicts.
+        # Returns an array with the same values predict_energy gives per reading.
+        # use_cache=False skips the prediction cache (e.g. for bulk simulations
+        # whose readings rarely repeat)
+        self.check_artifacts()
+        preprocessor, model, _, version = self.serving
+        if model is None:
+            print("No trained model available for prediction")
+            return np.zeros(len(readings))
+           
+        matrix = self.assemble_feature_matrix(readings, preprocessor.feature_names)
+        if len(matrix) == 0:
+            return np.zeros(0)
+           
+        cache = self.prediction_cache
+        if cache is None or not use_cache:
+            return self._predict_matrix(matrix, preprocessor, model)
+           
+        # Only the rows without a cached prediction go through the model
+        keys = cache.keys(matrix, version)
+        predicted_energy = cache.get_many(keys)
+        missing = np.flatnonzero(np.isnan(predicted_energy))
+        if len(missing):
+            # Rows repeated within the batch go through the model once
+            first = {}
+            for i in missing:
+                first.setdefault(keys[i] or i, i)
+            rows = np.fromiter(first.values(), dtype=np.intp, count=len(first))
+            predicted_energy[rows] = self._predict_matrix(matrix[rows], preprocessor, model)
+            cache.put_many([keys[i] for i in rows], predicted_energy[rows])
+            predicted_energy[missing] = predicted_energy[[first[keys[i] or i] for i in missing]]
+        return predicted_energy
+
+
+    @staticmethod
+    def _predict_matrix(matrix, preprocessor, model):
+        # preprocessor and model come from one read of self.serving
+        scaled = preprocessor.scaler.transform(matrix)
+        predicted_energy = model.predict(pd.DataFrame(scaled, columns=preprocessor.feature_names))
+        return np.maximum(0, predicted_energy)
+
+
+#===========================================================================
+# 5b. ONLINE MODEL UPDATES
+#===========================================================================
+
+
+class ResidualCorrectedModel:
+    # Serving model plus an SGD regressor trained with partial_fit on its residuals,
+    # for model types that cannot grow incrementally (SVR, single Decision Tree)
+    def __init__(self, base_model, random_state=42):
+        self.base_model = base_model
+        self.corrector = SGDRegressor(learning_rate='adaptive', eta0=0.01, random_state=random_state)
+        self.n_updates = 0
+
+
+    def partial_fit(self, X, y):
+        self.corrector.partial_fit(X, y - self.base_model.predict(X))
+        self.n_updates += 1
+        return self
+
+
+    def predict(self, X):
+        return self.base_model.predict(X) + self.corrector.predict(X)
+
+
+# Hours of the hourly data's TimeOfDay labels; like DayOfWeek, the model sees them
+# as LabelEncoder codes, i.e. positions in the sorted labels
+TIME_OF_DAY_HOURS = {'Late Night': range(0, 6), 'Morning': range(6, 12), 'Afternoon': range(12, 18),
+                     'Evening': range(18, 24)}
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_OF_WEEK_CODES = np.array([sorted(DAY_NAMES).index(name) for name in DAY_NAMES])
+TIME_OF_DAY_CODES = np.array([sorted(TIME_OF_DAY_HOURS).index(label) for hour in range(24)
+                              for label, hours in TIME_OF_DAY_HOURS.items() if hour in hours])
+
+
+def calendar_features(timestamps):
+    # Model inputs a reading's time gives, built the way the preprocessor builds them
+    # from the hourly data: the lower-case ones from the Date column, which has no
+    # time of day (so 'hour' is always 0), Hour/Month/Year as given and the text
+    # columns as their codes. A single timestamp gives scalars, an array gives arrays.
+    if isinstance(timestamps, datetime):
+        weekday = timestamps.weekday()
+        return {
+            'hour': 0, 'day_of_week': weekday, 'month': timestamps.month, 'is_weekend': 1 if weekday >= 5 else 0,
+            'Hour': timestamps.hour, 'Month': timestamps.month, 'Year': timestamps.year,
+            'DayOfWeek': int(DAY_OF_WEEK_CODES[weekday]), 'TimeOfDay': int(TIME_OF_DAY_CODES[timestamps.hour])
+        }
+    times = pd.DatetimeIndex(timestamps)
+    weekday = times.dayofweek.to_numpy()
+    return {
+        'hour': np.zeros(len(times), dtype=np.int64), 'day_of_week': weekday, 'month': times.month.to_numpy(),
+        'is_weekend': (weekday >= 5).astype(int), 'Hour': times.hour.to_numpy(), 'Month': times.month.to_numpy(),
+        'Year': times.year.to_numpy(), 'DayOfWeek': DAY_OF_WEEK_CODES[weekday],
+        'TimeOfDay': TIME_OF_DAY_CODES[times.hour.to_numpy()]
+    }
+
+
+def load_live_readings(file_path, load_scale=None):
+    # live_data.csv (timestamp,temp,hum,current,pred) or a TimeSeriesStore directory
+    # (energy_store.py) -> hourly model inputs and building kWh labels. Each reading's
+    # current is assumed to hold until the same device's next reading (at most
+    # LIVE_MAX_READING_GAP s) at EnergyConfig.SUPPLY_VOLTAGE. A device's hour is
+    # scaled to a full hour (if it covered LIVE_MIN_HOUR_COVERAGE of it) and to the
+    # building by load_scale (default EnergyConfig.LIVE_LOAD_SCALE); series without a
+    # scale give no labels, and calibrated devices in the same hour are averaged.
+    load_scale = EnergyConfig.LIVE_LOAD_SCALE if load_scale is None else load_scale
+    if os.path.isdir(file_path):
+        with TimeSeriesStore(file_path) as store:
+            frames = [store.read(series=name, columns=['temperature', 'humidity', 'current']).assign(series=name)
+                      for name in store.series]
+        live = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['timestamp'])
+        live = live.rename(columns={'temperature': 'temp', 'humidity': 'hum'})
+    else:
+        # Only the first four columns are shared by every writer of the file
+        live = pd.read_csv(file_path, usecols=range(4), header=0, names=['timestamp', 'temp', 'hum', 'current'])
+        live['timestamp'] = pd.to_datetime(live['timestamp'], format='mixed')
+        live['series'] = 'live'
+    live = live[live['series'].isin(list(load_scale))].sort_values(['series', 'timestamp'], kind='stable')
+    if live.empty:
+        return pd.DataFrame(), np.zeros(0)
+       
+    gaps = live.groupby('series')['timestamp'].diff()
+    gaps = gaps.groupby(live['series']).shift(-1).dt.total_seconds()
+    live['seconds'] = gaps.fillna(0).clip(upper=EnergyConfig.LIVE_MAX_READING_GAP)
+    live['kwh'] = live['current'] * EnergyConfig.SUPPLY_VOLTAGE * live['seconds'] / 3.6e6
+    live['slot'] = live['timestamp'].dt.floor('h')
+   
+    devices = live.groupby(['series', 'slot']).agg(
+        Temperature=('temp', 'mean'), Humidity=('hum', 'mean'), kwh=('kwh', 'sum'), seconds=('seconds', 'sum')
+    ).reset_index()
+    devices = devices[devices['seconds'] >= EnergyConfig.LIVE_MIN_HOUR_COVERAGE * 3600]
+    devices['energy'] = devices['kwh'] * 3600 / devices['seconds'] * devices['series'].map(load_scale).astype(float)
+    hourly = devices.groupby('slot')[['Temperature', 'Humidity', 'energy']].mean()
+    if hourly.empty:
+        return pd.DataFrame(), np.zeros(0)
+       
+    readings = pd.DataFrame({'Temperature': hourly['Temperature'].to_numpy(), 'Humidity': hourly['Humidity'].to_numpy(),
+                             **calendar_features(hourly.index)})
+    return readings, hourly['energy'].to_numpy()
+
+
+class OnlineModelUpdater:
+    # Folds labelled live readings into the serving model without a full refit:
+    # Gradient Boosting / Random Forest grow a few warm-started trees on the new rows,
+    # other models get a residual SGD corrector. For tree models the scaler's
+    # statistics are updated with partial_fit and every split threshold is remapped
+    # to the new scaling, so existing trees keep making the same decisions. A drift
+    # check runs first and asks for a full retrain instead of patching a model that
+    # no longer fits.
+    # Live readings are always later than the training years; that is not drift
+    SHIFT_EXEMPT_FEATURES = ('Year',)
+
+
+    def __init__(self, iot_monitor):
+        self.iot_monitor = iot_monitor
+        metrics = iot_monitor.model_comparator.results.get(iot_monitor.best_model_name) or {}
+        self.reference_rmse = metrics.get('rmse')
+        self.history = []
+
+
+    def check_drift(self, readings, energies):
+        monitor = self.iot_monitor
+        rmse = float(np.sqrt(np.mean((monitor.predict_batch(readings) - energies) ** 2)))
+        if self.reference_rmse is None:
+            self.reference_rmse = rmse
+           
+        # Only features the readings actually carry (absent ones are zero-filled by
+        # design) and that varied in training (constant ones carry no signal)
+        scaler = monitor.preprocessor.scaler
+        present = [i for i, name in enumerate(monitor.preprocessor.feature_names)
+                   if (name in readings.columns or CompiledInferencePipeline.SQUARED_FEATURES.get(name) in readings.columns)
+                   and scaler.var_[i] > 0 and name not in self.SHIFT_EXEMPT_FEATURES]
+        X = monitor.assemble_feature_matrix(readings)
+        shift = np.abs((X[:, present].mean(axis=0) - scaler.mean_[present]) / scaler.scale_[present])
+       
+        max_shift = float(shift.max()) if len(present) else 0.0
+        reasons = []
+        if rmse > EnergyConfig.ONLINE_DRIFT_RMSE_RATIO * self.reference_rmse:
+            reasons.append(f"RMSE {rmse:.2f} vs {self.reference_rmse:.2f} at training")
+        if max_shift > EnergyConfig.ONLINE_DRIFT_FEATURE_SHIFT:
+            name = monitor.preprocessor.feature_names[present[int(np.argmax(shift))]]
+            reasons.append(f"{name} mean shifted {max_shift:.1f} std")
+        return {'rmse': rmse, 'max_feature_shift': max_shift, 'drift': bool(reasons), 'reasons': reasons}
+
+
+    def update(self, readings, energies):
+        # Returns a report dict; report['retrain'] is True when a full retrain is needed
+        monitor = self.iot_monitor
+        if not isinstance(readings, pd.DataFrame):
+            readings = pd.DataFrame(readings)
+        energies = np.asarray(energies, dtype=float)
+       
+        report = {'rows': len(energies), 'updated': False, 'retrain': False}
+        if monitor.best_model is None or len(energies) < EnergyConfig.ONLINE_MIN_BATCH:
+            report['reason'] = f"need at least {EnergyConfig.ONLINE_MIN_BATCH} labelled rows"
+            return report
+           
+        start = time.perf_counter()
+        report.update(self.check_drift(readings, energies))
+        if report['drift']:
+            report['retrain'] = True
+            report['reason'] = "; ".join(report['reasons'])
+            self.history.append(report)
+            return report
+           
+        name = monitor.best_model_name
+        model = self._updatable_model(name, monitor.best_model)
+        preprocessor = copy.copy(monitor.preprocessor)
+        X_raw = monitor.assemble_feature_matrix(readings)
+       
+        tree_models = self._trees(model)
+        if tree_models is not None:
+            old_scaler = preprocessor.scaler
+            new_scaler = copy.deepcopy(old_scaler).partial_fit(pd.DataFrame(X_raw, columns=preprocessor.feature_names))
+            self._remap_thresholds(tree_models, old_scaler, new_scaler)
+            preprocessor.scaler = new_scaler
+           
+        X = pd.DataFrame(preprocessor.scaler.transform(X_raw), columns=preprocessor.feature_names)
+        extra_trees = EnergyConfig.ONLINE_TREES_PER_UPDATE.get(name)
+       
+        if isinstance(model, (GradientBoostingRegressor, RandomForestRegressor)) and extra_trees:
+            if model.n_estimators + extra_trees > EnergyConfig.ONLINE_MAX_ESTIMATORS:
+                report.update(retrain=True, reason=f"{name} reached {model.n_estimators} estimators")
+                self.history.append(report)
+                return report
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + extra_trees)
+            model.fit(X, energies)
+            report['estimators'] = model.n_estimators
+        else:
+            if not isinstance(model, ResidualCorrectedModel):
+                model = ResidualCorrectedModel(model)
+            model.partial_fit(X, energies)
+           
+        # Swap in new objects so concurrent predictions see either the old or the new pair
+        comparator = copy.copy(monitor.model_comparator)
+        comparator.results = dict(comparator.results)
+        comparator.results[name] = {**(comparator.results.get(name) or {}), 'model': model}
+        monitor.set_models(comparator, preprocessor)
+       
+        report['rmse_after'] = float(np.sqrt(np.mean((monitor.predict_batch(readings) - energies) ** 2)))
+        report['seconds'] = time.perf_counter() - start
+        report['updated'] = True
+        self.history.append(report)
+        return report
+
+
+    def _updatable_model(self, name, model):
+        # Copy of the serving model to update. A compact artifact (warm start) cannot
+        # grow trees, so the full sklearn estimator saved next to it is updated and
+        # served from then on (without the export's depth cap)
+        if isinstance(model, CompactTreeEnsemble):
+            path = (self.iot_monitor.model_comparator.results.get(name) or {}).get('full_model_path')
+            if path and os.path.exists(path):
+                return joblib.load(path)
+            print(f"No saved sklearn estimator for {name}; correcting the compact model's residuals instead")
+        return copy.deepcopy(model)
+
+
+    @staticmethod
+    def _trees(model):
+        if isinstance(model, DecisionTreeRegressor):
+            return [model.tree_]
+        if isinstance(model, RandomForestRegressor):
+            return [estimator.tree_ for estimator in model.estimators_]
+        if isinstance(model, GradientBoostingRegressor):
+            return [estimator.tree_ for estimator in model.estimators_.ravel()]
+        return None
+
+
+    @staticmethod
+    def _remap_thresholds(trees, old_scaler, new_scaler):
+        # threshold on old-scaled x -> same split point on new-scaled x
+        a = old_scaler.scale_ / new_scaler.scale_
+        b = (old_scaler.mean_ - new_scaler.mean_) / new_scaler.scale_
+        for tree in trees:
+            split = tree.feature >= 0
+            features = tree.feature[split]
+            tree.threshold[split] = tree.threshold[split] * a[features] + b[features]
+
+
 #===========================================================================
 # 6. ALERT AND ANALYSIS SYSTEMS
 #===========================================================================
 
 
+def appliance_type(name, profile=None):
+    # Type from the profile; names outside APPLIANCE_PROFILES fall back to their prefix
+    if profile is None:
+        profile = EnergyConfig.APPLIANCE_PROFILES.get(name, {})
+    if 'type' in profile:
+        return profile['type']
+    prefix = name.split('_')[0]
+    return prefix if prefix in EnergyConfig.APPLIANCE_TYPES else 'Other'
+
+
+ALERT_OPERATORS = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal}
+
+
+class AlertRule:
+    # One entry of EnergyConfig.ALERT_RULES, compiled to vectorized comparisons
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.level = spec.get('level', 'warning')
+        self.title = spec.get('title', self.name)
+        self.message = spec['message']
+        self.appliance = spec.get('appliance')
+        self.type_code = EnergyConfig.APPLIANCE_TYPES[self.appliance] if self.appliance else None
+        self.when = [(field, ALERT_OPERATORS[op], value) for field, op, value in spec['when']]
+        self.clear = [(field, ALERT_OPERATORS[op], value) for field, op, value in spec.get('clear', [])]
+        # Fields the message uses, and the column each is read from
+        self.message_fields = [
+            (field, '_appliance_name' if field == 'appliance' else field)
+            for _, field, _, _ in string.Formatter().parse(self.message) if field
+        ]
+        self.change_fields = sorted({
+            field[:-len('_change')] for field, _, _ in self.when + self.clear if field.endswith('_change')
+        })
+
+
+    @staticmethod
+    def _holds(conditions, columns, n_rows):
+        mask = np.ones(n_rows, dtype=bool)
+        with np.errstate(invalid='ignore'):
+            for field, op, value in conditions:
+                # Missing fields and NaN (e.g. no previous reading for a change) never match
+                if field not in columns:
+                    return np.zeros(n_rows, dtype=bool)
+                mask &= op(columns[field], value)
+        return mask
+
+
+    def evaluate(self, columns, n_rows, running=None):
+        # -> (trigger, clear) masks. Appliance rules only trigger for running appliances
+        # and always clear once the appliance is off.
+        trigger = self._holds(self.when, columns, n_rows)
+        clear = self._holds(self.clear, columns, n_rows) if self.clear else ~trigger
+        if running is not None:
+            trigger &= running
+            clear |= ~running
+        return trigger, clear & ~trigger
+
+
+class _RuleState:
+    # Per-rule alert state, one slot per (source, appliance) key
+    def __init__(self, change_fields):
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.index = pd.Index(self.keys)
+        self.active = np.zeros(0, dtype=bool)
+        self.cleared_at = np.zeros(0)
+        self.last = {field: np.zeros(0) for field in change_fields}
+
+
+    def slots(self, keys):
+        slots = self.index.get_indexer(keys)
+        missing = slots < 0
+        if missing.any():
+            new_keys = np.unique(keys[missing])
+            self.keys = np.concatenate([self.keys, new_keys])
+            self.index = pd.Index(self.keys)
+            self.active = np.concatenate([self.active, np.zeros(len(new_keys), dtype=bool)])
+            self.cleared_at = np.concatenate([self.cleared_at, np.full(len(new_keys), -np.inf)])
+            for field in self.last:
+                self.last[field] = np.concatenate([self.last[field], np.full(len(new_keys), np.nan)])
+            slots = self.index.get_indexer(keys)
+        return slots
+
+
 class AlertSystem:
-    def __init__(self):
-        self.active_alerts = []
+    def __init__(self, rules=None, cooldown=None):
+        self.rules = [AlertRule(spec) for spec in (rules if rules is not None else EnergyConfig.ALERT_RULES)]
+        self.cooldown = EnergyConfig.ALERT_COOLDOWN if cooldown is None else cooldown
+        # Alerts currently raised, keyed on (rule, source, appliance)
+        self.active_alerts = {}
+        self.stats = {'readings': 0, 'raised': 0, 'suppressed': 0, 'cleared': 0}
+        self._states = {rule.name: _RuleState(rule.change_fields) for rule in self.rules}
+        self._names = {}
+        self._name_list = []
+        self._next_id = 0
 
 
     def check_thresholds(self, current_energy, appliance_usage, building_data):
-        alerts = []
-       
-        if current_energy >= EnergyConfig.CRITICAL_THRESHOLD:
-            alerts.append(f'CRITICAL: Energy consumption {current_energy:.1f} kWh exceeds critical threshold!')
-        elif current_energy >= EnergyConfig.HIGH_THRESHOLD:
-            alerts.append(f'HIGH: Energy consumption {current_energy:.1f} kWh above high threshold')
-           
-        for appliance, power in appliance_usage.items():
-            if power > 0:
-                if "AC" in appliance and building_data['Occupancy'] < 20:
-                    alerts.append(f'AC running in low occupancy: {appliance}')
-                if "Lights" in appliance and building_data['Occupancy'] < 10:
-                    alerts.append(f'Lights on in empty area: {appliance}')
-                   
-        if building_data['Temperature'] > 32:
-            alerts.append(f'High temperature ({building_data["Temperature"]:.1f}C) increasing AC load')
+        # Stateless check of a single reading: every rule that currently holds
+        return self.check_batch(*self.single_reading(current_energy, appliance_usage, building_data))[0]
+
+
+    @staticmethod
+    def single_reading(current_energy, appliance_usage, building_data):
+        # One reading and its appliance usage in the column layout evaluate() takes
+        readings = {key: [value] for key, value in building_data.items()}
+        readings['energy'] = [current_energy]
+        appliances = {
+            'reading': np.zeros(len(appliance_usage), dtype=np.int64),
+            'name': list(appliance_usage),
+            'type': [EnergyConfig.APPLIANCE_TYPES[appliance_type(name)] for name in appliance_usage],
+            'power': list(appliance_usage.values())
+        }
+        return readings, appliances
+
+
+    @METRICS.latency('alert_check')
+    def check_batch(self, readings, appliances=None):
+        # Stateless: messages of every rule that holds, one list per reading.
+        # '_change' rules never hold here, there is no previous reading.
+        columns, n_rows = self._columns(readings)
+        appliance_columns = self._appliance_columns(appliances, columns)
+        hits = []
+        for rule in self.rules:
+            rule_columns, rows, running = self._rule_inputs(rule, columns, n_rows, appliance_columns)
+            trigger, _ = rule.evaluate(rule_columns, len(rows), running)
+            for i in np.flatnonzero(trigger):
+                hits.append((rows[i], self._format(rule, rule_columns, i)))
+               
+        messages = [[] for _ in range(n_rows)]
+        for row, message in hits:
+            messages[row].append(message)
+        return messages
+
+
+    @METRICS.latency('alert_evaluate')
+    def evaluate(self, readings, appliances=None, now=None, messages=False):
+        # Stateful batch evaluation with hysteresis and cooldown.
+        # readings: DataFrame or dict of arrays with 'energy' plus sensor fields, and
+        #   optionally 'source' (building/device id) and 'timestamp'.
+        # appliances: dict of arrays 'reading' (row in readings), 'name', 'type', 'power'.
+        # Returns the newly raised alerts (dashboard records) and the ids cleared; with
+        # messages=True also 'messages', one list per reading of every rule that holds
+        # for it (check_batch's, plus '_change' rules against the previous reading).
+        columns, n_rows = self._columns(readings)
+        if n_rows == 0:
+            report = {'raised': [], 'cleared': [], 'active': len(self.active_alerts)}
+            return {**report, 'messages': []} if messages else report
+        timestamps = self._timestamps(columns, n_rows, now)
+        sources = np.asarray(columns['source']) if 'source' in columns else np.full(n_rows, 'campus', dtype=object)
+        source_ids = self._intern(sources)
+        appliance_columns = self._appliance_columns(appliances, columns)
+        self.stats['readings'] += n_rows
+       
+        raised, cleared = [], []
+        reading_messages = [[] for _ in range(n_rows)] if messages else None
+        for rule in self.rules:
+            rule_columns, rows, running = self._rule_inputs(rule, columns, n_rows, appliance_columns)
+            if len(rows) == 0:
+                continue
+            keys = source_ids[rows].astype(np.int64) << 32
+            if rule.appliance:
+                keys |= self._intern(np.asarray(appliance_columns['name'])[rule_columns['_appliance_row']])
+            order, trigger, rule_columns = self._apply_rule(rule, rule_columns, keys, sources[rows], timestamps[rows],
+                                                            running, raised, cleared)
+            if messages:
+                for i in np.flatnonzero(trigger):
+                    reading_messages[rows[order[i]]].append(self._format(rule, rule_columns, i))
+           
+        raised.sort(key=lambda alert: alert['timestamp'])
+        report = {'raised': raised, 'cleared': cleared, 'active': len(self.active_alerts)}
+        return {**report, 'messages': reading_messages} if messages else report
+
+
+    def _apply_rule(self, rule, columns, keys, sources, timestamps, running, raised, cleared):
+        state = self._states[rule.name]
+        slots = state.slots(keys)
+       
+        # Readings of the same key are applied in time order
+        order = np.lexsort((timestamps, slots))
+        slots, times = slots[order], timestamps[order]
+        columns = {name: np.asarray(values)[order] for name, values in columns.items()}
+        running = running[order] if running is not None else None
+        n = len(slots)
+        positions = np.arange(n)
+        first = np.r_[True, slots[1:] != slots[:-1]]
+        last = np.r_[slots[1:] != slots[:-1], True]
+        group_start = np.maximum.accumulate(np.where(first, positions, 0))
+       
+        for field in rule.change_fields:
+            values = np.asarray(columns[field], dtype=float)
+            previous = np.r_[np.nan, values[:-1]]
+            previous[first] = state.last[field][slots[first]]
+            columns[field + '_change'] = values - previous
+            state.last[field][slots[last]] = values[last]
+           
+        trigger, clear = rule.evaluate(columns, n, running)
+       
+        # Active after each reading = outcome of the latest trigger/clear event of its key
+        latest_event = np.maximum.accumulate(np.where(trigger | clear, positions, -1))
+        has_event = latest_event >= group_start
+        active = np.where(has_event, trigger[np.maximum(latest_event, 0)], state.active[slots])
+        was_active = np.r_[False, active[:-1]]
+        was_active[first] = state.active[slots[first]]
+        raise_rows = active & ~was_active
+        clear_rows = was_active & ~active
+       
+        # Cooldown: time of the key's latest clear before each reading
+        latest_clear = np.r_[-1, np.maximum.accumulate(np.where(clear_rows, positions, -1))[:-1]]
+        cleared_at = np.where(latest_clear >= group_start, times[np.maximum(latest_clear, 0)], state.cleared_at[slots])
+        suppressed = raise_rows & (times - cleared_at < self.cooldown)
+       
+        started_active = state.active[slots]
+        state.active[slots[last]] = active[last]
+        cleared_groups = np.maximum.accumulate(np.where(clear_rows, positions, -1))
+        has_clear = last & (cleared_groups >= group_start)
+        state.cleared_at[slots[has_clear]] = times[cleared_groups[has_clear]]
+       
+        emit = raise_rows & ~suppressed
+        self.stats['raised'] += int(emit.sum())
+        self.stats['suppressed'] += int(suppressed.sum())
+        self.stats['cleared'] += int(clear_rows.sum())
+       
+        # Messages are built only for alerts that are sent, plus one record per key
+        # left active by a suppressed raise
+        sent = {}
+        for i in np.flatnonzero(emit):
+            alert = self._record(rule, columns, i, sources[order[i]], times[i])
+            raised.append(alert)
+            sent.setdefault(slots[i], []).append((i, alert))
            
-        return alerts
+        # Keys that hold or need a record: active before or after, or sent an alert
+        latest_raise = np.maximum.accumulate(np.where(raise_rows, positions, -1))
+        latest_change = np.maximum.accumulate(np.where(raise_rows | clear_rows, positions, -1))
+        latest_emit = np.maximum.accumulate(np.where(emit, positions, -1))
+        touched = (latest_change >= group_start) & (started_active | active | (latest_emit >= group_start))
+        for i in np.flatnonzero(last & touched):
+            key = (rule.name, sources[order[i]], columns['_appliance_name'][i] if rule.appliance else None)
+            # A key that was active has been cleared at least once in this batch
+            previous = self.active_alerts.pop(key, None)
+            if previous is not None:
+                cleared.append(previous['id'])
+            alerts = sent.get(slots[i], [])
+            if active[i]:
+                row = latest_raise[i]
+                if alerts and alerts[-1][0] == row:
+                    self.active_alerts[key] = alerts.pop()[1]
+                else:
+                    self.active_alerts[key] = self._record(rule, columns, row, key[1], times[row])
+            cleared.extend(alert['id'] for _, alert in alerts)
+        # Readings in the order applied, whether each triggered the rule, and their columns
+        return order, trigger, columns
+
+
+    def _record(self, rule, columns, i, source, timestamp):
+        # Alert in the shape AlertCard.jsx renders
+        alert = {
+            'id': f"alert-{self._next_id}",
+            'type': rule.level,
+            'rule': rule.name,
+            'title': rule.title,
+            'message': self._format(rule, columns, i),
+            'source': source,
+            'timestamp': pd.Timestamp(round(timestamp * 1e6), unit='us').isoformat()
+        }
+        self._next_id += 1
+        return alert
+
+
+    def _columns(self, readings):
+        if isinstance(readings, pd.DataFrame):
+            columns = {name: readings[name].to_numpy() for name in readings.columns}
+        else:
+            columns = {name: np.asarray(values) for name, values in readings.items()}
+        if 'energy' not in columns:
+            raise ValueError("readings need an 'energy' column")
+        return columns, len(columns['energy'])
+
+
+    def _appliance_columns(self, appliances, columns):
+        if appliances is None:
+            return None
+        appliance_columns = {name: np.asarray(values) for name, values in appliances.items()}
+        return appliance_columns if len(appliance_columns['reading']) else None
+
+
+    def _rule_inputs(self, rule, columns, n_rows, appliance_columns):
+        # Building rules see one row per reading; appliance rules one row per
+        # appliance of the rule's type, with its reading's fields
+        if not rule.appliance:
+            return columns, np.arange(n_rows), None
+        if appliance_columns is None:
+            return {}, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+        selected = np.flatnonzero(appliance_columns['type'] == rule.type_code)
+        rows = appliance_columns['reading'][selected].astype(np.int64)
+        rule_columns = {name: values[rows] for name, values in columns.items()}
+        rule_columns['_appliance_row'] = selected
+        rule_columns['_appliance_name'] = appliance_columns['name'][selected]
+        return rule_columns, rows, appliance_columns['power'][selected] > 0
+
+
+    def _timestamps(self, columns, n_rows, now):
+        # Seconds on one scale for every path: naive datetimes (the server's and
+        # the monitoring cycle's datetime.now()) count as wall-clock time and are
+        # rendered back as the same wall-clock time in _record; aware ones as UTC
+        if 'timestamp' in columns:
+            values = columns['timestamp']
+            if np.issubdtype(values.dtype, np.number):
+                return values.astype(float)
+            return self._seconds(values)
+        return np.full(n_rows, self._seconds([now or datetime.now()])[0])
+
+
+    @staticmethod
+    def _seconds(values):
+        times = pd.to_datetime(pd.Series(values))
+        if times.dt.tz is not None:
+            times = times.dt.tz_convert(None)
+        return times.to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+
+
+    def _intern(self, names):
+        # Stable integer id per source/appliance name
+        codes, uniques = pd.factorize(names)
+        ids = np.empty(len(uniques), dtype=np.int64)
+        for i, name in enumerate(uniques):
+            if name not in self._names:
+                self._names[name] = len(self._name_list)
+                self._name_list.append(name)
+            ids[i] = self._names[name]
+        return ids[codes]
+
+
+    @staticmethod
+    def _format(rule, columns, i):
+        values = {field: columns[source][i] for field, source in rule.message_fields}
+        return rule.message.format(**values)
 
 
 class CarbonAnalyzer:
@@ -478,45 +3536,143 @@ class CostAnalyzer:
 
 
 class EnergyMonitoringSystem:
-    def __init__(self, data_file_path):
+    def __init__(self, data_file_path, warm_start=True):
         print("Initializing Energy Monitoring System...")
-        self.model_comparator, self.preprocessor, self.comparison_results = train_energy_models(data_file_path)
+        self.data_file_path = data_file_path
+        self.comparison_results = None
+        self.retrain_thread = None
+        self.model_comparator, self.preprocessor, is_fresh = None, None, False
+       
+        if warm_start:
+            self.model_comparator, self.preprocessor, is_fresh = load_energy_models(data_file_path)
+           
+        if self.model_comparator is None:
+            self.model_comparator, self.preprocessor, self.comparison_results = train_energy_models(data_file_path)
+            is_fresh = True
        
         if self.model_comparator is None or self.model_comparator.best_model is None:
             print("System initialization failed")
             return
            
         self.iot_monitor = IoTEnergyMonitor(self.model_comparator, self.preprocessor)
+        self.iot_monitor.watch_artifacts(self._reload_artifacts)
         self.alert_system = AlertSystem()
         self.carbon_analyzer = CarbonAnalyzer()
         self.cost_analyzer = CostAnalyzer()
         self.iot_monitor.register_appliances()
+       
+        # Stale artifacts keep serving while a fresh set is trained in the background
+        if not is_fresh:
+            print("Saved models are stale")
+            self.start_background_retrain()
         print("System initialized successfully")
 
 
-    def run_monitoring_cycle(self):
+    def update_from_live_data(self, file_path="live_data.csv"):
+        # Fold labelled live readings into the serving model; retrain on drift
+        if not EnergyConfig.LIVE_LOAD_SCALE:
+            print("Online update skipped: no live series is calibrated to building kWh (EnergyConfig.LIVE_LOAD_SCALE)")
+            return {'rows': 0, 'updated': False, 'retrain': False, 'reason': "no calibrated live series"}
+        readings, energies = load_live_readings(file_path)
+        if not hasattr(self, 'online_updater') or self.online_updater.iot_monitor is not self.iot_monitor:
+            self.online_updater = OnlineModelUpdater(self.iot_monitor)
+           
+        report = self.online_updater.update(readings, energies)
+        if report['updated']:
+            print(f"Online update: {report['rows']} rows, RMSE {report['rmse']:.2f} -> {report['rmse_after']:.2f} "
+                  f"in {report['seconds']:.2f}s")
+        elif report['retrain']:
+            print(f"Online update skipped, full retrain needed: {report['reason']}")
+            self.start_background_retrain()
+        else:
+            print(f"Online update skipped: {report['reason']}")
+        return report
+
+
+    def start_background_retrain(self):
+        if self.retrain_thread is not None and self.retrain_thread.is_alive():
+            return self.retrain_thread
+           
+        print("Retraining in background...")
+        self.retrain_thread = threading.Thread(target=self._retrain, name="energy-retrain", daemon=True)
+        self.retrain_thread.start()
+        return self.retrain_thread
+
+
+    def _retrain(self):
+        # This retrain rewrites the artifacts, so they are not watched meanwhile
+        self.iot_monitor.artifact_watch = None
+        try:
+            self._retrain_and_swap()
+        finally:
+            self.iot_monitor.watch_artifacts(self._reload_artifacts)
+
+
+    def _retrain_and_swap(self):
+        try:
+            model_comparator, preprocessor, comparison_results = train_energy_models(self.data_file_path)
+        except Exception as e:
+            print(f"Background retrain failed: {e}")
+            return
+           
+        if model_comparator is None or model_comparator.best_model is None:
+            print("Background retrain produced no model, keeping current one")
+            return
+           
+        self.model_comparator, self.preprocessor = model_comparator, preprocessor
+        self.comparison_results = comparison_results
+        self.iot_monitor.set_models(model_comparator, preprocessor)
+        print(f"Background retrain finished, now using {model_comparator.best_model}")
+
+
+    def _reload_artifacts(self):
+        # The saved artifacts changed on disk: serve them instead of the models
+        # (and cached predictions) loaded before
+        model_comparator, preprocessor, _ = load_energy_models(self.data_file_path)
+        if model_comparator is None or model_comparator.best_model is None:
+            print("Changed artifacts are not loadable yet, keeping current models")
+            return False
+        self.model_comparator, self.preprocessor = model_comparator, preprocessor
+        self.iot_monitor.set_models(model_comparator, preprocessor)
+        print(f"Reloaded changed artifacts, now using {model_comparator.best_model}")
+        return True
+
+
+    def run_monitoring_cycle(self, building_data=None, appliance_usage=None):
+        # Simulated sensors unless a reading is given (e.g. by the scenario load
+        # generator in energy_scenarios.py)
         if not hasattr(self, 'iot_monitor') or self.iot_monitor.best_model is None:
             print("System not properly initialized")
             return None
            
-        building_data, appliance_usage = self.iot_monitor.simulate_iot_sensors()
-        current_energy = self.iot_monitor.predict_energy(building_data)
-       
-        self.iot_monitor.energy_history.append({
-            'timestamp': datetime.now(),
-            'energy': current_energy,
-            'temperature': building_data['Temperature']
-        })
-       
-        alerts = self.alert_system.check_thresholds(current_energy, appliance_usage, building_data)
-        carbon_impact = self.carbon_analyzer.calculate_carbon_impact(current_energy)
-        daily_cost, monthly_cost, annual_cost = self.cost_analyzer.calculate_costs(current_energy)
+        memory = EnergyConfig.PROFILE_MONITOR_MEMORY
+        with METRICS.stage('monitor.cycle', memory):
+            if building_data is None:
+                with METRICS.stage('monitor.sensors', memory):
+                    building_data, appliance_usage = self.iot_monitor.simulate_iot_sensors()
+            appliance_usage = appliance_usage or {}
+            with METRICS.stage('monitor.predict', memory):
+                current_energy = self.iot_monitor.predict_energy(building_data)
+           
+            with METRICS.stage('monitor.history', memory):
+                self.iot_monitor.energy_history.append(datetime.now(), current_energy, building_data['Temperature'])
+           
+            # Only alerts that were not already raised are reported
+            with METRICS.stage('monitor.alerts', memory):
+                alert_report = self.alert_system.evaluate(
+                    *self.alert_system.single_reading(current_energy, appliance_usage, building_data)
+                )
+                alerts = [alert['message'] for alert in alert_report['raised']]
+            with METRICS.stage('monitor.analysis', memory):
+                carbon_impact = self.carbon_analyzer.calculate_carbon_impact(current_energy)
+                daily_cost, monthly_cost, annual_cost = self.cost_analyzer.calculate_costs(current_energy)
        
         return {
             'building_data': building_data,
             'appliance_usage': appliance_usage,
             'current_energy': current_energy,
             'alerts': alerts,
+            'active_alerts': alert_report['active'],
             'carbon_impact': carbon_impact,
             'daily_cost': daily_cost,
             'monthly_cost': monthly_cost,
@@ -558,6 +3714,8 @@ def main():
             print("Alerts:")
             for alert in results['alerts']:
                 print(f" - {alert}")
+        elif results['active_alerts']:
+            print(f"No new alerts ({results['active_alerts']} still active)")
         else:
             print("No alerts")
            
@@ -566,8 +3724,9 @@ def main():
         print(f"Monthly Cost: ${results['monthly_cost']:.2f}")
        
         if cycle < 2:
-            import time
             time.sleep(2)
+           
+    print(f"\nStage metrics saved to {METRICS.dump_json()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,362 @@
+#===========================================================================
+# ROLLUP STORE
+# Hour, day and month aggregates of energy (sum, peak reading, count),
+# cost (CostAnalyzer) and CO2 (CarbonAnalyzer) per group - building,
+# department, device or the whole campus - for the dashboard charts
+# (HistoricalChart.jsx, CostAnalysisPie.jsx, SummaryCard.jsx). Filled in
+# bulk from the hourly CSV and incrementally as readings arrive; range
+# totals come from prefix sums and range peaks from at most a few hundred
+# month/day/hour buckets, so no query rescans raw readings. Every reading
+# is an estimate of its whole hour's kWh (an hourly CSV row, or a model
+# prediction for a device that posts many times an hour), so an hour's
+# energy is the mean of its readings, not their sum. Device series are
+# building-scale estimates of energy the groups already count, so they are
+# kept apart in store.devices and never added into the totals.
+#
+#   python energy_rollup.py --level day --start 2022-01-01 --end 2023-01-01
+#===========================================================================
+
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from energy_model_training import CarbonAnalyzer, CostAnalyzer, EnergyDataPreprocessor
+
+
+# Bucket resolution of each level, as a numpy datetime64 unit
+ROLLUP_LEVELS = {'hour': 'h', 'day': 'D', 'month': 'M'}
+
+ROLLUP_COLUMNS = ('energy', 'count', 'cost', 'co2')
+
+# Hour buckets also keep the sum of their readings, which the hour's mean comes from
+HOUR_COLUMNS = ROLLUP_COLUMNS + ('reading_sum',)
+
+
+def _bucket(hours, unit):
+    # Hour numbers (hours since the epoch) -> bucket numbers of `unit`
+    return (np.datetime64(0, 'h') + np.asarray(hours, dtype=np.int64).astype('timedelta64[h]')).astype(
+        f'datetime64[{unit}]').astype(np.int64)
+
+
+def _first_hour(buckets, unit):
+    # Bucket numbers of `unit` -> hour number each bucket starts at
+    return (np.datetime64(0, unit) + np.asarray(buckets, dtype=np.int64).astype(f'timedelta64[{unit}]')).astype(
+        'datetime64[h]').astype(np.int64)
+
+
+def _hour_number(timestamp):
+    return int(np.datetime64(pd.Timestamp(timestamp).floor('h').to_datetime64(), 'h').astype(np.int64))
+
+
+class _RollupLevel:
+    # Dense per-bucket arrays for one resolution, from bucket number `origin` on.
+    # Prefix sums are rebuilt lazily, only from the first bucket that changed, so
+    # appending readings at the end keeps queries cheap.
+    def __init__(self, unit, columns=ROLLUP_COLUMNS):
+        self.unit = unit
+        self.origin = None
+        self.size = 0
+        self.columns = {col: np.zeros(0) for col in columns}
+        self.peak = np.zeros(0)
+        self.prefix = {col: np.zeros(1) for col in columns}
+        self.dirty_from = 0
+
+
+    def cover(self, lo, hi):
+        # Make room for buckets [lo, hi), with headroom at the end where new readings land
+        if self.origin is None:
+            self.origin = lo
+        front = max(0, self.origin - lo)
+        size = max(self.size, hi - self.origin) + front
+        if front == 0 and size <= len(self.peak):
+            self.size = size
+            return
+        capacity = max(size, 2 * len(self.peak)) if front == 0 else size + len(self.peak)
+        for col in self.columns:
+            grown = np.zeros(capacity)
+            grown[front:front + self.size] = self.columns[col][:self.size]
+            self.columns[col] = grown
+        grown = np.full(capacity, -np.inf)
+        grown[front:front + self.size] = self.peak[:self.size]
+        self.peak = grown
+        self.origin -= front
+        self.size = size
+        self.dirty_from = 0
+
+
+    def clip(self, lo, hi):
+        # Bucket numbers [lo, hi) -> array offsets inside the stored range
+        if self.origin is None:
+            return 0, 0
+        a = min(max(lo - self.origin, 0), self.size)
+        b = min(max(hi - self.origin, 0), self.size)
+        return a, max(a, b)
+
+
+    def range_sum(self, col, lo, hi):
+        a, b = self.clip(lo, hi)
+        prefix = self._prefix(col)
+        return float(prefix[b] - prefix[a])
+
+
+    def range_peak(self, lo, hi):
+        a, b = self.clip(lo, hi)
+        return float(self.peak[a:b].max()) if b > a else -np.inf
+
+
+    def _prefix(self, col):
+        if self.dirty_from < self.size or len(self.prefix[col]) != self.size + 1:
+            for name in self.columns:
+                start = min(self.dirty_from, len(self.prefix[name]) - 1)
+                prefix = np.empty(self.size + 1)
+                prefix[:start + 1] = self.prefix[name][:start + 1]
+                prefix[start + 1:] = prefix[start] + np.cumsum(self.columns[name][start:self.size])
+                self.prefix[name] = prefix
+            self.dirty_from = self.size
+        return self.prefix[col]
+
+
+class RollupStore:
+    def __init__(self, with_devices=True):
+        self.groups = {}  # group -> {level: _RollupLevel}
+        self.readings = 0
+        # Per-device rollups (same queries, group = device name), outside the totals
+        self.devices = RollupStore(with_devices=False) if with_devices else None
+
+
+    @classmethod
+    def from_csv(cls, file_path, target_column='EnergyConsumption', group_column='Building'):
+        # Bulk load hourly Date + Hour rows; files without the group column
+        # (like the JIIT data) are one group, 'campus'
+        data = pd.read_csv(file_path)
+        data.columns = EnergyDataPreprocessor._clean_column_names(data.columns)
+        timestamps = pd.to_datetime(data['Date'])
+        if 'Hour' in data.columns:
+            timestamps = timestamps + pd.to_timedelta(data['Hour'], unit='h')
+        energy = pd.to_numeric(data[target_column], errors='coerce').fillna(0).to_numpy()
+
+        store = cls()
+        if group_column in data.columns:
+            for group, rows in data.groupby(group_column).indices.items():
+                store.add(timestamps.iloc[rows], energy[rows], str(group))
+        else:
+            store.add(timestamps, energy)
+        return store
+
+
+    def add(self, timestamps, energy_kwh, group='campus'):
+        # A batch of readings (any order, any time range) for one group
+        energy = np.asarray(energy_kwh, dtype=float)
+        if len(energy) == 0:
+            return
+        hours = pd.to_datetime(pd.Series(timestamps)).to_numpy().astype('datetime64[h]').astype(np.int64)
+        valid = ~np.isnan(energy)
+        hours, energy = hours[valid], energy[valid]
+        if len(energy) == 0:
+            return
+
+        levels = self.groups.get(group)
+        if levels is None:
+            levels = self.groups[group] = {name: _RollupLevel(unit) for name, unit in ROLLUP_LEVELS.items()}
+            levels['hour'] = _RollupLevel(ROLLUP_LEVELS['hour'], HOUR_COLUMNS)
+
+        # Hour buckets take the readings and price the mean of each touched hour;
+        # peaks at every level are the largest single reading
+        lo, hi = int(hours.min()), int(hours.max()) + 1
+        hourly = levels['hour']
+        hourly.cover(lo, hi)
+        offsets = hours - hourly.origin
+        columns = hourly.columns
+        columns['reading_sum'][:hourly.size] += np.bincount(offsets, weights=energy, minlength=hourly.size)
+        columns['count'][:hourly.size] += np.bincount(offsets, minlength=hourly.size)
+        touched = np.unique(offsets)
+        mean = columns['reading_sum'][touched] / columns['count'][touched]
+        columns['energy'][touched] = mean
+        columns['cost'][touched] = CostAnalyzer.calculate_costs(mean)[0]
+        columns['co2'][touched] = CarbonAnalyzer.calculate_carbon_impact(mean)
+        np.maximum.at(hourly.peak, offsets, energy)
+        hourly.dirty_from = min(hourly.dirty_from, lo - hourly.origin)
+
+        self._roll_up(levels, lo, hi)
+        self.readings += len(energy)
+
+
+    def add_reading(self, timestamp, energy_kwh, group='campus'):
+        self.add([timestamp], [energy_kwh], group)
+
+
+    def _roll_up(self, levels, lo_hour, hi_hour):
+        # Recompute the day and month buckets that overlap [lo_hour, hi_hour) from
+        # the hour buckets
+        hourly = levels['hour']
+        for name in ('day', 'month'):
+            unit = ROLLUP_LEVELS[name]
+            lo, hi = int(_bucket(lo_hour, unit)), int(_bucket(hi_hour - 1, unit)) + 1
+            a, b = hourly.clip(int(_first_hour(lo, unit)), int(_first_hour(hi, unit)))
+            level = levels[name]
+            level.cover(lo, hi)
+            start, stop = lo - level.origin, hi - level.origin
+            offsets = _bucket(np.arange(a, b) + hourly.origin, unit) - lo
+
+            for col in ROLLUP_COLUMNS:
+                level.columns[col][start:stop] = np.bincount(
+                    offsets, weights=hourly.columns[col][a:b], minlength=stop - start
+                )
+            peak = np.full(stop - start, -np.inf)
+            np.maximum.at(peak, offsets, hourly.peak[a:b])
+            level.peak[start:stop] = peak
+            level.dirty_from = min(level.dirty_from, start)
+
+
+    #-----------------------------------------------------------------------
+    # Queries
+    #-----------------------------------------------------------------------
+
+
+    def series(self, start, end, level='day', group='campus'):
+        # One row per `level` bucket overlapping [start, end), for charts
+        unit = ROLLUP_LEVELS[level]
+        lo = int(_bucket(_hour_number(start), unit))
+        hi = int(_bucket(_hour_number(end) - 1, unit)) + 1
+        levels = self.groups.get(group)
+        if levels is None:
+            return pd.DataFrame(columns=['time', 'energy', 'peak', 'count', 'cost', 'co2'])
+
+        rollup = levels[level]
+        a, b = rollup.clip(lo, hi)
+        count = rollup.columns['count'][a:b]
+        return pd.DataFrame({
+            'time': np.datetime64(0, unit) + (np.arange(a, b) + rollup.origin).astype(f'timedelta64[{unit}]'),
+            'energy': rollup.columns['energy'][a:b],
+            'peak': np.where(count > 0, rollup.peak[a:b], np.nan),
+            'count': count.astype(np.int64),
+            'cost': rollup.columns['cost'][a:b],
+            'co2': rollup.columns['co2'][a:b]
+        })
+
+
+    def totals(self, start, end, group=None):
+        # Energy, cost, CO2, reading count and peak reading over [start, end) for one
+        # group, or for all groups when group is None
+        lo, hi = _hour_number(start), _hour_number(end)
+        groups = list(self.groups) if group is None else [group]
+        result = {'energy': 0.0, 'count': 0, 'cost': 0.0, 'co2': 0.0}
+        peak = -np.inf
+        for name in groups:
+            levels = self.groups.get(name)
+            if levels is None:
+                continue
+            hourly = levels['hour']
+            result['energy'] += hourly.range_sum('energy', lo, hi)
+            result['count'] += int(round(hourly.range_sum('count', lo, hi)))
+            result['cost'] += hourly.range_sum('cost', lo, hi)
+            result['co2'] += hourly.range_sum('co2', lo, hi)
+            peak = max(peak, self._range_peak(levels, lo, hi))
+        result['peak'] = float(peak) if np.isfinite(peak) else None
+        return result
+
+
+    def breakdown(self, start, end):
+        # Per-group totals, e.g. the slices of the cost pie chart
+        return {group: self.totals(start, end, group) for group in self.groups}
+
+
+    @staticmethod
+    def _range_peak(levels, lo, hi):
+        # Whole months, then whole days, then the leftover hours at either end
+        hourly, daily, monthly = levels['hour'], levels['day'], levels['month']
+        day_lo, day_hi = -(-lo // 24), hi // 24
+        if day_lo >= day_hi:
+            return hourly.range_peak(lo, hi)
+        peak = max(hourly.range_peak(lo, day_lo * 24), hourly.range_peak(day_hi * 24, hi))
+
+        month_lo = int(_bucket((day_lo - 1) * 24, 'M')) + 1
+        month_hi = int(_bucket(day_hi * 24, 'M'))
+        if month_lo >= month_hi:
+            return max(peak, daily.range_peak(day_lo, day_hi))
+        first_day = int(_first_hour(month_lo, 'M')) // 24
+        last_day = int(_first_hour(month_hi, 'M')) // 24
+        return max(peak, daily.range_peak(day_lo, first_day), monthly.range_peak(month_lo, month_hi),
+                   daily.range_peak(last_day, day_hi))
+
+
+    #-----------------------------------------------------------------------
+    # Dashboard shapes
+    #-----------------------------------------------------------------------
+
+
+    def chart_records(self, start, end, level='day', group='campus'):
+        # HistoricalChart.jsx rows
+        frame = self.series(start, end, level, group)
+        return [
+            {'date': str(row.time.date() if level != 'hour' else row.time), 'total': round(row.energy, 2),
+             'peak': None if pd.isna(row.peak) else round(row.peak, 2),
+             'cost': round(row.cost, 2), 'co2': round(row.co2, 2)}
+            for row in frame.itertuples(index=False)
+        ]
+
+
+    def summary(self, start, end):
+        # SummaryCard.jsx / CostAnalysisPie.jsx: campus totals plus a slice per group,
+        # and each device's own estimate (not part of the total)
+        rounded = lambda totals: {key: round(value, 2) if isinstance(value, float) else value
+                                  for key, value in totals.items()}
+        summary = {
+            'total': rounded(self.totals(start, end)),
+            'groups': {group: rounded(totals) for group, totals in self.breakdown(start, end).items()}
+        }
+        if self.devices is not None and self.devices.groups:
+            summary['devices'] = {device: rounded(totals)
+                                  for device, totals in self.devices.breakdown(start, end).items()}
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-aggregated energy, cost and CO2 rollups")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--group-column', default='Building')
+    parser.add_argument('--level', choices=list(ROLLUP_LEVELS), default='month')
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--output', default=None, help="write the chart rows and summary as JSON")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    store = RollupStore.from_csv(args.data, group_column=args.group_column)
+    print(f"Loaded {store.readings} readings into {len(store.groups)} group(s) "
+          f"in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+    hourly = next(iter(store.groups.values()))['hour']
+    first = np.datetime64(hourly.origin, 'h')
+    start = pd.Timestamp(args.start) if args.start else pd.Timestamp(first)
+    end = pd.Timestamp(args.end) if args.end else pd.Timestamp(first + hourly.size)
+
+    start_time = time.perf_counter()
+    records = {group: store.chart_records(start, end, args.level, group) for group in store.groups}
+    summary = store.summary(start, end)
+    elapsed = (time.perf_counter() - start_time) * 1000
+
+    print(f"\n{args.level.title()} rollup {start} -> {end} ({elapsed:.2f} ms)")
+    for group, rows in records.items():
+        print(f"\n{group}:")
+        for row in rows[:24]:
+            print(f"  {row['date']:<20} {row['total']:>12,.1f} kWh  peak {row['peak'] or 0:>7.1f}  "
+                  f"Rs.{row['cost']:>12,.0f}  {row['co2']:>10,.0f} kg CO2")
+        if len(rows) > 24:
+            print(f"  ... {len(rows) - 24} more rows")
+    total = summary['total']
+    print(f"\nTotal: {total['energy']:,.1f} kWh, Rs.{total['cost']:,.0f}, {total['co2']:,.0f} kg CO2, "
+          f"peak reading {total['peak']} kWh over {total['count']} readings")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'records': records, 'summary': summary}, f, indent=2, default=str)
+        print(f"Saved rollups to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
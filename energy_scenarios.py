@@ -0,0 +1,425 @@
+#===========================================================================
+# SCENARIO SIMULATOR
+# Monte Carlo capacity and cost planning on the trained model. A seeded
+# NumPy Generator draws building-hour scenarios in vectorized blocks of
+# whole 30-day months: weather, occupancy, HVAC/lighting use and the
+# academic calendar follow the hour-of-day, month and calendar patterns of
+# the historical data, and every appliance of EnergyConfig.APPLIANCE_PROFILES
+# (plus any added in a what-if) is switched on and drawn from its power
+# range. IoTEnergyMonitor.predict_batch predicts each hour's energy,
+# CostAnalyzer / CarbonAnalyzer price the months, and the result is the
+# distribution of hourly load, monthly peak load, energy, cost and CO2.
+# What-ifs (added appliances, warmer weather, more occupancy) reuse the
+# baseline's random draws, so the difference is the change itself.
+# --load-test instead feeds the scenarios to the monitoring path back to
+# back, without the demo's sleeps, and reports its throughput.
+#
+#   python energy_scenarios.py --scenarios 1000000 --add AC=50
+#   python energy_scenarios.py --load-test --seconds 10 --batch-size 256
+#===========================================================================
+
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from energy_model_training import (
+    METRICS, CarbonAnalyzer, CostAnalyzer, EnergyConfig, EnergyMonitoringSystem, appliance_type
+)
+
+
+# A simulated month is 30 days of hours, like CostAnalyzer's monthly cost
+DAYS_PER_MONTH = 30
+HOURS_PER_MONTH = DAYS_PER_MONTH * 24
+# Months drawn per vectorized block; blocks are seeded by position, so the
+# first months of a run are the same whatever the run's length
+BLOCK_MONTHS = 64
+# Added appliances are drawn this many units at a time
+UNIT_CHUNK = 64
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+# Share of a reading's deviation from its hourly mean that the whole day shares
+# (a hot day is hot all day), the rest is hour-to-hour noise
+DAY_WEATHER_SHARE = 0.8
+
+# Chance an appliance runs: (building flag it follows, with the flag set, without);
+# Computers follow occupancy and other types run half the time
+APPLIANCE_DUTY = {'AC': ('HVACUsage', 0.9, 0.05), 'Lights': ('LightingUsage', 0.9, 0.05)}
+OTHER_DUTY = 0.5
+
+QUANTILES = {'p5': 0.05, 'p50': 0.5, 'p95': 0.95, 'p99': 0.99}
+
+
+def distribution(values):
+    values = np.asarray(values, dtype=float)
+    summary = {'mean': float(values.mean()), 'min': float(values.min()), 'max': float(values.max())}
+    summary.update(zip(QUANTILES, np.quantile(values, list(QUANTILES.values())).tolist()))
+    return summary
+
+
+def _grid_stats(values, index, size):
+    # Mean and std of values per cell of a flattened grid; empty cells get the overall figures
+    ok = ~np.isnan(values)
+    values, index = values[ok], index[ok]
+    count = np.bincount(index, minlength=size)
+    mean = np.where(count > 0, np.bincount(index, weights=values, minlength=size) / np.maximum(count, 1), values.mean())
+    square = np.bincount(index, weights=values ** 2, minlength=size) / np.maximum(count, 1)
+    std = np.sqrt(np.maximum(np.where(count > 1, square - mean ** 2, values.var()), 0))
+    return mean, std
+
+
+class ScenarioProfile:
+    # Patterns of the historical hourly data (JIIT_Raw_Hourly_Energy_Data schema)
+    # that scenarios are drawn from: weather and HVAC/lighting use per (month, hour),
+    # occupancy per (vacation, exam, hour), calendar flag chances per (month, day)
+    # and the label codes the preprocessor gave DayOfWeek and TimeOfDay.
+    WEATHER = ('Temperature', 'Humidity', 'RenewableEnergy')
+    CALENDAR = ('IsVacation', 'IsExam', 'IsFestival', 'IsConvocation')
+
+
+    @classmethod
+    def from_csv(cls, file_path):
+        data = pd.read_csv(file_path)
+        dates = pd.to_datetime(data['Date'])
+        month = data['Month'].to_numpy(dtype=np.int64) - 1
+        hour = data['Hour'].to_numpy(dtype=np.int64)
+        month_hour = month * 24 + hour
+
+        profile = cls()
+        profile.weather = {}
+        for col in cls.WEATHER:
+            mean, std = _grid_stats(data[col].to_numpy(dtype=float), month_hour, 12 * 24)
+            profile.weather[col] = (mean.reshape(12, 24), std.reshape(12, 24))
+        profile.usage = {col: _grid_stats(data[col].to_numpy(dtype=float), month_hour, 12 * 24)[0].reshape(12, 24)
+                         for col in ('HVACUsage', 'LightingUsage')}
+
+        term = (data['IsVacation'].to_numpy(dtype=np.int64) * 2 + data['IsExam'].to_numpy(dtype=np.int64)) * 24 + hour
+        mean, std = _grid_stats(data['Occupancy'].to_numpy(dtype=float), term, 4 * 24)
+        profile.occupancy = (mean.reshape(2, 2, 24), std.reshape(2, 2, 24))
+        profile.peak_occupancy = float(np.nanquantile(data['Occupancy'], 0.99))
+
+        month_day = month * 31 + dates.dt.day.to_numpy() - 1
+        profile.calendar = {flag: _grid_stats(data[flag].to_numpy(dtype=float), month_day, 12 * 31)[0].reshape(12, 31)
+                            for flag in cls.CALENDAR}
+
+        # LabelEncoder codes are positions in the sorted labels
+        day_labels = sorted(data['DayOfWeek'].astype(str).unique())
+        profile.day_codes = np.array([day_labels.index(name) if name in day_labels else 0 for name in DAY_NAMES])
+        time_labels = sorted(data['TimeOfDay'].astype(str).unique())
+        hour_labels = data.groupby('Hour')['TimeOfDay'].first().astype(str)
+        profile.time_of_day_codes = np.array([time_labels.index(hour_labels.get(h, time_labels[0])) for h in range(24)])
+        profile.year = int(data['Year'].max())
+        return profile
+
+
+class ScenarioSimulator:
+    def __init__(self, monitor, profile, appliance_profiles=None, seed=0):
+        self.monitor = monitor
+        self.profile = profile
+        self.appliance_profiles = appliance_profiles or EnergyConfig.APPLIANCE_PROFILES
+        self.seed = seed
+        self.appliance_names = list(self.appliance_profiles)
+        self.appliance_types = [appliance_type(name, profile) for name, profile in self.appliance_profiles.items()]
+
+
+    #-----------------------------------------------------------------------
+    # Drawing scenarios
+    #-----------------------------------------------------------------------
+
+
+    def draw_block(self, block, n_months, what_if=None):
+        # n_months months of building-hours. Returns the model input columns, the
+        # registered appliances' draw (rows x appliances, W) and the added
+        # appliances' load (kW per row). Added units use their own generator, so a
+        # what-if leaves the baseline draws untouched. The block's BLOCK_MONTHS months
+        # are always drawn, so a month is the same whatever share of it a run uses.
+        what_if = what_if or {}
+        rng = np.random.default_rng([self.seed, block, 0])
+        profile = self.profile
+        kept, n_months = n_months * HOURS_PER_MONTH, BLOCK_MONTHS
+        rows = n_months * HOURS_PER_MONTH
+
+        month = rng.integers(0, 12, n_months)
+        start_day = rng.integers(0, 7, n_months)
+        day = np.arange(DAYS_PER_MONTH)
+        day_of_month = day[None, :] % DAYS_IN_MONTH[month][:, None]
+        day_of_week = (start_day[:, None] + day[None, :]) % 7
+
+        # Per day (n_months x 30), then repeated over the day's hours
+        flags = {flag: (rng.random((n_months, DAYS_PER_MONTH)) < profile.calendar[flag][month[:, None], day_of_month])
+                 for flag in ScenarioProfile.CALENDAR}
+        weather_day = {col: rng.standard_normal((n_months, DAYS_PER_MONTH)) for col in ScenarioProfile.WEATHER}
+        per_hour = lambda values: np.repeat(values, 24, axis=1).ravel()
+        hour = np.tile(np.arange(24), n_months * DAYS_PER_MONTH)
+        month_row = np.repeat(month, HOURS_PER_MONTH)
+        dow_row = per_hour(day_of_week)
+        vacation, exam = per_hour(flags['IsVacation']), per_hour(flags['IsExam'])
+
+        columns = {}
+        for col in ScenarioProfile.WEATHER:
+            mean, std = profile.weather[col]
+            noise = DAY_WEATHER_SHARE * per_hour(weather_day[col]) + np.sqrt(1 - DAY_WEATHER_SHARE ** 2) * rng.standard_normal(rows)
+            columns[col] = mean[month_row, hour] + std[month_row, hour] * noise
+        columns['Temperature'] = columns['Temperature'] + what_if.get('temperature_offset', 0.0)
+        columns['Humidity'] = np.clip(columns['Humidity'], 0, 100)
+        columns['RenewableEnergy'] = np.maximum(columns['RenewableEnergy'], 0)
+
+        mean, std = profile.occupancy
+        occupancy = mean[vacation.astype(int), exam.astype(int), hour] + std[vacation.astype(int), exam.astype(int), hour] * rng.standard_normal(rows)
+        columns['Occupancy'] = np.maximum(occupancy, 0).round() * what_if.get('occupancy_scale', 1.0)
+        for col, rate in profile.usage.items():
+            columns[col] = (rng.random(rows) < rate[month_row, hour]).astype(float)
+
+        for flag in ScenarioProfile.CALENDAR:
+            columns[flag] = per_hour(flags[flag]).astype(float)
+        columns['IsHoliday'] = (dow_row >= 5).astype(float)
+        columns['IsRegularAcademic'] = ((vacation == 0) & (exam == 0)).astype(float)
+        # Calendar features as the preprocessor builds them; the lower-case ones come
+        # from the Date column, i.e. midnight of the day
+        columns.update({
+            'DayOfWeek': profile.day_codes[dow_row], 'Month': month_row + 1, 'Year': np.full(rows, profile.year),
+            'Hour': hour, 'TimeOfDay': profile.time_of_day_codes[hour],
+            'hour': np.zeros(rows), 'day_of_week': dow_row, 'month': month_row + 1, 'is_weekend': (dow_row >= 5).astype(int)
+        })
+
+        registered = np.column_stack([
+            self._draw_units(rng, columns, profile_spec, kind, 1)
+            for profile_spec, kind in zip(self.appliance_profiles.values(), self.appliance_types)
+        ])
+        added = np.zeros(rows)
+        extra_rng = np.random.default_rng([self.seed, block, 1])
+        for profile_spec, kind, count in self.additions(what_if):
+            added += self._draw_units(extra_rng, columns, profile_spec, kind, count) / 1000
+        return {name: values[:kept] for name, values in columns.items()}, registered[:kept], added[:kept]
+
+
+    def _draw_units(self, rng, columns, profile_spec, kind, count):
+        # Total draw (W) per row of `count` independent units of one profile
+        rows = len(columns['Occupancy'])
+        if kind in APPLIANCE_DUTY:
+            flag, on, off = APPLIANCE_DUTY[kind]
+            duty = np.where(columns[flag] > 0, on, off)
+        elif kind == 'Computers':
+            duty = np.clip(columns['Occupancy'] / self.profile.peak_occupancy, 0, 1)
+        else:
+            duty = np.full(rows, OTHER_DUTY)
+        low, span = profile_spec['min'], profile_spec['max'] - profile_spec['min']
+
+        total = np.zeros(rows)
+        for start in range(0, count, UNIT_CHUNK):
+            units = min(UNIT_CHUNK, count - start)
+            running = rng.random((rows, units)) < duty[:, None]
+            total += (running * (low + span * rng.random((rows, units)))).sum(axis=1)
+        return total
+
+
+    def additions(self, what_if):
+        # what_if['add']: {appliance name or type: units} -> [(profile, type, units)];
+        # a type takes the first profile of that type
+        additions = []
+        for key, count in (what_if.get('add') or {}).items():
+            if count < 0:
+                raise ValueError(f"Cannot add {count} units of {key}")
+            if key in self.appliance_profiles:
+                additions.append((self.appliance_profiles[key], appliance_type(key, self.appliance_profiles[key]), count))
+                continue
+            matches = [name for name, kind in zip(self.appliance_names, self.appliance_types) if kind == key]
+            if not matches:
+                raise ValueError(f"Unknown appliance or type '{key}' (known: {self.appliance_names})")
+            additions.append((self.appliance_profiles[matches[0]], key, count))
+        return additions
+
+
+    #-----------------------------------------------------------------------
+    # Planning
+    #-----------------------------------------------------------------------
+
+
+    def run(self, n_scenarios, what_if=None):
+        # n_scenarios building-hours, rounded up to whole months
+        n_months = max(1, -(-n_scenarios // HOURS_PER_MONTH))
+        hourly = np.empty(n_months * HOURS_PER_MONTH)
+        appliance_kw = np.empty(n_months * HOURS_PER_MONTH)
+        start = time.perf_counter()
+        for first in range(0, n_months, BLOCK_MONTHS):
+            months = min(BLOCK_MONTHS, n_months - first)
+            rows = slice(first * HOURS_PER_MONTH, (first + months) * HOURS_PER_MONTH)
+            with METRICS.stage('scenarios.draw', False):
+                columns, registered, added = self.draw_block(first // BLOCK_MONTHS, months, what_if)
+            with METRICS.stage('scenarios.predict', False):
+                hourly[rows] = self.monitor.predict_batch(columns, use_cache=False) + added
+            appliance_kw[rows] = registered.sum(axis=1) / 1000 + added
+
+        load = hourly.reshape(n_months, HOURS_PER_MONTH)
+        monthly_energy = load.sum(axis=1)
+        samples = {
+            'hourly_load_kw': hourly,
+            'appliance_load_kw': appliance_kw,
+            'peak_load_kw': load.max(axis=1),
+            'monthly_energy_kwh': monthly_energy,
+            # A month's kWh priced like a reading: the "daily" figure is rate x kWh
+            'monthly_cost': CostAnalyzer.calculate_costs(monthly_energy)[0],
+            'monthly_co2_kg': CarbonAnalyzer.calculate_carbon_impact(monthly_energy)
+        }
+        return {
+            'scenarios': len(hourly),
+            'months': n_months,
+            'seconds': time.perf_counter() - start,
+            'what_if': what_if or {},
+            'distributions': {name: distribution(values) for name, values in samples.items()},
+            'samples': samples
+        }
+
+
+    def compare(self, n_scenarios, what_if):
+        # Baseline and what-if on the same draws
+        baseline = self.run(n_scenarios)
+        scenario = self.run(n_scenarios, what_if)
+        scenario['change'] = {
+            name: {stat: scenario['distributions'][name][stat] - baseline['distributions'][name][stat]
+                   for stat in ('mean', 'p50', 'p95', 'p99')}
+            for name in baseline['distributions']
+        }
+        return baseline, scenario
+
+
+    #-----------------------------------------------------------------------
+    # Load generation
+    #-----------------------------------------------------------------------
+
+
+    def readings(self, what_if=None):
+        # Endless (building_data, appliance_usage) scenario readings, block by block
+        block = 0
+        while True:
+            columns, registered, _ = self.draw_block(block, BLOCK_MONTHS, what_if)
+            records = pd.DataFrame(columns).to_dict('records')
+            for building_data, power in zip(records, registered):
+                yield building_data, dict(zip(self.appliance_names, power.tolist()))
+            block += 1
+
+
+    def load_test(self, system, seconds=10.0, batch_size=1, what_if=None):
+        # Drives the monitoring path with scenario readings back to back.
+        # batch_size 1: EnergyMonitoringSystem.run_monitoring_cycle per reading;
+        # larger: predict_batch and AlertSystem.evaluate per batch, like the
+        # ingestion server's micro-batches
+        METRICS.reset()
+        readings = self.readings(what_if)
+        type_codes = np.array([EnergyConfig.APPLIANCE_TYPES[kind] for kind in self.appliance_types])
+        count = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            if batch_size == 1:
+                building_data, appliance_usage = next(readings)
+                system.run_monitoring_cycle(building_data, appliance_usage)
+                count += 1
+                continue
+
+            batch = [next(readings) for _ in range(batch_size)]
+            columns = pd.DataFrame([building_data for building_data, _ in batch])
+            power = np.array([list(usage.values()) for _, usage in batch])
+            columns['energy'] = system.iot_monitor.predict_batch(columns)
+            appliances = {
+                'reading': np.repeat(np.arange(len(batch)), len(self.appliance_names)),
+                'name': np.tile(self.appliance_names, len(batch)),
+                'type': np.tile(type_codes, len(batch)),
+                'power': power.ravel()
+            }
+            system.alert_system.evaluate(columns, appliances)
+            CarbonAnalyzer.calculate_carbon_impact(columns['energy'])
+            CostAnalyzer.calculate_costs(columns['energy'])
+            count += len(batch)
+
+        elapsed = time.perf_counter() - start
+        latency = METRICS.to_dict()['latency']
+        return {
+            'readings': count,
+            'seconds': elapsed,
+            'readings_per_second': count / elapsed,
+            'batch_size': batch_size,
+            'latency': {name: {key: stats[key] for key in ('count', 'p50_seconds', 'p99_seconds')}
+                        for name, stats in latency.items()}
+        }
+
+
+def print_distributions(label, result):
+    print(f"\n{label}: {result['scenarios']:,} building-hours ({result['months']:,} months) "
+          f"in {result['seconds']:.2f}s")
+    print(f"{'':<22} {'mean':>12} {'p5':>12} {'p50':>12} {'p95':>12} {'p99':>12}")
+    for name, stats in result['distributions'].items():
+        print(f"{name:<22} " + " ".join(f"{stats[key]:>12,.1f}" for key in ('mean', 'p5', 'p50', 'p95', 'p99')))
+
+
+def parse_additions(items):
+    # ["AC=50", "Lights_Lab=10"] -> {"AC": 50, "Lights_Lab": 10}
+    additions = {}
+    for item in items or []:
+        key, _, count = item.partition('=')
+        additions[key] = int(count or 1)
+    return additions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo scenarios for capacity and cost planning")
+    parser.add_argument('--data', default='JIIT_Raw_Hourly_Energy_Data.csv')
+    parser.add_argument('--scenarios', type=int, default=1_000_000, help="building-hours to simulate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--add', nargs='*', default=[], help="appliances to add, e.g. AC=50 Lights_Lab=10")
+    parser.add_argument('--temperature-offset', type=float, default=0.0, help="C added to every temperature")
+    parser.add_argument('--occupancy-scale', type=float, default=1.0)
+    parser.add_argument('--output', default=None, help="write the distributions as JSON")
+    parser.add_argument('--load-test', action='store_true', help="drive the monitoring path instead of planning")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--batch-size', type=int, default=1)
+    args = parser.parse_args()
+
+    system = EnergyMonitoringSystem(args.data)
+    if not hasattr(system, 'iot_monitor'):
+        print("Cannot run scenarios - system initialization failed")
+        return
+    simulator = ScenarioSimulator(system.iot_monitor, ScenarioProfile.from_csv(args.data), seed=args.seed)
+    what_if = {}
+    if args.add:
+        what_if['add'] = parse_additions(args.add)
+    if args.temperature_offset:
+        what_if['temperature_offset'] = args.temperature_offset
+    if args.occupancy_scale != 1.0:
+        what_if['occupancy_scale'] = args.occupancy_scale
+
+    if args.load_test:
+        report = simulator.load_test(system, args.seconds, args.batch_size, what_if)
+        print(f"\nLoad test: {report['readings']:,} readings in {report['seconds']:.1f}s "
+              f"({report['readings_per_second']:,.0f} readings/s, batch size {args.batch_size})")
+        for name, stats in report['latency'].items():
+            print(f"   {name:<16} {stats['count']:>9,} calls  p50 {stats['p50_seconds'] * 1e6:>9.1f} us  "
+                  f"p99 {stats['p99_seconds'] * 1e6:>9.1f} us")
+        results = {'load_test': report}
+    elif what_if:
+        baseline, scenario = simulator.compare(args.scenarios, what_if)
+        print_distributions("Baseline", baseline)
+        print_distributions(f"What-if {what_if}", scenario)
+        print("\nChange vs baseline (mean / p95):")
+        for name, change in scenario['change'].items():
+            print(f"   {name:<22} {change['mean']:>+12,.1f} {change['p95']:>+12,.1f}")
+        results = {'baseline': baseline, 'what_if': scenario}
+    else:
+        results = {'baseline': simulator.run(args.scenarios)}
+        print_distributions("Baseline", results['baseline'])
+
+    if args.output:
+        for result in results.values():
+            result.pop('samples', None)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved scenario results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
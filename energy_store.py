@@ -0,0 +1,428 @@
+#===========================================================================
+# LIVE READING STORE
+# Append-only binary store for device readings, replacing the text logs
+# live_data.csv and live_data.json. Each series (device) is a directory
+# of segment files; a segment is a run of blocks of up to BLOCK_ROWS
+# readings. Inside a block timestamps are delta-encoded microseconds and
+# every value column is XORed with the previous reading's bits (repeated
+# readings become zeros), byte-shuffled and zlib-compressed. Block headers
+# carry the block's time range and form the time index, so a range read
+# only decompresses the overlapping blocks, straight from memory-mapped
+# segments.
+#
+#   python energy_store.py import live_data.csv live_data.json --store live_store
+#   python energy_store.py read --store live_store --start 2025-11-18 --end 2025-11-19
+#===========================================================================
+
+
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+# Value columns of a live reading, as the devices post them (sketch_nov11a.ino)
+# plus the server's prediction
+LIVE_COLUMNS = ('temperature', 'humidity', 'current', 'pred')
+
+# live_data.csv header -> store columns
+CSV_COLUMNS = {'temp': 'temperature', 'hum': 'humidity', 'current': 'current', 'pred': 'pred'}
+
+BLOCK_ROWS = 4096
+SEGMENT_BYTES = 16 * 1024 * 1024
+# Buffered readings are written as a (short) block after this many seconds
+FLUSH_SECONDS = 10.0
+COMPRESSION_LEVEL = 6
+
+# magic, rows, value columns, first and last timestamp (us since the epoch);
+# followed by one uint32 payload length per column, timestamps first
+BLOCK_HEADER = struct.Struct('<4sIIqq')
+BLOCK_MAGIC = b'TSB1'
+SEGMENT_PATTERN = "seg_{:06d}.tsb"
+
+
+def _shuffle(words):
+    # uint64 words -> bytes grouped by significance, so zlib sees the long runs
+    return np.ascontiguousarray(words.astype('<u8').view(np.uint8).reshape(-1, 8).T).tobytes()
+
+
+def _unshuffle(payload, rows):
+    return np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(8, rows).T.copy().view('<u8').ravel()
+
+
+def encode_timestamps(timestamps):
+    # Microseconds -> shuffled deltas (the first delta is 0; the header holds the start)
+    deltas = np.diff(timestamps, prepend=timestamps[0])
+    return zlib.compress(_shuffle(deltas.view(np.uint64)), COMPRESSION_LEVEL)
+
+
+def decode_timestamps(payload, rows, first):
+    return first + np.cumsum(_unshuffle(payload, rows).view(np.int64))
+
+
+def encode_values(values):
+    # Each float64 is XORed with the one before it: unchanged readings cost nothing
+    bits = np.ascontiguousarray(values, dtype='<f8').view('<u8')
+    xored = bits.copy()
+    xored[1:] ^= bits[:-1]
+    return zlib.compress(_shuffle(xored), COMPRESSION_LEVEL)
+
+
+def decode_values(payload, rows):
+    return np.bitwise_xor.accumulate(_unshuffle(payload, rows)).view('<f8')
+
+
+def to_microseconds(timestamps):
+    return pd.DatetimeIndex(pd.to_datetime(timestamps, format='mixed')).as_unit('us').asi8
+
+
+def _series_dir_name(series):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(series)) or '_'
+
+
+class _Series:
+    # Segments and block index of one series. The index holds one row per block:
+    # time range, segment number, byte offset and length, reading count.
+    def __init__(self, path, n_columns):
+        self.path = path
+        self.n_columns = n_columns
+        self.header_size = BLOCK_HEADER.size + 4 * (n_columns + 1)
+        os.makedirs(path, exist_ok=True)
+        self.blocks = []
+        self.segments = sorted(int(name[4:10]) for name in os.listdir(path)
+                               if re.fullmatch(r'seg_\d{6}\.tsb', name))
+        for segment in self.segments:
+            self._index_segment(segment)
+        self._index_arrays = None
+        self.buffer_times = []
+        self.buffer_values = []
+        self.buffer_since = None
+        self.maps = {}
+
+
+    def segment_path(self, segment):
+        return os.path.join(self.path, SEGMENT_PATTERN.format(segment))
+
+
+    def _index_segment(self, segment):
+        # Reads the block headers only; a torn block at the end (crash mid-write)
+        # is cut off so appends continue from the last whole block
+        path = self.segment_path(segment)
+        size = os.path.getsize(path)
+        offset = 0
+        with open(path, 'rb') as f:
+            while offset + self.header_size <= size:
+                f.seek(offset)
+                header = f.read(self.header_size)
+                magic, rows, n_columns, first, last = BLOCK_HEADER.unpack_from(header)
+                lengths = struct.unpack_from(f'<{self.n_columns + 1}I', header, BLOCK_HEADER.size)
+                length = self.header_size + sum(lengths)
+                if magic != BLOCK_MAGIC or n_columns != self.n_columns or offset + length > size:
+                    break
+                self.blocks.append((first, last, segment, offset, length, rows))
+                offset += length
+        if offset < size:
+            print(f"Truncating {size - offset} bytes of incomplete block data in {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(offset)
+
+
+    def index_arrays(self):
+        if self._index_arrays is None:
+            blocks = np.array(self.blocks, dtype=np.int64).reshape(-1, 6)
+            self._index_arrays = {name: blocks[:, i] for i, name in
+                                  enumerate(('first', 'last', 'segment', 'offset', 'length', 'rows'))}
+        return self._index_arrays
+
+
+    def write_block(self, timestamps, values):
+        # values: (rows, n_columns) float64, rows sorted by timestamp
+        payloads = [encode_timestamps(timestamps)] + [encode_values(values[:, i]) for i in range(self.n_columns)]
+        header = BLOCK_HEADER.pack(BLOCK_MAGIC, len(timestamps), self.n_columns,
+                                   int(timestamps[0]), int(timestamps[-1]))
+        header += struct.pack(f'<{self.n_columns + 1}I', *(len(p) for p in payloads))
+
+        if not self.segments or os.path.getsize(self.segment_path(self.segments[-1])) >= SEGMENT_BYTES:
+            self.segments.append(self.segments[-1] + 1 if self.segments else 1)
+        segment = self.segments[-1]
+        with open(self.segment_path(segment), 'ab') as f:
+            offset = f.tell()
+            f.write(header + b''.join(payloads))
+        self.blocks.append((int(timestamps[0]), int(timestamps[-1]), segment, offset,
+                            len(header) + sum(len(p) for p in payloads), len(timestamps)))
+        self._index_arrays = None
+
+
+    def block_view(self, segment, offset, length):
+        # Memory-mapped segment, remapped when appends have grown the file. Called
+        # with the store lock held; a replaced map is not closed, since views of it
+        # may still be decoding in other readers (it is freed with the last one)
+        path = self.segment_path(segment)
+        mapped = self.maps.get(segment)
+        if mapped is None or len(mapped) < offset + length:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment] = mapped
+        return memoryview(mapped)[offset:offset + length]
+
+
+    def decode_block(self, view, rows, columns):
+        # columns: positions of the value columns to decode
+        first = BLOCK_HEADER.unpack_from(view)[3]
+        lengths = struct.unpack_from(f'<{self.n_columns + 1}I', view, BLOCK_HEADER.size)
+        starts = np.cumsum((self.header_size,) + lengths)
+        timestamps = decode_timestamps(view[starts[0]:starts[1]], rows, first)
+        values = {i: decode_values(view[starts[i + 1]:starts[i + 2]], rows) for i in columns}
+        return timestamps, values
+
+
+    def close(self):
+        for mapped in self.maps.values():
+            mapped.close()
+        self.maps = {}
+
+
+class TimeSeriesStore:
+    def __init__(self, path, columns=LIVE_COLUMNS, block_rows=BLOCK_ROWS, flush_seconds=FLUSH_SECONDS):
+        # An existing store keeps the columns it was created with
+        self.path = path
+        self.block_rows = block_rows
+        self.flush_seconds = flush_seconds
+        os.makedirs(path, exist_ok=True)
+        schema_path = os.path.join(path, "schema.json")
+        if os.path.exists(schema_path):
+            with open(schema_path) as f:
+                columns = json.load(f)['columns']
+        else:
+            with open(schema_path, 'w') as f:
+                json.dump({'columns': list(columns), 'block_header': BLOCK_MAGIC.decode()}, f)
+        self.columns = list(columns)
+        self.series = {}
+        for name in sorted(os.listdir(path)):
+            series_path = os.path.join(path, name)
+            if os.path.isdir(series_path):
+                self.series[name] = _Series(series_path, len(self.columns))
+        self.lock = threading.Lock()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def _series(self, series):
+        name = _series_dir_name(series)
+        if name not in self.series:
+            self.series[name] = _Series(os.path.join(self.path, name), len(self.columns))
+        return self.series[name]
+
+
+    #-----------------------------------------------------------------------
+    # Appending
+    #-----------------------------------------------------------------------
+
+
+    def append(self, timestamps, values, series='device'):
+        # values: DataFrame or {column: array}; missing columns are stored as NaN.
+        # Readings are buffered and written in blocks of block_rows (or after
+        # flush_seconds), so single readings from the server stay cheap.
+        timestamps = to_microseconds(timestamps)
+        matrix = np.full((len(timestamps), len(self.columns)), np.nan)
+        for i, col in enumerate(self.columns):
+            if col in values:
+                matrix[:, i] = np.asarray(values[col], dtype=np.float64)
+        with self.lock:
+            state = self._series(series)
+            state.buffer_times.append(timestamps)
+            state.buffer_values.append(matrix)
+            if state.buffer_since is None:
+                state.buffer_since = time.monotonic()
+            buffered = sum(len(t) for t in state.buffer_times)
+            if buffered >= self.block_rows or time.monotonic() - state.buffer_since >= self.flush_seconds:
+                self._flush_series(state)
+        return len(timestamps)
+
+
+    def append_reading(self, timestamp, series='device', **values):
+        return self.append([timestamp], {key: [value] for key, value in values.items()}, series)
+
+
+    def flush(self):
+        with self.lock:
+            for state in self.series.values():
+                self._flush_series(state)
+
+
+    def _flush_series(self, state):
+        if not state.buffer_times:
+            return
+        timestamps = np.concatenate(state.buffer_times)
+        values = np.concatenate(state.buffer_values)
+        state.buffer_times, state.buffer_values, state.buffer_since = [], [], None
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, values = timestamps[order], values[order]
+        for start in range(0, len(timestamps), self.block_rows):
+            state.write_block(timestamps[start:start + self.block_rows], values[start:start + self.block_rows])
+
+
+    def close(self):
+        self.flush()
+        for state in self.series.values():
+            state.close()
+
+
+    #-----------------------------------------------------------------------
+    # Reading
+    #-----------------------------------------------------------------------
+
+
+    def scan(self, start=None, end=None, series='device', columns=None):
+        # Yields one DataFrame per block overlapping [start, end), in block order;
+        # only those blocks are decompressed. Unflushed readings come last.
+        columns = list(columns or self.columns)
+        positions = [self.columns.index(col) for col in columns]
+        lo = to_microseconds([start])[0] if start is not None else np.iinfo(np.int64).min
+        hi = to_microseconds([end])[0] if end is not None else np.iinfo(np.int64).max
+        with self.lock:
+            state = self.series.get(_series_dir_name(series))
+            if state is None:
+                return
+            index = state.index_arrays()
+            hits = np.flatnonzero((index['last'] >= lo) & (index['first'] < hi))
+            views = [(state.block_view(index['segment'][i], index['offset'][i], index['length'][i]), index['rows'][i])
+                     for i in hits]
+            pending = ([np.concatenate(state.buffer_times)], [np.concatenate(state.buffer_values)]) \
+                if state.buffer_times else ([], [])
+
+        decoded = [state.decode_block(view, rows, positions) for view, rows in views]
+        decoded += [(times, {i: values[:, i] for i in positions}) for times, values in zip(*pending)]
+        for timestamps, values in decoded:
+            keep = (timestamps >= lo) & (timestamps < hi)
+            if keep.any():
+                frame = pd.DataFrame({col: values[i][keep] for col, i in zip(columns, positions)})
+                frame.insert(0, 'timestamp', pd.to_datetime(timestamps[keep], unit='us'))
+                yield frame
+
+
+    def read(self, start=None, end=None, series='device', columns=None):
+        # All readings of the series in [start, end), sorted by time
+        frames = list(self.scan(start, end, series, columns))
+        if not frames:
+            return pd.DataFrame(columns=['timestamp'] + list(columns or self.columns))
+        frame = pd.concat(frames, ignore_index=True)
+        return frame.sort_values('timestamp', kind='stable', ignore_index=True)
+
+
+    def time_range(self, series='device'):
+        state = self.series.get(_series_dir_name(series))
+        if state is None or not (state.blocks or state.buffer_times):
+            return None
+        firsts = [block[0] for block in state.blocks] + [t.min() for t in state.buffer_times]
+        lasts = [block[1] for block in state.blocks] + [t.max() for t in state.buffer_times]
+        return pd.Timestamp(min(firsts), unit='us'), pd.Timestamp(max(lasts), unit='us')
+
+
+    def stats(self):
+        # Readings, blocks, segments and bytes on disk per series
+        report = {}
+        for name, state in self.series.items():
+            report[name] = {
+                'readings': sum(block[5] for block in state.blocks) + sum(len(t) for t in state.buffer_times),
+                'blocks': len(state.blocks),
+                'segments': len(state.segments),
+                'bytes': sum(os.path.getsize(state.segment_path(s)) for s in state.segments)
+            }
+        return report
+
+
+    #-----------------------------------------------------------------------
+    # Importing the text logs
+    #-----------------------------------------------------------------------
+
+
+    def import_live_csv(self, file_path, series='device', chunk_size=1_000_000):
+        # live_data.csv (timestamp,temp,hum,current,pred). Other writers of the file
+        # append longer rows that only share the first four columns; their fifth
+        # field is not a prediction, so pred is kept for five-field rows only
+        rows = 0
+        names = ['timestamp'] + list(CSV_COLUMNS) + ['extra']
+        for chunk in pd.read_csv(file_path, usecols=range(len(names)), header=0, names=names, chunksize=chunk_size):
+            chunk = chunk.rename(columns=CSV_COLUMNS)
+            chunk.loc[chunk['extra'].notna(), 'pred'] = np.nan
+            rows += self.append(chunk['timestamp'], chunk, series)
+        self.flush()
+        return rows
+
+
+    def import_live_json(self, file_path, series='device', chunk_size=1_000_000):
+        # live_data.json: one {"timestamp", "current", "temperature", "humidity"} object per line
+        rows = 0
+        for chunk in pd.read_json(file_path, lines=True, chunksize=chunk_size, convert_dates=False):
+            rows += self.append(chunk['timestamp'], chunk, series)
+        self.flush()
+        return rows
+
+
+def import_live_file(store, file_path, series=None):
+    # Picks the importer from the extension; the series defaults to the file name
+    series = series or os.path.splitext(os.path.basename(file_path))[0]
+    if file_path.endswith('.json'):
+        return store.import_live_json(file_path, series)
+    return store.import_live_csv(file_path, series)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed append-only store for live device readings")
+    commands = parser.add_subparsers(dest='command', required=True)
+    importer = commands.add_parser('import', help="import live_data.csv / live_data.json files")
+    importer.add_argument('files', nargs='+')
+    importer.add_argument('--store', default='live_store')
+    importer.add_argument('--series', default=None, help="series name (default: the file name)")
+    reader = commands.add_parser('read', help="print the readings of a time range")
+    reader.add_argument('--store', default='live_store')
+    reader.add_argument('--series', default=None, help="default: every series")
+    reader.add_argument('--start', default=None)
+    reader.add_argument('--end', default=None)
+    reader.add_argument('--output', default=None, help="write the readings to this CSV")
+    args = parser.parse_args()
+
+    with TimeSeriesStore(args.store) as store:
+        if args.command == 'import':
+            for file_path in args.files:
+                start_time = time.perf_counter()
+                rows = import_live_file(store, file_path, args.series)
+                store.flush()
+                series = _series_dir_name(args.series or os.path.splitext(os.path.basename(file_path))[0])
+                stored = store.stats()[series]['bytes']
+                print(f"Imported {rows} readings from {file_path} into series '{series}' in "
+                      f"{time.perf_counter() - start_time:.2f}s: {os.path.getsize(file_path):,} bytes of text -> "
+                      f"{stored:,} bytes stored")
+            return
+
+        names = [_series_dir_name(args.series)] if args.series else list(store.series)
+        frames = []
+        for name in names:
+            start_time = time.perf_counter()
+            frame = store.read(args.start, args.end, name)
+            print(f"{name}: {len(frame)} readings in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+            if len(frame):
+                print(frame.head(10).to_string(index=False))
+            frames.append(frame.assign(series=name))
+        if args.output and frames:
+            pd.concat(frames, ignore_index=True).to_csv(args.output, index=False)
+            print(f"Saved readings to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
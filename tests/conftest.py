@@ -0,0 +1,40 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+FEATURES = ['Temperature', 'Humidity', 'Occupancy', 'hour', 'Temperature_squared', 'Occupancy_squared']
+
+
+def make_serving_pair(seed=0, depth=6):
+    # A small fitted (comparator, preprocessor) pair in the shape IoTEnergyMonitor takes
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({'Temperature': rng.uniform(20, 35, 500).round(1), 'Humidity': rng.integers(40, 80, 500),
+                      'Occupancy': rng.integers(0, 100, 500), 'hour': np.zeros(500)})
+    X['Temperature_squared'] = X['Temperature'] ** 2
+    X['Occupancy_squared'] = X['Occupancy'] ** 2
+    y = 60 + 3 * X['Temperature'] + 0.5 * X['Occupancy'] + rng.normal(0, 2, 500)
+    scaler = StandardScaler().fit(X[FEATURES])
+    model = DecisionTreeRegressor(max_depth=depth, random_state=seed).fit(
+        pd.DataFrame(scaler.transform(X[FEATURES]), columns=FEATURES), y)
+    preprocessor = SimpleNamespace(feature_names=list(FEATURES), scaler=scaler)
+    comparator = SimpleNamespace(best_model='Decision Tree', results={'Decision Tree': {'model': model, 'rmse': 2.0}})
+    return comparator, preprocessor
+
+
+@pytest.fixture
+def serving_pair():
+    return make_serving_pair()
+
+
+@pytest.fixture
+def other_serving_pair():
+    return make_serving_pair(seed=1, depth=3)
@@ -0,0 +1,106 @@
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from energy_model_training import AlertSystem, EnergyConfig
+
+
+CRITICAL = EnergyConfig.CRITICAL_THRESHOLD
+
+
+@pytest.fixture
+def kolkata_time(monkeypatch):
+    # A zone far from UTC, so wall-clock and UTC seconds cannot be confused
+    monkeypatch.setenv('TZ', 'Asia/Kolkata')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def critical_rules():
+    return [spec for spec in EnergyConfig.ALERT_RULES if spec['name'] == 'energy_critical']
+
+
+def test_alert_timestamp_is_reading_wall_clock_time(kolkata_time):
+    alerts = AlertSystem(critical_rules())
+    result = alerts.evaluate({'energy': [CRITICAL + 10], 'timestamp': [datetime(2025, 1, 1, 12, 0)]})
+    assert [alert['timestamp'] for alert in result['raised']] == ['2025-01-01T12:00:00']
+
+
+def test_now_and_timestamp_paths_share_one_clock(kolkata_time):
+    alerts = AlertSystem(critical_rules(), cooldown=60)
+    now = datetime(2025, 1, 1, 12, 0)
+    alerts.evaluate({'energy': [CRITICAL + 10]}, now=now)
+    alerts.evaluate({'energy': [0.0], 'timestamp': [now + timedelta(seconds=10)]})
+    # Raised again 20 s after the clear: still in the cooldown
+    result = alerts.evaluate({'energy': [CRITICAL + 10], 'timestamp': [now + timedelta(seconds=30)]})
+    assert result['raised'] == []
+    assert alerts.stats['suppressed'] == 1
+    # Past the cooldown, on the now= path
+    alerts.evaluate({'energy': [0.0]}, now=now + timedelta(seconds=200))
+    result = alerts.evaluate({'energy': [CRITICAL + 10]}, now=now + timedelta(seconds=300))
+    assert [alert['timestamp'] for alert in result['raised']] == ['2025-01-01T12:05:00']
+
+
+def test_hysteresis_keeps_alert_until_clear_condition():
+    alerts = AlertSystem(critical_rules(), cooldown=0)
+    energy = [CRITICAL + 1, CRITICAL - 1, CRITICAL + 2, CRITICAL - 10]
+    result = alerts.evaluate({'energy': energy, 'timestamp': np.arange(4.0)})
+    # Dipping just under the threshold does not clear it, so one alert is raised
+    assert len(result['raised']) == 1
+    assert alerts.stats == {'readings': 4, 'raised': 1, 'suppressed': 0, 'cleared': 1}
+    assert alerts.active_alerts == {}
+
+
+def test_batch_matches_reading_by_reading():
+    rng = np.random.default_rng(0)
+    energy = rng.uniform(CRITICAL - 20, CRITICAL + 20, 300)
+    sources = rng.choice(['A', 'B', 'C'], 300)
+    batch = AlertSystem(cooldown=5)
+    batch_result = batch.evaluate({'energy': energy, 'source': sources, 'timestamp': np.arange(300.0)})
+
+    single = AlertSystem(cooldown=5)
+    raised = []
+    for i in range(300):
+        raised += single.evaluate({'energy': energy[i:i + 1], 'source': sources[i:i + 1],
+                                   'timestamp': [float(i)]})['raised']
+    key = lambda alert: (alert['timestamp'], alert['source'], alert['rule'])
+    strip = lambda alert: {k: v for k, v in alert.items() if k != 'id'}
+    assert [strip(a) for a in sorted(batch_result['raised'], key=key)] == [strip(a) for a in sorted(raised, key=key)]
+    assert batch.stats == single.stats
+
+
+def test_appliance_rule_needs_running_appliance():
+    alerts = AlertSystem()
+    readings = {'energy': [10.0, 10.0], 'Occupancy': [0.0, 0.0]}
+    appliances = {'reading': [0, 1], 'name': ['AC_Room101', 'AC_Room101'],
+                  'type': [EnergyConfig.APPLIANCE_TYPES['AC']] * 2, 'power': [1500.0, 0.0]}
+    messages = alerts.check_batch(readings, appliances)
+    assert any('AC running in low occupancy: AC_Room101' == message for message in messages[0])
+    assert not any('AC' in message for message in messages[1])
+
+
+def test_evaluate_messages_match_check_batch_plus_change_rules():
+    rng = np.random.default_rng(1)
+    n = 200
+    readings = {'energy': rng.uniform(0, CRITICAL + 40, n), 'Occupancy': rng.uniform(0, 100, n),
+                'Temperature': rng.uniform(20, 35, n), 'source': rng.choice(['A', 'B'], n), 'timestamp': np.arange(n)}
+    appliances = {'reading': np.arange(n), 'name': ['AC_Room101'] * n,
+                  'type': [EnergyConfig.APPLIANCE_TYPES['AC']] * n, 'power': rng.choice([0.0, 1500.0], n)}
+    stateless = AlertSystem().check_batch(readings, appliances)
+    alerts = AlertSystem()
+    report = alerts.evaluate(readings, appliances, messages=True)
+
+    spikes = 0
+    for expected, messages in zip(stateless, report['messages']):
+        spike = [message for message in messages if message.startswith('Energy rose')]
+        spikes += len(spike)
+        assert [message for message in messages if message not in spike] == expected
+    assert spikes > 0
+    # The stateful part is the same as without messages
+    plain = AlertSystem().evaluate(readings, appliances)
+    assert [alert['message'] for alert in report['raised']] == [alert['message'] for alert in plain['raised']]
+    assert alerts.evaluate({'energy': []}, messages=True)['messages'] == []
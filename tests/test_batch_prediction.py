@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_model_training import IoTEnergyMonitor
+
+
+def reading_dicts(n=100, seed=0):
+    rng = np.random.default_rng(seed)
+    readings = [{'Temperature': float(t), 'Humidity': float(h), 'Occupancy': float(o), 'hour': 0}
+                for t, h, o in zip(rng.uniform(20, 35, n), rng.uniform(40, 80, n), rng.integers(0, 100, n))]
+    # Readings may lack features, which count as 0 like in predict_energy
+    del readings[3]['Occupancy']
+    del readings[7]['Humidity']
+    return readings
+
+
+def test_batch_matches_reading_by_reading(serving_pair):
+    monitor = IoTEnergyMonitor(*serving_pair)
+    readings = reading_dicts()
+    single = [monitor.predict_energy(reading) for reading in readings]
+    reference = [monitor.predict_energy_reference(reading) for reading in readings]
+    batch = IoTEnergyMonitor(*serving_pair).predict_batch(readings)
+    assert batch == pytest.approx(single)
+    assert batch == pytest.approx(reference)
+
+
+def test_every_batch_layout_gives_the_same_predictions(serving_pair):
+    monitor = IoTEnergyMonitor(*serving_pair)
+    readings = reading_dicts()
+    frame = pd.DataFrame(readings)
+    columns = {name: frame[name].to_numpy() for name in frame.columns}
+    expected = monitor.predict_batch(readings, use_cache=False)
+    assert np.array_equal(monitor.predict_batch(frame, use_cache=False), expected)
+    assert np.array_equal(monitor.predict_batch(columns, use_cache=False), expected)
+    # Cached and uncached paths agree, also for rows repeated within a batch
+    assert np.array_equal(monitor.predict_batch(readings + readings[:10]), np.r_[expected, expected[:10]])
+
+
+def test_empty_batch_and_no_model(serving_pair):
+    assert len(IoTEnergyMonitor(*serving_pair).predict_batch([])) == 0
+    comparator, preprocessor = serving_pair
+    comparator.best_model = None
+    predictions = IoTEnergyMonitor(comparator, preprocessor).predict_batch(reading_dicts()[:5])
+    assert np.array_equal(predictions, np.zeros(5))
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import run_suite
+from synthetic_campus import BLOCK_ROWS, SENSOR_COLUMNS, generate_campus_data, write_campus_csv
+
+
+JIIT_COLUMNS = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                        "JIIT_Raw_Hourly_Energy_Data.csv"), nrows=0).columns.tolist()
+
+
+def test_synthetic_data_has_the_jiit_schema_and_requested_size():
+    single = generate_campus_data(5000)
+    assert single.columns.tolist() == JIIT_COLUMNS and len(single) == 5000
+    campus = generate_campus_data(3000, n_buildings=12)
+    assert campus.columns.tolist() == JIIT_COLUMNS + ['Building'] and len(campus) == 3000
+    # Ordered by hour, then building
+    assert campus['Building'].iloc[:12].tolist() == [f"B{i:02d}" for i in range(12)]
+    hours = pd.to_datetime(campus['Date']) + pd.to_timedelta(campus['Hour'], unit='h')
+    assert hours.is_monotonic_increasing and hours.iloc[12] - hours.iloc[0] == pd.Timedelta(hours=1)
+
+
+def test_same_seed_gives_the_same_data_whatever_the_size():
+    rows = BLOCK_ROWS + 1000
+    small = generate_campus_data(2000, n_buildings=3, missing_fraction=0.05, seed=4)
+    large = generate_campus_data(rows, n_buildings=3, missing_fraction=0.05, seed=4)
+    assert len(large) == rows
+    pd.testing.assert_frame_equal(large.iloc[:2000], small)
+    other = generate_campus_data(2000, n_buildings=3, missing_fraction=0.05, seed=5)
+    assert not other['Temperature'].equals(small['Temperature'])
+
+
+def test_faults_are_injected_at_the_requested_rates(tmp_path):
+    clean = generate_campus_data(50_000, n_buildings=5)
+    faulty = generate_campus_data(50_000, n_buildings=5, missing_fraction=0.02, outlier_fraction=0.01)
+    for col in SENSOR_COLUMNS:
+        assert not clean[col].isna().any()
+        assert faulty[col].isna().mean() == pytest.approx(0.02, abs=0.003)
+        changed = (faulty[col] != clean[col]) & faulty[col].notna()
+        assert changed.mean() == pytest.approx(0.01 * 0.98 * 0.75, abs=0.003)
+
+    # Streaming to CSV writes the same rows
+    path = write_campus_csv(str(tmp_path / "campus.csv"), 3000, n_buildings=2, missing_fraction=0.02)
+    pd.testing.assert_frame_equal(pd.read_csv(path), generate_campus_data(3000, 2, missing_fraction=0.02),
+                                  check_dtype=False)
+
+
+def test_suite_runs_a_small_case_and_flags_regressions(tmp_path, capsys):
+    args = SimpleNamespace(
+        cases=['2000x2'], missing=0.01, outliers=0.005, seed=0, fit_rows=500, model_budget=None,
+        chunked_above=10 ** 6, single_readings=20, batch_sizes=[1, 50], trace_memory=False,
+        data_dir=str(tmp_path / "data"), results_dir=str(tmp_path / "results"), output=str(tmp_path / "run.json"),
+        results=None, baseline=None, threshold=0.2)
+    results = run_suite.run(args)
+    with open(args.output) as f:
+        assert json.load(f) == json.loads(json.dumps(results))
+    case = results['cases'][0]
+    assert case['rows'] == 2000 and case['preprocess_mode'] == 'in_memory'
+    assert 'preprocess.impute' in case['stages'] and case['models']
+    assert set(case['inference']['batch']) == {'1', '50'}
+
+    # A run twice as slow as the baseline is reported
+    slower = json.loads(json.dumps(results))
+    for stats in slower['cases'][0]['stages'].values():
+        stats['wall_seconds'] = stats['wall_seconds'] * 2 + 1.0
+    regressions = run_suite.compare(slower, results, threshold=0.2)
+    assert {label for _, label, _ in regressions} >= {f"stage {name}" for name in case['stages']}
+    assert run_suite.compare(results, results, threshold=0.2) == []
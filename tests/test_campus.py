@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import numpy as np
+
+from energy_campus import CampusMonitor, CampusRegistry
+from energy_model_training import AlertSystem, EnergyConfig, calendar_features
+
+
+def campus_state(n_buildings=30, per_building=12, seed=0):
+    registry = CampusRegistry.synthetic(n_buildings, per_building)
+    rng = np.random.default_rng(seed)
+    registry.simulate(rng)
+    registry.readings['Occupancy'][::3] = 5.0
+    energy = rng.uniform(EnergyConfig.HIGH_THRESHOLD - 20, EnergyConfig.CRITICAL_THRESHOLD + 20, n_buildings)
+    return registry, energy
+
+
+def test_campus_alerts_match_alert_system():
+    registry, energy = campus_state()
+    result = {'energy': energy, 'readings': registry.readings, 'alerts': registry.evaluate_alerts(energy)}
+    messages = CampusMonitor(registry).alert_messages(result)
+
+    alert_system = AlertSystem()
+    for b, name in enumerate(registry.building_names):
+        appliances = np.flatnonzero(registry.building_index == b)
+        usage = {registry.appliance_names[a]: float(registry.power[a]) for a in appliances}
+        building_data = {field: values[b] for field, values in registry.readings.items()}
+        expected = alert_system.check_thresholds(energy[b], usage, building_data)
+        assert sorted(text for building, text in messages if building == name) == sorted(expected)
+
+
+def test_energy_rules_need_energy():
+    registry, energy = campus_state()
+    codes = registry.evaluate_alerts(None)['code']
+    with_energy = registry.evaluate_alerts(energy)['code']
+    assert len(codes) < len(with_energy)
+
+
+def test_buildings_added_one_by_one_match_synthetic():
+    synthetic = CampusRegistry.synthetic(40)
+    registry = CampusRegistry()
+    for name in synthetic.building_names:
+        registry.add_building(name)
+    assert registry.n_appliances == synthetic.n_appliances
+    assert np.array_equal(registry.appliance_load(), np.zeros(40))
+    for field in ('building_index', 'type_code', 'power_min', 'power_max', 'building_ids', 'appliance_ids'):
+        assert np.array_equal(getattr(registry, field), getattr(synthetic, field))
+
+    # Buildings added after first use are compiled on the next use
+    registry.add_building('Annex')
+    assert len(registry.appliance_load()) == 41
+    assert len(registry.readings['Temperature']) == 41
+
+
+def test_sharded_alerts_are_in_building_order():
+    registry, _ = campus_state(n_buildings=25)
+    monitor = CampusMonitor(registry, n_shards=1, seed=3)
+    local = monitor.run_cycle()
+    sharded = CampusMonitor(registry, n_shards=1, seed=3)
+    merged = sharded._merge([part.run_cycle(np.random.default_rng(3)) for part in registry.shard(4)])
+    for result in (local, merged):
+        assert np.all(np.diff(result['alerts']['building']) >= 0)
+
+
+def test_model_inputs_use_the_training_calendar_features():
+    registry, _ = campus_state(n_buildings=5)
+    now = datetime(2025, 3, 8, 15, 30)
+    inputs = registry.model_inputs(now)
+    # The hourly training data has no time of day in 'hour'; the clock hour is 'Hour'
+    for name, value in calendar_features(now).items():
+        assert np.array_equal(inputs[name], np.full(5, value)), name
+    assert set(inputs['hour']) == {0} and set(inputs['Hour']) == {15} and set(inputs['is_weekend']) == {1}
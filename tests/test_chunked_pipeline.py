@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_model_training import EnergyConfig, EnergyDataPreprocessor, QuantileSketch
+
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "JIIT_Raw_Hourly_Energy_Data.csv")
+
+
+@pytest.fixture
+def hourly_csv(tmp_path):
+    # A few months of the hourly data, with some outliers for the IQR clipping
+    data = pd.read_csv(DATA, nrows=2400)
+    data.loc[::250, 'Temperature'] = 90.0
+    path = tmp_path / "hourly.csv"
+    data.to_csv(path, index=False)
+    return str(path)
+
+
+def test_chunked_preprocessing_matches_in_memory(hourly_csv, tmp_path):
+    in_memory = EnergyDataPreprocessor('none')
+    in_memory.prepare_dataset(hourly_csv, use_cache=False)
+    in_memory.scale_features()
+    X, y = in_memory.get_preprocessed_data()
+
+    chunked = EnergyDataPreprocessor('none')
+    X_chunked, y_chunked = chunked.preprocess_in_chunks(hourly_csv, chunk_size=300, output_dir=str(tmp_path / "chunks"))
+
+    assert chunked.feature_names == in_memory.feature_names
+    assert chunked.clip_bounds == pytest.approx(in_memory.clip_bounds)
+    assert {col: list(encoder.classes_) for col, encoder in chunked.label_encoders.items()} == \
+        {col: list(encoder.classes_) for col, encoder in in_memory.label_encoders.items()}
+    assert np.allclose(np.asarray(X_chunked), np.asarray(X, dtype=float))
+    assert np.array_equal(np.asarray(y_chunked), np.asarray(y, dtype=float))
+    assert chunked.time_index.equals(in_memory.time_index.reset_index(drop=True).astype('datetime64[ns]'))
+
+
+def test_few_distinct_values_give_pandas_quantiles():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 500, 10_000) / 10
+    sketch = QuantileSketch()
+    for chunk in np.array_split(values, 7):
+        sketch.merge(QuantileSketch().update(chunk))
+    for q in (0.0, 0.1, 0.25, 0.5, 0.75, 0.99, 1.0):
+        assert sketch.quantile(q) == pytest.approx(pd.Series(values).quantile(q))
+
+
+def test_sketch_quantiles_are_within_the_relative_accuracy():
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.lognormal(4, 1, 50_000), -rng.lognormal(2, 1, 5_000), np.zeros(100)])
+    accuracy = EnergyConfig.QUANTILE_SKETCH_ACCURACY
+    merged = QuantileSketch(max_exact_values=1000)
+    for chunk in np.array_split(rng.permutation(values), 9):
+        merged.merge(QuantileSketch(max_exact_values=1000).update(chunk))
+    single = QuantileSketch(max_exact_values=1000).update(values)
+    assert merged.exact is None and merged.count == len(values)
+    for q in (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.999):
+        true = np.quantile(values, q, method='lower')
+        assert merged.quantile(q) == single.quantile(q)
+        assert abs(merged.quantile(q) - true) <= accuracy * abs(true) + 1e-9
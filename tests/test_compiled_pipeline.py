@@ -0,0 +1,67 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+from conftest import FEATURES
+from energy_model_training import IoTEnergyMonitor
+
+
+MODELS = {
+    'Decision Tree': lambda: DecisionTreeRegressor(max_depth=8, random_state=0),
+    'Random Forest': lambda: RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0),
+    'Gradient Boosting': lambda: GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0)
+}
+
+
+def fitted_monitor(name, n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({'Temperature': rng.uniform(20, 35, n), 'Humidity': rng.uniform(40, 80, n),
+                      'Occupancy': rng.integers(0, 100, n), 'hour': np.zeros(n)})
+    X['Temperature_squared'] = X['Temperature'] ** 2
+    X['Occupancy_squared'] = X['Occupancy'] ** 2
+    y = 60 + 3 * X['Temperature'] + 0.5 * X['Occupancy'] + rng.normal(0, 2, n)
+    scaler = StandardScaler().fit(X[FEATURES])
+    model = MODELS[name]().fit(pd.DataFrame(scaler.transform(X[FEATURES]), columns=FEATURES), y)
+    preprocessor = SimpleNamespace(feature_names=list(FEATURES), scaler=scaler)
+    comparator = SimpleNamespace(best_model=name, results={name: {'model': model, 'rmse': 2.0}})
+    return IoTEnergyMonitor(comparator, preprocessor)
+
+
+def random_readings(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return [{'Temperature': float(t), 'Humidity': float(h), 'Occupancy': int(o), 'HVACUsage': 1}
+            for t, h, o in zip(rng.uniform(18, 38, n), rng.uniform(35, 85, n), rng.integers(0, 110, n))]
+
+
+@pytest.mark.parametrize('name', list(MODELS))
+def test_compiled_predictions_match_the_pandas_path(name):
+    monitor = fitted_monitor(name)
+    pipeline = monitor.compiled_pipeline
+    assert pipeline.kernel == type(monitor.best_model).__name__
+    for reading in random_readings(200):
+        assert pipeline.predict(reading) == pytest.approx(monitor.predict_energy_reference(reading), abs=1e-9)
+
+
+@pytest.mark.parametrize('name', list(MODELS))
+def test_concurrent_callers_do_not_share_row_buffers(name):
+    pipeline = fitted_monitor(name).compiled_pipeline
+    readings = random_readings(400)
+    expected = [pipeline.predict(reading) for reading in readings]
+    results = {}
+
+    def run(worker):
+        results[worker] = [pipeline.predict(reading) for reading in readings[worker::8] * 20]
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for worker, predictions in results.items():
+        assert predictions == expected[worker::8] * 20
@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_model_training import EnergyConfig, EnergyDataPreprocessor
+
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'JIIT_Raw_Hourly_Energy_Data.csv')
+
+
+def memory_mapped(values):
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+@pytest.mark.parametrize('fmt', ['npy', 'parquet'])
+def test_cached_dataset_matches_a_fresh_run(tmp_path, monkeypatch, fmt):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    path = tmp_path / "data.csv"
+    pd.read_csv(DATA, nrows=2000).to_csv(path, index=False)
+    monkeypatch.setattr(EnergyConfig, 'DATASET_CACHE_DIR', str(tmp_path / "cache"))
+    monkeypatch.setattr(EnergyConfig, 'DATASET_CACHE_FORMAT', fmt)
+
+    fresh = EnergyDataPreprocessor()
+    expected = fresh.prepare_dataset(str(path)).copy()
+    cached = EnergyDataPreprocessor()
+    loaded = cached.prepare_dataset(str(path))
+    assert list(loaded.columns) == list(expected.columns)
+    for col in expected.columns:
+        assert loaded[col].dtype == expected[col].dtype
+        np.testing.assert_array_equal(np.asarray(loaded[col]), np.asarray(expected[col]))
+    assert cached.time_index.equals(fresh.time_index)
+
+    if fmt == 'npy':
+        # The memory maps are used as they are, not copied into RAM
+        assert all(memory_mapped(loaded[col].to_numpy()) for col in loaded.columns)
+    cached.scale_features()
+    X, y = cached.get_preprocessed_data()
+    assert len(X) == len(expected) and not X.isna().any().any()
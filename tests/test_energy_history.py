@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from energy_model_training import EnergyHistory
+
+
+WINDOWS = {'minute': 60, 'hour': 3600}
+
+
+def brute_force(times, values, now, seconds, capacity):
+    # Readings still buffered and inside the window ending at now
+    times, values = np.asarray(times[-capacity:]), np.asarray(values[-capacity:])
+    inside = values[times > now - seconds]
+    if len(inside) == 0:
+        return {'count': 0, 'sum': 0.0, 'mean': None, 'min': None, 'max': None}
+    return {'count': len(inside), 'sum': pytest.approx(inside.sum()), 'mean': pytest.approx(inside.mean()),
+            'min': inside.min(), 'max': inside.max()}
+
+
+def test_window_stats_match_a_scan_of_the_buffer():
+    rng = np.random.default_rng(0)
+    capacity = 300
+    history = EnergyHistory(capacity, WINDOWS)
+    times, energy, temperature = [], [], []
+    t = 1_700_000_000.0
+    for i in range(2000):
+        t += rng.exponential(5)
+        times.append(t)
+        energy.append(rng.uniform(50, 250))
+        temperature.append(rng.uniform(20, 35))
+        history.append(t, energy[-1], temperature[-1])
+        if i % 97 == 0 or i > 1990:
+            for name, seconds in WINDOWS.items():
+                assert history.window_stats(name) == brute_force(times, energy, t, seconds, capacity)
+                assert history.window_stats(name, 'temperature') == \
+                    brute_force(times, temperature, t, seconds, capacity)
+    assert len(history) == capacity
+
+
+def test_capacity_evicts_the_oldest_readings():
+    history = EnergyHistory(4, {'day': 24 * 3600})
+    for i, energy in enumerate([500.0, 1.0, 2.0, 3.0, 4.0, 5.0]):
+        history.append(1000.0 + i, energy, 25.0)
+    assert history.as_arrays()['energy'].tolist() == [2.0, 3.0, 4.0, 5.0]
+    stats = history.window_stats('day')
+    assert stats['count'] == 4 and stats['max'] == 5.0 and stats['min'] == 2.0 and stats['sum'] == 14.0
+
+
+def test_windows_age_without_new_readings():
+    history = EnergyHistory(100, WINDOWS)
+    start = datetime(2025, 1, 1, 12, 0).timestamp()
+    for i in range(10):
+        history.append(start + i, 100.0 + i, 25.0)
+    assert history.average('minute') == pytest.approx(104.5)
+    assert history.window_stats('minute', now=start + 65)['count'] == 4
+    assert history.window_stats('minute', now=start + 600)['mean'] is None
+    assert history.window_stats('hour', now=start + 600)['count'] == 10
+
+
+def test_readings_must_not_go_back_in_time():
+    history = EnergyHistory(10, WINDOWS)
+    history.append(datetime(2025, 1, 1, 12, 0), 100.0, 25.0)
+    with pytest.raises(ValueError):
+        history.append(datetime(2025, 1, 1, 11, 59), 100.0, 25.0)
+    assert history.records() == [{'timestamp': datetime(2025, 1, 1, 12, 0), 'energy': 100.0, 'temperature': 25.0}]
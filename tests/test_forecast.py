@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_forecast import CALENDAR_COLUMNS, FORECAST_FEATURES, MIN_HISTORY, EnergyForecaster, forecast_features
+from energy_ingest_server import IngestionServer
+from energy_model_training import AlertSystem, EnergyConfig
+
+
+HORIZON = 24
+START = pd.Timestamp('2024-01-01')
+
+
+def hourly_series(hours=MIN_HISTORY + 400, base=100.0, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(START, periods=hours, freq='h')
+    energy = base + 40 * np.sin(2 * np.pi * index.hour / 24) + 15 * (index.dayofweek < 5) + rng.normal(0, 2, hours)
+    frame = pd.DataFrame({'energy': energy}, index=index)
+    frame[CALENDAR_COLUMNS] = 0
+    return frame
+
+
+@pytest.fixture(scope='module')
+def forecaster():
+    params = EnergyConfig.FORECAST_MODEL_PARAMS
+    EnergyConfig.FORECAST_MODEL_PARAMS = {'n_estimators': 30, 'max_depth': 3}
+    try:
+        return EnergyForecaster(horizon=HORIZON, cache_size=3).fit(
+            {'A': hourly_series(), 'B': hourly_series(base=300.0, seed=1)})
+    finally:
+        EnergyConfig.FORECAST_MODEL_PARAMS = params
+
+
+def test_features_only_use_energy_up_to_the_origin():
+    values = hourly_series()['energy'].to_numpy()
+    origin = MIN_HISTORY + 10
+    horizons = np.arange(1, HORIZON + 1)
+    features = forecast_features(values, START, [origin], horizons)
+    changed = values.copy()
+    changed[origin + 1:] += 1000
+    assert np.array_equal(forecast_features(changed, START, [origin], horizons), features)
+
+    lag = features[:, FORECAST_FEATURES.index('lag_168')]
+    assert np.array_equal(lag, values[origin + horizons - 168])
+    assert np.all(features[:, FORECAST_FEATURES.index('last')] == values[origin])
+    hours = features[:, FORECAST_FEATURES.index('hour')]
+    assert np.array_equal(hours, (START + pd.to_timedelta(origin + horizons, unit='h')).hour)
+
+
+def test_forecast_follows_the_daily_shape(forecaster):
+    times, predictions = forecaster.forecast('A')
+    assert len(times) == HORIZON and times[0] == START + pd.Timedelta(hours=MIN_HISTORY + 400)
+    daily = 100 + 40 * np.sin(2 * np.pi * times.hour / 24)
+    assert np.corrcoef(predictions, daily)[0, 1] > 0.9
+    assert forecaster.forecast('B')[1].mean() > predictions.mean() + 100
+
+
+def test_forecasts_are_cached_per_origin(forecaster):
+    forecaster.cache.clear()
+    forecaster.cache_stats = {'hits': 0, 'misses': 0}
+    origin = START + pd.Timedelta(hours=MIN_HISTORY + 100)
+    _, full = forecaster.forecast('A', origin=origin)
+    _, short = forecaster.forecast('A', horizon=6, origin=origin + pd.Timedelta(minutes=30))
+    assert np.array_equal(short, full[:6])
+    assert forecaster.cache_stats == {'hits': 1, 'misses': 1}
+
+    # LRU of cache_size entries: the oldest origin is evicted first
+    for hours in (101, 102, 103):
+        forecaster.forecast('A', origin=START + pd.Timedelta(hours=MIN_HISTORY + hours))
+    assert len(forecaster.cache) == 3 and ('A', origin) not in forecaster.cache
+
+
+def test_chart_records_show_actuals_until_the_data_ends(forecaster):
+    values = forecaster.history['A'][0]
+    origin = START + pd.Timedelta(hours=len(values) - 5)
+    records = forecaster.chart_records('A', HORIZON, origin)
+    assert [record['energy'] is None for record in records] == [False] * 4 + [True] * (HORIZON - 4)
+    assert records[0]['energy'] == values[-4]
+
+
+def test_new_hours_move_the_default_origin(forecaster):
+    values, _, _ = forecaster.history['B']
+    end = START + pd.Timedelta(hours=len(values) - 1)
+    newer = pd.Series([310.0, 320.0, 330.0], index=pd.date_range(end + pd.Timedelta(hours=1), periods=3, freq='h'))
+    forecaster.update_history('B', newer)
+    times, _ = forecaster.forecast('B')
+    assert times[0] == end + pd.Timedelta(hours=4)
+    assert np.array_equal(forecaster.history['B'][0][-3:], newer.to_numpy())
+
+
+def test_origin_needs_four_weeks_of_history(forecaster):
+    with pytest.raises(ValueError):
+        forecaster.forecast('A', origin=START + pd.Timedelta(hours=MIN_HISTORY - 2))
+    with pytest.raises(ValueError):
+        forecaster.forecast('A', horizon=HORIZON + 1)
+
+
+def live_copy(forecaster):
+    live = EnergyForecaster(horizon=HORIZON)
+    live.model, live.history = forecaster.model, dict(forecaster.history)
+    return live
+
+
+def test_live_readings_join_the_history_hour_by_hour(forecaster):
+    live = live_copy(forecaster)
+    values, _, _ = live.history['A']
+    end = START + pd.Timedelta(hours=len(values) - 1)
+    first, second = end + pd.Timedelta(hours=1), end + pd.Timedelta(hours=2)
+
+    live.add_readings('A', [first + pd.Timedelta(minutes=5), first + pd.Timedelta(minutes=50)], [100.0, 200.0])
+    live.add_readings('A', [first + pd.Timedelta(minutes=55)], [300.0])
+    assert len(live.history['A'][0]) == len(values)  # the hour is still open
+
+    live.add_readings('A', [second + pd.Timedelta(minutes=1)], [999.0])
+    assert len(live.history['A'][0]) == len(values) + 1
+    assert live.history['A'][0][-1] == pytest.approx(200.0)
+    assert live.forecast('A')[0][0] == second
+
+
+class ConstantMonitor:
+    best_model_name = 'constant'
+
+    def predict_batch(self, readings):
+        return np.full(len(readings), 250.0)
+
+
+def test_server_extends_the_history_with_served_predictions(forecaster):
+    live = live_copy(forecaster)
+    values, _, _ = live.history['B']
+    end = START + pd.Timedelta(hours=len(values) - 1)
+    server = IngestionServer(SimpleNamespace(iot_monitor=ConstantMonitor(), alert_system=AlertSystem()),
+                             forecaster=live)
+    payload = {'temperature': 28.0, 'humidity': 55.0, 'current': 2.0}
+    times = pd.date_range(end + pd.Timedelta(minutes=30), periods=8, freq='30min')
+    server._process_batch([({**payload, 'building': 'B'}, ts.to_pydatetime()) for ts in times]
+                          + [({**payload, 'building': 'unknown'}, times[0].to_pydatetime()), (payload, times[0])])
+    server.executor.shutdown()
+
+    # Hours end+1 .. end+3 are complete; end+4 is still open; 'A' got nothing
+    assert np.array_equal(live.history['B'][0][-3:], [250.0] * 3)
+    assert len(live.history['B'][0]) == len(values) + 3
+    assert len(live.history['A'][0]) == len(forecaster.history['A'][0])
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_model_training import (
+    EnergyDataPreprocessor, FastKNNImputer, FullKNNImputer, TimeInterpolationImputer, make_imputer
+)
+
+
+def with_gaps(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    temperature = rng.uniform(20, 35, n)
+    data = pd.DataFrame({'Temperature': temperature, 'Humidity': 100 - 2 * temperature + rng.normal(0, 0.5, n),
+                         'Occupancy': rng.integers(0, 100, n).astype(float)})
+    full = data.copy()
+    data.loc[rng.choice(n, 40, replace=False), 'Humidity'] = np.nan
+    data.loc[rng.choice(n, 20, replace=False), 'Occupancy'] = np.nan
+    return data, full
+
+
+def test_fast_knn_matches_full_knn_when_every_complete_row_is_searched():
+    # With one column missing, KNNImputer's donors are the complete rows too
+    data, full_data = with_gaps()
+    data['Occupancy'] = full_data['Occupancy']
+    fast = FastKNNImputer(n_neighbors=5, max_reference_rows=len(data)).fit_transform(data)
+    full = FullKNNImputer(n_neighbors=5).fit_transform(data)
+    assert not fast.isna().any().any()
+    assert np.allclose(fast.to_numpy(), full.to_numpy())
+    observed = data.notna().to_numpy()
+    assert np.array_equal(fast.to_numpy()[observed], data.to_numpy()[observed])
+
+
+def test_fast_knn_recovers_correlated_values():
+    data, full = with_gaps(4000)
+    imputed = FastKNNImputer(n_neighbors=5, max_reference_rows=1000).fit_transform(data)
+    gaps = data['Humidity'].isna()
+    assert np.abs(imputed['Humidity'][gaps] - full['Humidity'][gaps]).mean() < 2.0
+
+
+def test_rows_missing_every_column_get_the_column_means():
+    data = pd.DataFrame({'a': [1.0, 3.0, np.nan], 'b': [10.0, 30.0, np.nan]})
+    imputed = FastKNNImputer().fit_transform(data)
+    assert imputed.iloc[2].tolist() == [2.0, 20.0]
+
+
+def test_interpolation_follows_time_not_row_order():
+    times = pd.Series(pd.to_datetime(['2025-01-01 02:00', '2025-01-01 00:00', '2025-01-01 01:00',
+                                      '2025-01-01 04:00']))
+    data = pd.DataFrame({'energy': [20.0, 0.0, np.nan, 40.0]})
+    imputed = TimeInterpolationImputer().fit_transform(data, times)
+    assert imputed['energy'].tolist() == [20.0, 0.0, 10.0, 40.0]
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError, match="Unknown imputation strategy 'mean'"):
+        make_imputer('mean')
+    with pytest.raises(ValueError):
+        EnergyDataPreprocessor('mean')
+    imputer = FastKNNImputer()
+    assert make_imputer(imputer) is imputer
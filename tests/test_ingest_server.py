@@ -0,0 +1,93 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from energy_ingest_server import IngestionServer, validate_payload
+
+
+def raw_exchange(request):
+    # Sends one raw request to a fresh server and returns the raw response
+    async def run():
+        server = IngestionServer(energy_system=None)
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+        finally:
+            await server.close()
+        return response
+    return asyncio.run(run())
+
+
+def exchange(request):
+    # -> (status, JSON body)
+    head, _, body = raw_exchange(request).partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+@pytest.mark.parametrize('length', [b'abc', b'-5'])
+def test_invalid_content_length_gets_400(length):
+    status, body = exchange(b"POST /iot HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    assert status == 400
+    assert body == {'error': 'invalid Content-Length'}
+
+
+@pytest.mark.parametrize('text', ['NaN', 'Infinity', '-Infinity', '1e999'])
+def test_non_finite_readings_are_rejected(text):
+    payload = json.loads(f'{{"temperature": 25, "humidity": 50, "current": {text}}}')
+    assert validate_payload(payload) == "'current' must be finite"
+    payload = json.loads(f'{{"temperature": 25, "humidity": 50, "current": 3, "Occupancy": {text}}}')
+    assert validate_payload(payload) == "'Occupancy' must be finite"
+
+
+def test_non_finite_body_gets_400():
+    body = b'{"temperature": NaN, "humidity": 50, "current": 3}'
+    status, response = exchange(b"POST /iot HTTP/1.1\r\nConnection: close\r\nContent-Length: "
+                                + str(len(body)).encode() + b"\r\n\r\n" + body)
+    assert status == 400
+    assert response == {'error': "'temperature' must be finite"}
+    assert validate_payload({'temperature': 25, 'humidity': 50, 'current': 3}) is None
+
+
+@pytest.mark.parametrize('method', [b'POST', b'PUT', b'DELETE'])
+def test_metrics_only_answers_get(method):
+    status, body = exchange(method + b" /metrics HTTP/1.1\r\nConnection: close\r\nContent-Length: 0\r\n\r\n")
+    assert status == 405
+    assert body == {'error': 'use GET'}
+
+
+def test_metrics_get_returns_prometheus_text():
+    head, _, body = raw_exchange(b"GET /metrics HTTP/1.1\r\nConnection: close\r\n\r\n").partition(b"\r\n\r\n")
+    assert int(head.split()[1]) == 200
+    assert b"text/plain" in head and b"# TYPE" in body
+
+
+class ThreadRecordingForecaster:
+    history = {'B1': None}
+
+    def __init__(self):
+        self.threads = []
+
+    def chart_records(self, building, horizon, origin):
+        self.threads.append(threading.current_thread().name)
+        return [{'building': building, 'horizon': horizon}]
+
+
+def test_forecast_runs_off_the_event_loop():
+    forecaster = ThreadRecordingForecaster()
+
+    async def run():
+        server = IngestionServer(energy_system=None, forecaster=forecaster)
+        try:
+            return await server._route('GET', '/forecast?building=B1&horizon=6', b"")
+        finally:
+            server.executor.shutdown(wait=True)
+
+    assert asyncio.run(run()) == (200, {'building': 'B1', 'records': [{'building': 'B1', 'horizon': 6}]})
+    assert forecaster.threads[0].startswith('ingest-predict')
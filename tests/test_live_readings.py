@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_model_training import EnergyConfig, calendar_features, load_live_readings
+from energy_store import TimeSeriesStore
+
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'JIIT_Raw_Hourly_Energy_Data.csv')
+
+
+def write_live_csv(path, start, seconds, step, current):
+    times = pd.Timestamp(start) + pd.to_timedelta(np.arange(0, seconds, step), unit='s')
+    pd.DataFrame({'timestamp': times, 'temp': 28.0, 'hum': 55.0, 'current': current, 'pred': 130.0}).to_csv(
+        path, index=False)
+
+
+def test_device_energy_is_scaled_to_a_building_hour(tmp_path):
+    path = tmp_path / "live_data.csv"
+    write_live_csv(path, '2025-01-04 10:00', 2 * 3600, 10, 4.0)
+    readings, energies = load_live_readings(str(path), load_scale={'live': 150.0})
+
+    device_kwh = 4.0 * EnergyConfig.SUPPLY_VOLTAGE / 1000
+    # The last reading of the second hour covers nothing, the hour is scaled back up
+    assert energies == pytest.approx([device_kwh * 150.0] * 2)
+    assert readings['Hour'].tolist() == [10, 11]
+    assert readings['hour'].tolist() == [0, 0]
+    assert readings['is_weekend'].tolist() == [1, 1]
+
+
+def test_uncalibrated_or_sparse_devices_give_no_labels(tmp_path):
+    path = tmp_path / "live_data.csv"
+    write_live_csv(path, '2025-01-04 10:00', 3600, 10, 4.0)
+    readings, energies = load_live_readings(str(path), load_scale={})
+    assert len(readings) == 0 and len(energies) == 0
+
+    # Ten minutes of readings are too little of the hour to label it
+    write_live_csv(path, '2025-01-04 10:00', 600, 10, 4.0)
+    readings, energies = load_live_readings(str(path), load_scale={'live': 150.0})
+    assert len(energies) == 0
+
+
+def test_store_devices_are_averaged_per_hour(tmp_path):
+    times = pd.Timestamp('2025-03-03 09:00') + pd.to_timedelta(np.arange(0, 3600, 5), unit='s')
+    with TimeSeriesStore(str(tmp_path / "store")) as store:
+        for name, current in (('esp-1', 2.0), ('esp-2', 6.0)):
+            store.append(times, {'temperature': np.full(len(times), 30.0), 'humidity': np.full(len(times), 50.0),
+                                 'current': np.full(len(times), current), 'pred': np.zeros(len(times))}, name)
+    readings, energies = load_live_readings(str(tmp_path / "store"), load_scale={'esp-1': 100.0, 'esp-2': 20.0})
+    kwh = EnergyConfig.SUPPLY_VOLTAGE / 1000
+    assert energies == pytest.approx([(2.0 * kwh * 100.0 + 6.0 * kwh * 20.0) / 2])
+    assert readings['Temperature'].tolist() == [30.0]
+
+
+def test_calendar_features_match_the_hourly_data():
+    data = pd.read_csv(DATA, nrows=24 * 14)
+    times = pd.to_datetime(data['Date']) + pd.to_timedelta(data['Hour'], unit='h')
+    features = calendar_features(pd.DatetimeIndex(times))
+    for name in ('DayOfWeek', 'TimeOfDay'):
+        labels = sorted(data[name].astype(str).unique())
+        assert np.array_equal(features[name], [labels.index(value) for value in data[name].astype(str)])
+    assert np.array_equal(features['Hour'], data['Hour'])
+    assert calendar_features(times[30].to_pydatetime()) == {key: values[30] for key, values in features.items()}
+
+
+def test_online_update_learns_from_building_scale_labels(serving_pair):
+    from energy_model_training import IoTEnergyMonitor, OnlineModelUpdater
+
+    monitor = IoTEnergyMonitor(*serving_pair)
+    rng = np.random.default_rng(0)
+    readings = pd.DataFrame({'Temperature': rng.uniform(22, 32, 48).round(1), 'Humidity': 50.0, 'Occupancy': 50.0,
+                             **calendar_features(pd.date_range('2025-01-06', periods=48, freq='h'))})
+    energies = monitor.predict_batch(readings) + rng.normal(0, 1, 48)
+    report = OnlineModelUpdater(monitor).update(readings, energies)
+    assert report['updated'] and not report['drift']
+    assert report['rmse_after'] < 3.0
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sklearn.kernel_approximation import Nystroem
+from sklearn.metrics import r2_score
+from sklearn.svm import LinearSVR, SVR
+
+from energy_model_training import EnergyConfig, MLModelComparator, NystroemSVR, build_model, uses_approximation
+
+
+def scaled_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    y = 50 + 10 * np.sin(X[:, 0]) + 5 * X[:, 1] ** 2 - 3 * X[:, 2] + rng.normal(0, 0.5, n)
+    return X, y
+
+
+def test_switches_to_the_approximation_above_the_row_threshold(monkeypatch):
+    monkeypatch.setattr(EnergyConfig, 'SVR_APPROXIMATION_ROWS', 1000)
+    assert type(build_model('SVR', n_rows=1000)) is SVR
+    assert type(build_model('SVR', n_rows=1001)) is NystroemSVR
+    assert type(build_model('SVR')) is SVR
+    assert not uses_approximation('Random Forest', 10 ** 6)
+    # Tuned params carry over to the stand-in
+    assert build_model('SVR', {'C': 10.0}, n_rows=5000).C == 10.0
+
+    comparator = MLModelComparator()
+    comparator.initialize_models({'SVR': {'C': 10.0}}, n_rows=500)
+    comparator.size_models(5000)
+    assert type(comparator.models['SVR']) is NystroemSVR and comparator.models['SVR'].C == 10.0
+    comparator.size_models(500)
+    assert type(comparator.models['SVR']) is SVR
+
+
+def test_accuracy_is_close_to_exact_svr():
+    X, y = scaled_rows(4000)
+    X_test, y_test = scaled_rows(1000, seed=1)
+    exact = SVR(C=10.0).fit(X, y)
+    approximate = NystroemSVR(n_components=300, C=10.0, random_state=0).fit(X, y)
+    exact_r2 = r2_score(y_test, exact.predict(X_test))
+    assert exact_r2 > 0.9
+    assert r2_score(y_test, approximate.predict(X_test)) > exact_r2 - 0.05
+
+
+def test_folded_prediction_matches_the_nystroem_pipeline():
+    X, y = scaled_rows(2000)
+    model = NystroemSVR(n_components=100, random_state=0).fit(X, y)
+    feature_map = Nystroem(kernel='rbf', gamma=model.gamma_, n_components=100, random_state=0)
+    linear = LinearSVR(epsilon=0.1, max_iter=5000, random_state=0).fit(feature_map.fit_transform(X), y)
+    expected = linear.predict(feature_map.transform(X[:50]))
+    assert model.predict(X[:50], block_rows=7) == pytest.approx(expected, rel=1e-6, abs=1e-6)
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from energy_model_training import EnergyConfig, MLModelComparator
+
+
+class SlowRegressor(RegressorMixin, BaseEstimator):
+    # Fits for `seconds`, long enough to overrun a training budget
+    def __init__(self, seconds=30.0):
+        self.seconds = seconds
+
+    def fit(self, X, y):
+        time.sleep(self.seconds)
+        self.mean_ = float(np.mean(y))
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.mean_)
+
+
+@pytest.fixture
+def split():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({'Temperature': rng.uniform(20, 35, 400), 'Occupancy': rng.integers(0, 100, 400)})
+    y = 2 * X['Temperature'] + 0.5 * X['Occupancy'] + rng.normal(0, 1, 400)
+    return X[:300], X[300:], y[:300], y[300:]
+
+
+def comparator(models):
+    comparator = MLModelComparator()
+    comparator.models = models
+    return comparator
+
+
+def models():
+    return {'Linear Regression': LinearRegression(),
+            'Random Forest': RandomForestRegressor(n_estimators=20, random_state=42, n_jobs=-1)}
+
+
+def test_worker_results_match_in_process_training(split):
+    in_process = comparator(models()).train_and_compare_models(*split, parallel=False)
+    workers = comparator(models()).train_and_compare_models(*split, parallel=True)
+    for name in in_process:
+        assert workers[name]['r2'] == pytest.approx(in_process[name]['r2'])
+    # Fitted single-threaded in its worker, served with the configured n_jobs
+    assert workers['Random Forest']['model'].n_jobs == -1
+
+
+def test_model_over_the_time_budget_is_cancelled(split):
+    slow = comparator({**models(), 'Slow': SlowRegressor()})
+    start = time.monotonic()
+    results = slow.train_and_compare_models(*split, parallel=True, time_budget=3.0)
+    assert time.monotonic() - start < 20
+    assert results['Slow'] is None and slow.status['Slow'] == 'timed out'
+    assert slow.status['Linear Regression'] == 'ok' and slow.best_model in ('Linear Regression', 'Random Forest')
+
+
+def test_workers_can_be_started_from_a_background_thread(split, monkeypatch):
+    # As the retrain thread does
+    monkeypatch.setattr(EnergyConfig, 'PARALLEL_TRAINING', True)
+    trained = comparator(models())
+    thread = threading.Thread(target=trained.train_and_compare_models, args=split)
+    thread.start()
+    thread.join(60)
+    assert not thread.is_alive()
+    assert set(trained.status.values()) == {'ok'}
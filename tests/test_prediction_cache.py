@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from energy_model_training import IoTEnergyMonitor, PredictionCache
+
+
+def readings(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Temperature': rng.choice([24.5, 28.0, 31.2], n), 'Humidity': rng.choice([50, 60], n),
+                         'Occupancy': rng.choice([10, 80], n), 'hour': np.zeros(n)})
+
+
+def test_swap_replaces_scaler_and_model_together(serving_pair, other_serving_pair):
+    monitor = IoTEnergyMonitor(*serving_pair)
+    batch = readings()
+    before = monitor.predict_batch(batch)
+    preprocessor, model, _, version = monitor.serving
+
+    monitor.set_models(*other_serving_pair)
+    new_preprocessor, new_model, _, new_version = monitor.serving
+    assert new_preprocessor is other_serving_pair[1] and new_version != version
+    expected = IoTEnergyMonitor(*other_serving_pair).predict_batch(batch, use_cache=False)
+    assert np.array_equal(monitor.predict_batch(batch), expected)
+    assert not np.array_equal(before, expected)
+    assert monitor.predict_energy(batch.iloc[0].to_dict()) == expected[0]
+
+
+def test_predictions_of_the_old_model_are_not_cached_after_a_swap(serving_pair, other_serving_pair):
+    monitor = IoTEnergyMonitor(*serving_pair)
+    cache = monitor.prediction_cache
+    batch = readings(20)
+    preprocessor, model, _, version = monitor.serving
+    matrix = monitor.assemble_feature_matrix(batch, preprocessor.feature_names)
+    keys = cache.keys(matrix, version)
+    stale = monitor._predict_matrix(matrix, preprocessor, model)
+
+    # A batch that read the old tuple finishes after the swap
+    monitor.set_models(*other_serving_pair)
+    cache.put_many(keys, stale)
+    assert cache.stats()['entries'] == 0
+    expected = IoTEnergyMonitor(*other_serving_pair).predict_batch(batch, use_cache=False)
+    assert np.array_equal(monitor.predict_batch(batch), expected)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(['Temperature', 'Humidity'], capacity=2)
+    a, b, c = (cache.key(np.array(row)) for row in ([24.5, 50.0], [25.0, 50.0], [25.5, 50.0]))
+    cache.put_many([a, b], [1.0, 2.0])
+    assert cache.get(a) == 1.0
+    cache.put(c, 3.0)
+    assert cache.get(b) is None and cache.get(a) == 1.0 and cache.get(c) == 3.0
+    assert cache.stats()['evictions'] == 1
+
+
+def test_repeats_within_a_batch_count_as_hits():
+    cache = PredictionCache(['Temperature', 'Humidity'])
+    matrix = np.array([[24.5, 50.0], [24.5, 50.0], [24.55, 50.0], [26.0, 61.0]])
+    keys = cache.keys(matrix)
+    assert keys[0] == keys[1] and keys[2] is None
+    values = cache.get_many(keys)
+    assert np.isnan(values).all()
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['bypassed']) == (1, 2, 1)
+
+
+def test_snapping_moves_off_grid_readings_and_their_squares():
+    cache = PredictionCache(['Temperature', 'Humidity', 'Temperature_squared'], snap=True)
+    row = np.array([24.54, 50.0, 24.54 ** 2])
+    key = cache.key(row)
+    assert key is not None and row[0] == 24.5 and row[2] == 24.5 ** 2
+
+
+def test_cached_predictions_equal_the_model(serving_pair):
+    monitor = IoTEnergyMonitor(*serving_pair)
+    batch = readings(500, seed=3)
+    first = monitor.predict_batch(batch)
+    again = monitor.predict_batch(batch)
+    assert np.array_equal(first, monitor.predict_batch(batch, use_cache=False))
+    assert np.array_equal(again, first)
+    assert monitor.prediction_cache.stats()['hits'] >= len(batch)
@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_ingest_server import IngestionServer
+from energy_model_training import AlertSystem, CarbonAnalyzer, CostAnalyzer
+from energy_rollup import RollupStore
+
+
+class ConstantMonitor:
+    # Predicts the same hourly kWh for every reading
+    best_model_name = 'constant'
+
+    def __init__(self, energy):
+        self.energy = energy
+
+    def predict_batch(self, readings):
+        return np.full(len(readings), self.energy)
+
+
+def test_hour_energy_is_mean_of_its_readings():
+    store = RollupStore()
+    start = pd.Timestamp('2025-01-01 12:00')
+    store.add([start + pd.Timedelta(seconds=s) for s in range(0, 3600, 36)], np.full(100, 137.0))
+    store.add([start + pd.Timedelta(minutes=30)], [237.0])
+
+    hour = store.series(start, start + pd.Timedelta(hours=1), 'hour')
+    assert len(hour) == 1
+    assert hour['energy'].iloc[0] == pytest.approx((100 * 137.0 + 237.0) / 101)
+    assert hour['count'].iloc[0] == 101
+    assert hour['peak'].iloc[0] == 237.0
+
+
+def test_day_and_month_sum_hour_means():
+    store = RollupStore()
+    hours = pd.date_range('2025-03-01', periods=48, freq='h')
+    for repeat in range(5):
+        store.add(hours, np.arange(48, dtype=float))
+
+    day = store.series(hours[0], hours[-1] + pd.Timedelta(hours=1), 'day')
+    assert day['energy'].tolist() == pytest.approx([sum(range(24)), sum(range(24, 48))])
+    totals = store.totals(hours[0], hours[-1] + pd.Timedelta(hours=1))
+    assert totals['energy'] == pytest.approx(sum(range(48)))
+    assert totals['count'] == 5 * 48
+    assert totals['cost'] == pytest.approx(CostAnalyzer.calculate_costs(sum(range(48)))[0])
+    assert totals['co2'] == pytest.approx(CarbonAnalyzer.calculate_carbon_impact(sum(range(48))))
+    month = store.series(hours[0], hours[-1], 'month')
+    assert month['energy'].iloc[0] == pytest.approx(sum(range(48)))
+
+
+def test_hourly_csv_rows_keep_their_energy(tmp_path):
+    path = tmp_path / "hourly.csv"
+    pd.DataFrame({'Date': ['2025-01-01'] * 24, 'Hour': range(24), 'EnergyConsumption': np.arange(24.0)}).to_csv(path)
+    store = RollupStore.from_csv(path)
+    totals = store.totals(pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-02'))
+    assert totals['energy'] == pytest.approx(sum(range(24)))
+    assert totals['peak'] == 23.0
+
+
+def test_server_rolls_up_one_hour_of_posts_as_one_hour_of_energy():
+    energy_system = SimpleNamespace(iot_monitor=ConstantMonitor(137.0), alert_system=AlertSystem())
+    rollups = RollupStore()
+    server = IngestionServer(energy_system, rollups=rollups)
+
+    # A device posting every 40 ms for an hour, in batches like the micro-batcher's
+    start = pd.Timestamp('2025-01-01 09:00').to_pydatetime()
+    payload = {'temperature': 28.0, 'humidity': 55.0, 'current': 2.0, 'device': 'esp-1'}
+    n = 90_000
+    times = [start + pd.Timedelta(milliseconds=40 * i) for i in range(n)]
+    for first in range(0, n, 512):
+        server._process_batch([(payload, ts) for ts in times[first:first + 512]])
+    server.executor.shutdown()
+
+    hour = rollups.devices.series(start, start + pd.Timedelta(hours=1), 'hour', 'esp-1')
+    assert hour['count'].iloc[0] == n
+    assert hour['energy'].iloc[0] == pytest.approx(137.0)
+    assert rollups.devices.totals(start, start + pd.Timedelta(days=1))['energy'] == pytest.approx(137.0)
+
+
+def test_device_estimates_stay_out_of_the_campus_total():
+    energy_system = SimpleNamespace(iot_monitor=ConstantMonitor(137.0), alert_system=AlertSystem())
+    hours = pd.date_range('2025-01-01', periods=24, freq='h')
+    rollups = RollupStore()
+    rollups.add(hours, np.full(24, 500.0))
+    server = IngestionServer(energy_system, rollups=rollups)
+    payload = {'temperature': 28.0, 'humidity': 55.0, 'current': 2.0}
+    for device in ('esp-1', 'esp-2'):
+        server._process_batch([({**payload, 'device': device}, ts.to_pydatetime()) for ts in hours])
+    server.executor.shutdown()
+
+    summary = rollups.summary(hours[0], hours[-1] + pd.Timedelta(hours=1))
+    assert summary['total']['energy'] == pytest.approx(24 * 500.0)
+    assert list(summary['groups']) == ['campus']
+    assert {device: totals['energy'] for device, totals in summary['devices'].items()} == \
+        {'esp-1': pytest.approx(24 * 137.0), 'esp-2': pytest.approx(24 * 137.0)}
+
+    status, response = server._rollup({'device': ['esp-2'], 'level': ['day'], 'start': ['2025-01-01'],
+                                       'end': ['2025-01-02']})
+    assert status == 200 and response['records'][0]['total'] == pytest.approx(24 * 137.0)
+    assert response['total']['energy'] == pytest.approx(24 * 500.0)
+
+
+def test_range_totals_and_peaks_match_the_readings():
+    rng = np.random.default_rng(7)
+    store = RollupStore()
+    hours = pd.date_range('2025-01-20', '2025-04-10', freq='h', inclusive='left')
+    energy = {group: rng.uniform(50, 400, len(hours)) for group in ('A', 'B')}
+    for group, values in energy.items():
+        store.add(hours, values, group)
+
+    for start, end in [('2025-01-20 05:00', '2025-01-20 09:00'), ('2025-01-25 13:00', '2025-03-02 07:00'),
+                       ('2025-01-31 23:00', '2025-04-01 01:00'), ('2025-02-01', '2025-03-01')]:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        inside = (hours >= start) & (hours < end)
+        breakdown = store.breakdown(start, end)
+        for group, values in energy.items():
+            assert breakdown[group]['energy'] == pytest.approx(values[inside].sum())
+            assert breakdown[group]['peak'] == values[inside].max()
+            assert breakdown[group]['count'] == inside.sum()
+        assert store.totals(start, end)['peak'] == max(values[inside].max() for values in energy.values())
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+from energy_scenarios import BLOCK_MONTHS, HOURS_PER_MONTH, ScenarioProfile, ScenarioSimulator
+
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "JIIT_Raw_Hourly_Energy_Data.csv")
+
+TEMPERATURE_KW = 2.0
+
+
+class LinearMonitor:
+    # Hourly kW from temperature and occupancy, so changes can be computed by hand
+    def predict_batch(self, readings, use_cache=True):
+        return 20 + TEMPERATURE_KW * np.asarray(readings['Temperature']) + 0.5 * np.asarray(readings['Occupancy'])
+
+
+@pytest.fixture(scope='module')
+def profile():
+    return ScenarioProfile.from_csv(DATA)
+
+
+def test_seeded_runs_are_reproducible(profile):
+    first = ScenarioSimulator(LinearMonitor(), profile, seed=7).run(3 * HOURS_PER_MONTH)
+    again = ScenarioSimulator(LinearMonitor(), profile, seed=7).run(3 * HOURS_PER_MONTH)
+    other = ScenarioSimulator(LinearMonitor(), profile, seed=8).run(3 * HOURS_PER_MONTH)
+    for name, values in first['samples'].items():
+        assert np.array_equal(values, again['samples'][name])
+    assert first['distributions'] == again['distributions']
+    assert not np.array_equal(first['samples']['hourly_load_kw'], other['samples']['hourly_load_kw'])
+
+    # Blocks are seeded by position: a longer run starts with the same months
+    longer = ScenarioSimulator(LinearMonitor(), profile, seed=7).run((BLOCK_MONTHS + 2) * HOURS_PER_MONTH)
+    assert np.array_equal(longer['samples']['hourly_load_kw'][:3 * HOURS_PER_MONTH], first['samples']['hourly_load_kw'])
+
+
+def test_added_appliances_only_add_their_own_load(profile):
+    simulator = ScenarioSimulator(LinearMonitor(), profile, seed=3)
+    baseline, scenario = simulator.compare(2 * HOURS_PER_MONTH, {'add': {'AC': 20}})
+    added = scenario['samples']['hourly_load_kw'] - baseline['samples']['hourly_load_kw']
+    assert np.all(added >= 0)
+    # 20 units of 1.5-3 kW, mostly running when HVAC is on
+    assert 10 < added.mean() < 60
+    assert np.allclose(scenario['samples']['appliance_load_kw'] - baseline['samples']['appliance_load_kw'], added)
+    assert scenario['change']['hourly_load_kw']['mean'] == pytest.approx(added.mean())
+    assert scenario['change']['monthly_energy_kwh']['mean'] == pytest.approx(added.mean() * HOURS_PER_MONTH)
+
+
+def test_warmer_weather_changes_load_by_the_model_response(profile):
+    simulator = ScenarioSimulator(LinearMonitor(), profile, seed=3)
+    baseline, scenario = simulator.compare(HOURS_PER_MONTH, {'temperature_offset': 1.5})
+    assert np.allclose(scenario['samples']['hourly_load_kw'] - baseline['samples']['hourly_load_kw'],
+                       1.5 * TEMPERATURE_KW)
+    assert scenario['change']['peak_load_kw']['mean'] == pytest.approx(1.5 * TEMPERATURE_KW)
+    # Only the load changed; the registered appliances drew the same
+    assert np.array_equal(scenario['samples']['appliance_load_kw'], baseline['samples']['appliance_load_kw'])
+
+
+def test_unknown_or_negative_additions_are_rejected(profile):
+    simulator = ScenarioSimulator(LinearMonitor(), profile)
+    with pytest.raises(ValueError):
+        simulator.run(10, {'add': {'Heater': 1}})
+    with pytest.raises(ValueError):
+        simulator.run(10, {'add': {'AC_Floor1': -1}})
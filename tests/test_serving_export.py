@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import r2_score
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+from conftest import FEATURES
+from energy_model_training import CompactTreeEnsemble, IoTEnergyMonitor, OnlineModelUpdater, export_serving_model
+
+
+def training_data(n=1500, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({'Temperature': rng.uniform(20, 35, n), 'Humidity': rng.uniform(40, 80, n),
+                      'Occupancy': rng.integers(0, 100, n).astype(float), 'hour': np.zeros(n)})
+    X['Temperature_squared'] = X['Temperature'] ** 2
+    X['Occupancy_squared'] = X['Occupancy'] ** 2
+    y = 60 + 3 * X['Temperature'] + 0.5 * X['Occupancy'] + rng.normal(0, 2, n)
+    scaler = StandardScaler().fit(X[FEATURES])
+    return pd.DataFrame(scaler.transform(X[FEATURES]), columns=FEATURES), y.to_numpy(), scaler
+
+
+@pytest.mark.parametrize('model', [DecisionTreeRegressor(random_state=0),
+                                   RandomForestRegressor(n_estimators=15, random_state=0),
+                                   GradientBoostingRegressor(n_estimators=40, random_state=0)],
+                         ids=lambda model: type(model).__name__)
+def test_exported_model_predicts_like_the_source(tmp_path, model):
+    X, y, _ = training_data()
+    model.fit(X[:1200], y[:1200])
+    path = str(tmp_path / "serving.joblib")
+    report = export_serving_model(model, X[1200:], y[1200:], path=path, max_r2_drop=-1)
+    assert report['format'] == 'compact' and report['depth'] == CompactTreeEnsemble.from_sklearn(model).depth
+
+    exported = joblib.load(path, mmap_mode='r')
+    expected = model.predict(X.to_numpy())
+    np.testing.assert_allclose(exported.predict(X.to_numpy()), expected, rtol=1e-6)
+
+
+def test_depth_cap_stays_within_the_allowed_r2_drop(tmp_path):
+    X, y, _ = training_data()
+    model = DecisionTreeRegressor(random_state=0).fit(X[:1200], y[:1200])
+    X_val, y_val = X[1200:].to_numpy(), y[1200:]
+    full_depth = CompactTreeEnsemble.from_sklearn(model).depth
+
+    for max_r2_drop in (0.001, 0.01, 0.05):
+        report = export_serving_model(model, X_val, y_val, path=str(tmp_path / "serving.joblib"),
+                                      max_r2_drop=max_r2_drop)
+        # (less a float32 rounding margin for the leaf values)
+        assert report['r2_exported'] >= report['r2_full'] - max_r2_drop - 1e-6
+        if report['depth'] > 1:
+            # The next shallower cap would have cost more than allowed
+            shallower = CompactTreeEnsemble.from_sklearn(model, max_depth=report['depth'] - 1)
+            assert r2_score(y_val, shallower.predict(X_val)) < report['r2_full'] - max_r2_drop
+    assert report['depth'] < full_depth
+
+
+def test_warm_started_compact_model_keeps_fast_kernel_and_tree_updates(tmp_path):
+    X, y, scaler = training_data()
+    model = GradientBoostingRegressor(n_estimators=40, random_state=0).fit(X, y)
+    full_path = str(tmp_path / "model_Gradient_Boosting.joblib")
+    joblib.dump(model, full_path)
+    compact = CompactTreeEnsemble.from_sklearn(model)
+    preprocessor = SimpleNamespace(feature_names=list(FEATURES), scaler=scaler)
+    comparator = SimpleNamespace(best_model='Gradient Boosting', results={'Gradient Boosting': {
+        'model': compact, 'rmse': 2.0, 'full_model_path': full_path}})
+    monitor = IoTEnergyMonitor(comparator, preprocessor)
+    assert monitor.compiled_pipeline.kernel == 'CompactTreeEnsemble'
+
+    reading = {'Temperature': 27.5, 'Humidity': 55.0, 'Occupancy': 40}
+    assert monitor.predict_energy(reading) == pytest.approx(monitor.predict_energy_reference(reading))
+
+    rng = np.random.default_rng(1)
+    readings = pd.DataFrame({'Temperature': rng.uniform(22, 32, 48), 'Humidity': 50.0, 'Occupancy': 50.0})
+    energies = monitor.predict_batch(readings) + rng.normal(0, 1, 48)
+    report = OnlineModelUpdater(monitor).update(readings, energies)
+    assert report['updated'] and report['estimators'] == 60
+    assert isinstance(monitor.best_model, GradientBoostingRegressor)
@@ -0,0 +1,36 @@
+import threading
+
+from energy_model_training import StageTimer
+
+
+def test_worker_thread_timer_leaves_main_thread_peak_intact():
+    worker = {}
+
+    def run_worker():
+        with StageTimer() as timer:
+            sum(range(1000))
+        worker['timer'] = timer
+
+    with StageTimer() as outer:
+        block = bytearray(8 * 1024 * 1024)
+        del block
+        thread = threading.Thread(target=run_worker)
+        thread.start()
+        thread.join()
+
+    # The worker neither reset the process-wide peak nor touched the open-timer stack
+    assert worker['timer'].peak_memory is None
+    assert worker['timer'].wall > 0
+    assert outer.peak_memory >= 8 * 1024 * 1024
+    assert StageTimer._open == []
+
+
+def test_nested_timers_keep_the_outer_peak():
+    with StageTimer() as outer:
+        block = bytearray(4 * 1024 * 1024)
+        del block
+        with StageTimer() as inner:
+            small = bytearray(1024 * 1024)
+            del small
+    assert 1000 * 1024 <= inner.peak_memory < 4 * 1024 * 1024
+    assert outer.peak_memory >= 4 * 1024 * 1024
@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from energy_store import TimeSeriesStore
+
+
+START = pd.Timestamp('2025-11-18 00:00:00')
+
+
+def readings(n, offset=0):
+    times = START + pd.to_timedelta(np.arange(offset, offset + n), unit='s')
+    values = {'temperature': 20 + np.arange(n) % 7 * 0.5, 'humidity': np.full(n, 55.0),
+              'current': np.arange(offset, offset + n) * 0.01}
+    return times, values
+
+
+def test_readings_round_trip_exactly(tmp_path):
+    times, values = readings(1000)
+    values['current'][::7] = np.nan
+    with TimeSeriesStore(str(tmp_path / "store"), block_rows=64) as store:
+        store.append(times, values, series='esp32-1')
+        frame = store.read(series='esp32-1')
+    assert frame['timestamp'].equals(pd.Series(times))
+    for col, expected in values.items():
+        np.testing.assert_array_equal(frame[col].to_numpy(), expected)
+    assert frame['pred'].isna().all()
+
+
+def test_range_reads_only_return_the_range(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "store"), block_rows=100)
+    store.append(*readings(1000))
+    store.append(*readings(50, 5000))  # still buffered
+    frame = store.read(START + pd.Timedelta(seconds=250), START + pd.Timedelta(seconds=5010))
+    assert frame['timestamp'].iloc[0] == START + pd.Timedelta(seconds=250)
+    assert len(frame) == 750 + 10
+    assert store.time_range() == (START, START + pd.Timedelta(seconds=5049))
+    assert store.read(series='unknown').empty
+    store.close()
+
+
+def test_out_of_order_appends_are_read_in_time_order(tmp_path):
+    with TimeSeriesStore(str(tmp_path / "store")) as store:
+        store.append(*readings(10, 100))
+        store.append(*readings(10, 0))
+        store.flush()
+        store.append(*readings(5, 50))
+        frame = store.read()
+    assert frame['timestamp'].is_monotonic_increasing and len(frame) == 25
+
+
+def test_reopened_store_drops_a_torn_block(tmp_path):
+    path = str(tmp_path / "store")
+    with TimeSeriesStore(path, block_rows=100) as store:
+        store.append(*readings(300))
+    segment = tmp_path / "store" / "device" / "seg_000001.tsb"
+    size = segment.stat().st_size
+    with open(segment, 'ab') as f:
+        f.write(b'TSB1 partial block')
+
+    reopened = TimeSeriesStore(path)
+    assert segment.stat().st_size == size
+    assert len(reopened.read()) == 300
+    reopened.append(*readings(100, 300))
+    reopened.close()
+    assert len(TimeSeriesStore(path).read()) == 400
+    assert reopened.stats()['device']['blocks'] == 4
+
+
+def test_concurrent_reads_while_appending(tmp_path):
+    store = TimeSeriesStore(str(tmp_path / "store"), block_rows=16)
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        seen = 0
+        try:
+            while not done.is_set():
+                count = len(store.read())
+                assert count >= seen
+                seen = count
+        except Exception as e:
+            errors.append(e)
+            done.set()
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(300):
+        store.append(*readings(16, i * 16))
+    done.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(store.read()) == 300 * 16
+    store.close()
@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import energy_model_training
+from energy_model_training import HyperparameterTuner
+
+
+def hourly_data(n=900, seed=0):
+    rng = np.random.default_rng(seed)
+    times = pd.Series(pd.date_range('2024-01-01', periods=n, freq='h'))
+    X = pd.DataFrame({'t': np.arange(n, dtype=float), 'a': rng.normal(size=n), 'b': rng.normal(size=n)})
+    y = 3 * X['a'] - X['b'] + 0.01 * X['t'] + rng.normal(0, 0.1, n)
+    # Rows arrive out of time order, as after the preprocessor's merges
+    order = rng.permutation(n)
+    return X.iloc[order].reset_index(drop=True), y.iloc[order].reset_index(drop=True), times.iloc[order].reset_index(drop=True)
+
+
+@pytest.fixture
+def counted_evaluations(monkeypatch):
+    calls = []
+    evaluate = energy_model_training._evaluate_candidate
+
+    def counting(family, params, n_rows):
+        calls.append((family, json.dumps(params, sort_keys=True), n_rows))
+        return evaluate(family, params, n_rows)
+    monkeypatch.setattr(energy_model_training, '_evaluate_candidate', counting)
+    return calls
+
+
+def test_validation_hours_come_after_fit_hours(tmp_path):
+    X, y, times = hourly_data()
+    tuner = HyperparameterTuner(cache_dir=str(tmp_path), max_workers=1)
+    data_dir = tuner._prepare_data(X, y, times)
+    X_fit, X_val = (np.load(os.path.join(data_dir, f"{name}.npy")) for name in ('X_fit', 'X_val'))
+    # Column 't' is the hour number
+    assert X_fit[:, 0].max() < X_val[:, 0].min()
+    assert np.all(np.diff(X_fit[:, 0]) > 0)
+    assert len(X_val) == 180
+
+
+def test_resumed_search_skips_scored_candidates(tmp_path, counted_evaluations):
+    X, y, times = hourly_data()
+    first = HyperparameterTuner(n_candidates=4, factor=2, cache_dir=str(tmp_path), max_workers=1)
+    best = first.tune(X, y, families=['Decision Tree'], time_index=times)
+    scored = len(counted_evaluations)
+    assert scored > 4
+
+    # Interrupted run: the log only holds the first rung
+    data_dir = first._prepare_data(X, y, times)
+    log_path = os.path.join(data_dir, "results.jsonl")
+    with open(log_path) as f:
+        lines = f.readlines()
+    with open(log_path, 'w') as f:
+        f.writelines(lines[:4])
+
+    counted_evaluations.clear()
+    resumed = HyperparameterTuner(n_candidates=4, factor=2, cache_dir=str(tmp_path), max_workers=1)
+    assert resumed.tune(X, y, families=['Decision Tree'], time_index=times) == best
+    assert len(counted_evaluations) == scored - 4
+
+    counted_evaluations.clear()
+    HyperparameterTuner(n_candidates=4, factor=2, cache_dir=str(tmp_path), max_workers=1).tune(
+        X, y, families=['Decision Tree'], time_index=times)
+    assert counted_evaluations == []
+
+
+def test_failing_candidate_is_logged_and_the_search_continues(tmp_path, monkeypatch):
+    X, y, times = hourly_data()
+    evaluate = energy_model_training._evaluate_candidate
+    failing = {}
+
+    def flaky(family, params, n_rows):
+        if not failing:
+            failing['params'] = params
+        if params == failing['params']:
+            raise ValueError("bad configuration")
+        return evaluate(family, params, n_rows)
+    monkeypatch.setattr(energy_model_training, '_evaluate_candidate', flaky)
+
+    tuner = HyperparameterTuner(n_candidates=4, factor=2, cache_dir=str(tmp_path), max_workers=1)
+    best = tuner.tune(X, y, families=['Decision Tree'], time_index=times)
+    assert best['Decision Tree'] != failing['params']
+    assert np.isfinite(tuner.best_scores['Decision Tree'])
+
+    log = HyperparameterTuner._load_log(os.path.join(tuner._prepare_data(X, y, times), "results.jsonl"))
+    failed = [entry for entry in log.values() if 'error' in entry]
+    assert len(failed) == 1 and failed[0]['r2'] == -np.inf
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+from sklearn.tree import DecisionTreeRegressor
+
+import energy_model_training
+from energy_model_training import WalkForwardValidator
+
+
+def hourly_rows(hours=600, per_hour=3, seed=0):
+    # Several rows per hour (buildings), shuffled like the training split leaves them
+    rng = np.random.default_rng(seed)
+    times = np.repeat(pd.date_range('2025-01-01', periods=hours, freq='h'), per_hour)
+    X = rng.normal(size=(len(times), 3))
+    trend = np.arange(len(times)) / len(times)
+    y = X @ [3.0, -2.0, 1.0] + 5 * trend + rng.normal(0, 0.1, len(times))
+    order = rng.permutation(len(times))
+    return X[order], y[order], pd.Series(times[order])
+
+
+@pytest.mark.parametrize('gap_hours', [0, 24])
+def test_folds_train_only_on_hours_before_the_gap(gap_hours):
+    _, _, times = hourly_rows()
+    sorted_times = np.sort(times.to_numpy())
+    validator = WalkForwardValidator(n_folds=4, gap_hours=gap_hours, min_train_fraction=0.5)
+    folds = validator.make_folds(sorted_times)
+    assert len(folds) == 4
+    assert folds[0][1] == pytest.approx(len(sorted_times) / 2, abs=3) and folds[-1][2] == len(sorted_times)
+    for (train_end, test_start, test_end), following in zip(folds, folds[1:] + [None]):
+        # Blocks start on an hour boundary and follow each other
+        assert sorted_times[test_start - 1] < sorted_times[test_start]
+        assert following is None or following[1] == test_end
+        gap = sorted_times[test_start] - sorted_times[train_end - 1]
+        assert gap > np.timedelta64(gap_hours, 'h')
+        assert sorted_times[train_end] >= sorted_times[test_start] - np.timedelta64(gap_hours, 'h')
+
+
+def test_scores_are_fits_on_the_past_and_are_reused(tmp_path, monkeypatch):
+    X, y, times = hourly_rows()
+    models = {'Linear Regression': LinearRegression(),
+              'Decision Tree': DecisionTreeRegressor(max_depth=4, random_state=0)}
+    validator = WalkForwardValidator(n_folds=3, gap_hours=12, min_train_fraction=0.5, max_workers=1,
+                                     cache_dir=str(tmp_path))
+    scores = validator.validate(models, X, y, times)
+
+    order = np.argsort(times.to_numpy(), kind='stable')
+    X_sorted, y_sorted = X[order], y[order]
+    for (train_end, test_start, test_end), fold in zip(validator.folds, scores['Linear Regression']['folds']):
+        model = LinearRegression().fit(X_sorted[:train_end], y_sorted[:train_end])
+        assert fold['r2'] == pytest.approx(r2_score(y_sorted[test_start:test_end], model.predict(
+            X_sorted[test_start:test_end])))
+
+    # A second run (e.g. after a restart) refits nothing
+    fitted = []
+    evaluate = energy_model_training._evaluate_fold
+    monkeypatch.setattr(energy_model_training, '_evaluate_fold', lambda *args: fitted.append(args) or evaluate(*args))
+    again = WalkForwardValidator(n_folds=3, gap_hours=12, min_train_fraction=0.5, max_workers=1,
+                                 cache_dir=str(tmp_path)).validate(models, X, y, times)
+    assert fitted == []
+    assert again == scores
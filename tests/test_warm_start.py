@@ -0,0 +1,71 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_model_training import (
+    EnergyConfig, EnergyMonitoringSystem, IoTEnergyMonitor, compute_data_fingerprint, load_energy_models,
+    pipeline_config
+)
+
+
+@pytest.fixture
+def saved_artifacts(tmp_path, monkeypatch, serving_pair):
+    data = tmp_path / "data.csv"
+    data.write_text("Date,EnergyConsumption\n2025-01-01,10\n")
+    monkeypatch.setattr(EnergyConfig, 'PREPROCESSOR_ARTIFACT', str(tmp_path / "preprocessor.joblib"))
+    monkeypatch.setattr(EnergyConfig, 'MODEL_ARTIFACT_PATTERN', str(tmp_path / "model_{}.joblib"))
+    monkeypatch.setattr(EnergyConfig, 'SERVING_ARTIFACT', str(tmp_path / "serving.joblib"))
+
+    def save(pair=None, **train_args):
+        comparator, preprocessor = pair or serving_pair
+        joblib.dump(comparator.results['Decision Tree']['model'], str(tmp_path / "model_Decision_Tree.joblib"))
+        joblib.dump({'scaler': preprocessor.scaler, 'feature_names': preprocessor.feature_names,
+                     'best_model_name': 'Decision Tree', 'best_model_metrics': {},
+                     'fingerprint': compute_data_fingerprint(str(data), pipeline_config(**train_args))},
+                    EnergyConfig.PREPROCESSOR_ARTIFACT)
+        return str(data)
+    return save
+
+
+def test_config_uses_the_effective_arguments(monkeypatch):
+    monkeypatch.setattr(EnergyConfig, 'CHUNK_SIZE', None)
+    assert pipeline_config() == pipeline_config(None, False, EnergyConfig.IMPUTATION_STRATEGY)
+    assert pipeline_config(chunk_size=50000)['chunk_size'] == 50000
+    assert pipeline_config(tune=True) != pipeline_config()
+    assert pipeline_config(imputation_strategy='interpolate') != pipeline_config(imputation_strategy='fast_knn')
+
+
+def test_artifacts_trained_with_other_arguments_are_stale(saved_artifacts):
+    data = saved_artifacts(chunk_size=50000, tune=True)
+    assert load_energy_models(data, chunk_size=50000, tune=True)[2] is True
+    assert load_energy_models(data)[2] is False
+    assert load_energy_models(data, chunk_size=50000)[2] is False
+
+    data = saved_artifacts(imputation_strategy='interpolate')
+    assert load_energy_models(data, imputation_strategy='interpolate')[2] is True
+    assert load_energy_models(data, imputation_strategy='fast_knn')[2] is False
+
+
+def test_rewritten_artifacts_replace_served_models_and_cached_predictions(saved_artifacts, other_serving_pair, monkeypatch):
+    monkeypatch.setattr(EnergyConfig, 'ARTIFACT_CHECK_SECONDS', 0.0)
+    system = EnergyMonitoringSystem(saved_artifacts())
+    monitor = system.iot_monitor
+    readings = pd.DataFrame({'Temperature': [24.5, 28.0, 31.2], 'Humidity': [50, 60, 70],
+                             'Occupancy': [10, 50, 80], 'hour': 0})
+    before = monitor.predict_batch(readings)
+
+    # Another process retrains and rewrites the artifacts
+    other = other_serving_pair
+    saved_artifacts(other)
+    os.utime(EnergyConfig.PREPROCESSOR_ARTIFACT, ns=(1, 1))
+    expected = IoTEnergyMonitor(*other).predict_batch(readings, use_cache=False)
+    assert not np.array_equal(before, expected)
+
+    # Picked up once the files stop changing, i.e. at the second check
+    assert np.array_equal(monitor.predict_batch(readings), before)
+    assert np.array_equal(monitor.predict_batch(readings), expected)
+    assert monitor.predict_energy(readings.iloc[0].to_dict()) == expected[0]
+    assert system.preprocessor.scaler is not other[1].scaler and monitor.prediction_cache.stats()['invalidations'] == 1